@@ -1,12 +1,92 @@
-from django.contrib import admin
-from .models import Package, Booking
+import uuid
+
+from django import forms
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.http import Http404
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils.html import format_html_join
+from django.utils.safestring import mark_safe
+from .models import ArchivedBooking, Package, Booking, BookingStatusChange, SeasonalPrice, GroupDiscount
+from .export import CONTENT_TYPES as EXPORT_CONTENT_TYPES, streaming_export_response
+from .imports import IMPORT_TYPES, CatalogueImport, ImportFormatError, format_diff, format_for, read_rows
+from .pagination import EstimatedCountPaginator
+from .transitions import TRANSITIONS, bulk_transition, record
+
+# Diff lines and errors shown on the import page; the counts cover every row.
+IMPORT_PREVIEW_LIMIT = 200
+
+
+class CatalogueImportForm(forms.Form):
+    file = forms.FileField(help_text='.csv, .ndjson or .json')
+    dry_run = forms.BooleanField(required=False, initial=True, label='Dry run (preview only)')
+
+
+class CatalogueImportMixin:
+    """Adds an "Import" button to the changelist that upserts rows from an uploaded file."""
+    import_type = None
+    change_list_template = 'admin/catalogue_change_list.html'
+    
+    def get_urls(self):
+        opts = self.model._meta
+        urls = [
+            path(
+                'import/',
+                self.admin_site.admin_view(self.import_view),
+                name=f'{opts.app_label}_{opts.model_name}_import',
+            ),
+        ]
+        return urls + super().get_urls()
+    
+    def import_view(self, request):
+        if not (self.has_add_permission(request) and self.has_change_permission(request)):
+            raise PermissionDenied
+        diffs, errors, counts = [], [], None
+        form = CatalogueImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['file']
+            
+            def on_diff(diff):
+                if len(diffs) < IMPORT_PREVIEW_LIMIT:
+                    diffs.append(format_diff(diff))
+            
+            def on_error(line, key, message):
+                if len(errors) < IMPORT_PREVIEW_LIMIT:
+                    errors.append((line, key, message))
+            
+            try:
+                importer = CatalogueImport(
+                    self.import_type,
+                    dry_run=form.cleaned_data['dry_run'],
+                    on_diff=on_diff,
+                    on_error=on_error,
+                )
+                counts = importer.run(read_rows(upload.file, format_for(upload.name)))
+            except ImportFormatError as e:
+                form.add_error('file', str(e))
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': f'Import {self.model._meta.verbose_name_plural}',
+            'form': form,
+            'counts': counts,
+            'dry_run': counts is not None and form.cleaned_data['dry_run'],
+            'diffs': diffs,
+            'errors': errors,
+            'preview_limit': IMPORT_PREVIEW_LIMIT,
+            'columns': IMPORT_TYPES[self.import_type]['fields'] + list(IMPORT_TYPES[self.import_type]['m2m']),
+        }
+        return TemplateResponse(request, 'admin/catalogue_import.html', context)
 
 
 @admin.register(Package)
-class PackageAdmin(admin.ModelAdmin):
+class PackageAdmin(CatalogueImportMixin, admin.ModelAdmin):
+    import_type = 'package'
     list_display = ['name', 'destination', 'price', 'duration_days', 'is_active', 'created_at']
     list_filter = ['is_active', 'destination', 'created_at']
     search_fields = ['name', 'destination', 'description']
+    ordering = ['name']
     list_editable = ['is_active']
     readonly_fields = ['package_id', 'created_at']
     
@@ -23,15 +103,98 @@ class PackageAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(SeasonalPrice)
+class SeasonalPriceAdmin(admin.ModelAdmin):
+    list_display = ['name', 'package', 'start_date', 'end_date', 'multiplier', 'is_active']
+    list_filter = ['is_active']
+    list_editable = ['is_active']
+    autocomplete_fields = ['package']
+
+
+@admin.register(GroupDiscount)
+class GroupDiscountAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'package', 'min_people', 'discount_percent', 'is_active']
+    list_filter = ['is_active']
+    list_editable = ['is_active']
+    autocomplete_fields = ['package']
+
+
+class PackageFilter(admin.SimpleListFilter):
+    """
+    Package filter that doesn't load every package into the sidebar: only the
+    selected one is fetched, and the picker queries the package autocomplete
+    endpoint as the agent types.
+    """
+    title = 'package'
+    parameter_name = 'package'
+    template = 'admin/bookings/package_filter.html'
+    
+    def selected_package_id(self):
+        try:
+            return uuid.UUID(self.value())
+        except (TypeError, ValueError):
+            return None
+    
+    def lookups(self, request, model_admin):
+        package_id = self.selected_package_id()
+        if package_id is None:
+            return []
+        return Package.objects.filter(pk=package_id).values_list('pk', 'name')
+    
+    def has_output(self):
+        return True
+    
+    def queryset(self, request, queryset):
+        package_id = self.selected_package_id()
+        if package_id is not None:
+            return queryset.filter(package_id=package_id)
+        return queryset
+
+
+class BookingAdminForm(forms.ModelForm):
+    """Offers only the statuses the booking may move to from its current one."""
+    
+    class Meta:
+        model = Booking
+        fields = '__all__'
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk and not self.instance._state.adding and 'status' in self.fields:
+            current = self.instance.status
+            allowed = {current, *TRANSITIONS.get(current, ())}
+            self.fields['status'].choices = [
+                (value, label) for value, label in Booking.STATUS_CHOICES if value in allowed
+            ]
+
+
+class BookingStatusChangeInline(admin.TabularInline):
+    model = BookingStatusChange
+    fields = ['created_at', 'from_status', 'to_status', 'changed_by', 'source', 'note']
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
+    form = BookingAdminForm
     list_display = ['booking_id', 'full_name', 'package', 'travel_date', 
                     'number_of_people', 'total_amount', 'status', 'created_at']
-    list_filter = ['status', 'travel_date', 'created_at', 'package']
-    search_fields = ['full_name', 'email', 'phone', 'booking_id']
+    list_filter = ['status', 'travel_date', 'created_at', PackageFilter]
+    # Prefix matches only, so MySQL can use the indexes on these columns;
+    # a full booking ID is matched exactly in get_search_results().
+    search_fields = ['^full_name', '^email', '^phone']
     readonly_fields = ['booking_id', 'created_at', 'updated_at']
-    list_editable = ['status']
-    date_hierarchy = 'travel_date'
+    autocomplete_fields = ['package']
+    raw_id_fields = ['user', 'guide']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ['mark_confirmed', 'mark_completed', 'mark_cancelled', 'export_csv', 'export_ndjson']
+    inlines = [BookingStatusChangeInline]
     
     fieldsets = (
         ('Booking Information', {
@@ -55,4 +218,106 @@ class BookingAdmin(admin.ModelAdmin):
     
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.select_related('user', 'package', 'guide')
\ No newline at end of file
+        return qs.select_related('user', 'package', 'guide')
+    
+    def get_search_results(self, request, queryset, search_term):
+        try:
+            booking_id = uuid.UUID(search_term.strip())
+        except ValueError:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk=booking_id), False
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and 'status' in form.changed_data:
+            record(obj, form.initial['status'], obj.status, user=request.user, source='admin')
+    
+    def _bulk_transition(self, request, queryset, to_status):
+        selected = queryset.count()
+        changed = bulk_transition(queryset, to_status, user=request.user, source='admin')
+        if changed == selected:
+            self.message_user(request, f"Marked {changed} bookings {to_status}.", messages.SUCCESS)
+        else:
+            self.message_user(
+                request,
+                f"Marked {changed} of {selected} selected bookings {to_status}; "
+                f"the others cannot move to {to_status} from their current status.",
+                messages.WARNING,
+            )
+    
+    @admin.action(description='Mark selected bookings confirmed', permissions=['change'])
+    def mark_confirmed(self, request, queryset):
+        self._bulk_transition(request, queryset, 'confirmed')
+    
+    @admin.action(description='Mark selected bookings completed', permissions=['change'])
+    def mark_completed(self, request, queryset):
+        self._bulk_transition(request, queryset, 'completed')
+    
+    @admin.action(description='Mark selected bookings cancelled', permissions=['change'])
+    def mark_cancelled(self, request, queryset):
+        self._bulk_transition(request, queryset, 'cancelled')
+    
+    @admin.action(description='Export selected bookings as CSV')
+    def export_csv(self, request, queryset):
+        return streaming_export_response(queryset, 'csv')
+    
+    @admin.action(description='Export selected bookings as NDJSON')
+    def export_ndjson(self, request, queryset):
+        return streaming_export_response(queryset, 'ndjson')
+    
+    def get_urls(self):
+        urls = [
+            path(
+                'export/<str:fmt>/',
+                self.admin_site.admin_view(self.export_view),
+                name='bookings_booking_export',
+            ),
+        ]
+        return urls + super().get_urls()
+    
+    def export_view(self, request, fmt):
+        """Stream every booking matching the changelist's current filters and search"""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        if fmt not in EXPORT_CONTENT_TYPES:
+            raise Http404(f"Unsupported export format: {fmt}")
+        changelist = self.get_changelist_instance(request)
+        return streaming_export_response(changelist.get_queryset(request), fmt)
+
+
+@admin.register(ArchivedBooking)
+class ArchivedBookingAdmin(admin.ModelAdmin):
+    """Read-only view of bookings moved out of the live table by ``archive_bookings``."""
+    list_display = ['booking_id', 'full_name', 'package', 'travel_date',
+                    'number_of_people', 'total_amount', 'status', 'archived_at']
+    list_filter = ['status', 'travel_date', PackageFilter]
+    search_fields = ['^full_name', '^email', '^phone']
+    list_select_related = ['package']
+    raw_id_fields = ['user', 'guide', 'package']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    readonly_fields = ['status_history']
+    
+    def get_search_results(self, request, queryset, search_term):
+        try:
+            booking_id = uuid.UUID(search_term.strip())
+        except ValueError:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk=booking_id), False
+    
+    @admin.display(description='Status history')
+    def status_history(self, obj):
+        changes = BookingStatusChange.objects.filter(booking_id=obj.pk).order_by('created_at')
+        return format_html_join(
+            mark_safe('<br>'), '{}: {} → {} ({})',
+            ((change.created_at, change.from_status, change.to_status, change.source or '-') for change in changes),
+        ) or '-'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,96 @@
+"""
+Hot/cold booking storage.
+
+Completed and cancelled bookings never change once their trip is long past,
+yet every listing of a customer's bookings filters ``Booking``. ``archive``
+moves those whose travel date is older than ``BOOKING_ARCHIVE_AFTER_DAYS``
+into ``ArchivedBooking`` in batches. Each batch is its own short transaction
+that locks its rows, copies them with one ``bulk_create`` and deletes them,
+so the hot table and its indexes stay small and no lock is held for long.
+
+Archiving changes no totals: the guide rating aggregates and daily rollups
+keep counting archived bookings, and their rebuilds read both tables. Pages
+that show a customer's whole history use ``history_page`` (keyset pagination
+across both tables). Status changes stay in ``BookingStatusChange`` under
+the same booking_id.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedBooking, Booking
+from .pagination import DEFAULT_PAGE_SIZE, amerged_keyset_page, merged_keyset_page
+from .signals import keep_aggregates
+
+ARCHIVE_STATUSES = ('completed', 'cancelled')
+DEFAULT_ARCHIVE_AFTER_DAYS = 365
+# Booking columns copied as-is; ArchivedBooking has the same names.
+FIELDS = [field.attname for field in Booking._meta.concrete_fields]
+
+
+def archive_cutoff(today=None):
+    """Bookings travelling before this date are old enough to archive."""
+    days = getattr(settings, 'BOOKING_ARCHIVE_AFTER_DAYS', DEFAULT_ARCHIVE_AFTER_DAYS)
+    return (today or timezone.localdate()) - timedelta(days=days)
+
+
+def archivable(cutoff):
+    return Booking.objects.filter(status__in=ARCHIVE_STATUSES, travel_date__lt=cutoff)
+
+
+def archive(cutoff=None, batch_size=500, pause=0):
+    """
+    Move every archivable booking travelling before ``cutoff`` (default:
+    ``archive_cutoff()``), ``batch_size`` at a time, sleeping ``pause``
+    seconds between batches. Returns how many were moved.
+    """
+    cutoff = cutoff or archive_cutoff()
+    moved = 0
+    while True:
+        # Unordered, so picking a batch is a plain range read of the
+        # (status, travel_date) index; archived rows drop out of the next pick.
+        pks = list(archivable(cutoff).order_by().values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return moved
+        moved += _archive_batch(pks, cutoff)
+        if pause:
+            time.sleep(pause)
+
+
+def _archive_batch(pks, cutoff):
+    from guide.models import GuideOccupancy
+
+    with transaction.atomic():
+        # Re-check under the lock in case a booking changed since it was picked.
+        rows = list(archivable(cutoff).select_for_update().filter(pk__in=pks).order_by('pk').values(*FIELDS))
+        if not rows:
+            return 0
+        booking_ids = [row['booking_id'] for row in rows]
+        ArchivedBooking.objects.bulk_create([ArchivedBooking(**row) for row in rows])
+        GuideOccupancy.objects.filter(booking_id__in=booking_ids).delete()
+        # The guide ratings and rollups must keep counting these bookings.
+        with keep_aggregates():
+            Booking.objects.filter(pk__in=booking_ids).delete()
+    return len(rows)
+
+
+def history(user):
+    """The querysets holding ``user``'s bookings, hot first."""
+    return [
+        Booking.objects.filter(user=user).select_related('package'),
+        ArchivedBooking.objects.filter(user=user).select_related('package'),
+    ]
+
+
+def history_page(user, keys, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """``keyset_page`` over ``user``'s live and archived bookings together."""
+    return merged_keyset_page(history(user), keys, cursor=cursor, page_size=page_size)
+
+
+async def ahistory_page(user, keys, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """Async variant of ``history_page``."""
+    return await amerged_keyset_page(history(user), keys, cursor=cursor, page_size=page_size)
+
@@ -0,0 +1,170 @@
+"""
+Versioned cache for the active package catalogue.
+
+The list of active packages is read on every page view but changes rarely,
+so it is cached under a key that embeds a version counter. Saving or
+deleting a ``Package`` bumps the counter (see ``bookings.signals``), which
+makes every old key unreachable at once instead of having to delete them.
+
+Reads go through three layers: this process's memory, the shared Django
+cache, and finally the database. Only one caller rebuilds a given version
+(a short ``cache.add`` lease, atomic across threads and processes);
+everybody else keeps serving the previous version until the new one lands.
+Other processes only see a bump if ``CACHES`` is shared (Redis, Memcached).
+"""
+import asyncio
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Package
+
+VERSION_KEY = 'bookings:catalogue:version'
+LIST_KEY = 'bookings:catalogue:active:{version}'
+LEASE_KEY = 'bookings:catalogue:lease:{version}'
+LEASE_TIMEOUT = 30
+WAIT_STEP = 0.05
+WAIT_LIMIT = 2.0
+DEFAULT_LIST_TIMEOUT = 60 * 60
+
+_lock = threading.Lock()
+_local = {'version': None, 'packages': None}
+_stats = {'hits': 0, 'shared_hits': 0, 'stale_hits': 0, 'misses': 0}
+
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+
+
+def current_version():
+    cache.add(VERSION_KEY, 0, None)
+    return cache.get(VERSION_KEY, 0)
+
+
+async def acurrent_version():
+    await cache.aadd(VERSION_KEY, 0, None)
+    return await cache.aget(VERSION_KEY, 0)
+
+
+def bump_version():
+    """Invalidate every cached copy of the catalogue."""
+    cache.add(VERSION_KEY, 0, None)
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+        return 1
+
+
+def list_timeout():
+    # Finite, so lists under superseded versions expire instead of piling
+    # up in a shared cache.
+    return getattr(settings, 'CATALOGUE_CACHE_TIMEOUT', DEFAULT_LIST_TIMEOUT)
+
+
+def _active_packages():
+    return Package.objects.filter(is_active=True).order_by('-created_at')
+
+
+def _load():
+    return list(_active_packages())
+
+
+async def _aload():
+    return [package async for package in _active_packages()]
+
+
+def _remember(version, packages):
+    with _lock:
+        _local['version'] = version
+        _local['packages'] = packages
+    return packages
+
+
+def get_active_packages():
+    """Return the active packages, newest first, served from cache when possible."""
+    version = current_version()
+    if _local['version'] == version:
+        _count('hits')
+        return _local['packages']
+
+    packages = cache.get(LIST_KEY.format(version=version))
+    if packages is not None:
+        _count('shared_hits')
+        return _remember(version, packages)
+
+    lease = LEASE_KEY.format(version=version)
+    if cache.add(lease, 1, LEASE_TIMEOUT):
+        try:
+            _count('misses')
+            packages = _load()
+            cache.set(LIST_KEY.format(version=version), packages, list_timeout())
+            return _remember(version, packages)
+        finally:
+            cache.delete(lease)
+
+    # Someone else is rebuilding this version: serve what we have, or wait.
+    if _local['packages'] is not None:
+        _count('stale_hits')
+        return _local['packages']
+    waited = 0.0
+    while waited < WAIT_LIMIT:
+        time.sleep(WAIT_STEP)
+        waited += WAIT_STEP
+        packages = cache.get(LIST_KEY.format(version=version))
+        if packages is not None:
+            _count('shared_hits')
+            return _remember(version, packages)
+    _count('misses')
+    return _remember(version, _load())
+
+
+async def aget_active_packages():
+    """Async twin of ``get_active_packages`` for ASGI views; same layers and counters."""
+    version = await acurrent_version()
+    if _local['version'] == version:
+        _count('hits')
+        return _local['packages']
+
+    packages = await cache.aget(LIST_KEY.format(version=version))
+    if packages is not None:
+        _count('shared_hits')
+        return _remember(version, packages)
+
+    lease = LEASE_KEY.format(version=version)
+    if await cache.aadd(lease, 1, LEASE_TIMEOUT):
+        try:
+            _count('misses')
+            packages = await _aload()
+            await cache.aset(LIST_KEY.format(version=version), packages, list_timeout())
+            return _remember(version, packages)
+        finally:
+            await cache.adelete(lease)
+
+    if _local['packages'] is not None:
+        _count('stale_hits')
+        return _local['packages']
+    waited = 0.0
+    while waited < WAIT_LIMIT:
+        await asyncio.sleep(WAIT_STEP)
+        waited += WAIT_STEP
+        packages = await cache.aget(LIST_KEY.format(version=version))
+        if packages is not None:
+            _count('shared_hits')
+            return _remember(version, packages)
+    _count('misses')
+    return _remember(version, await _aload())
+
+
+def catalogue_stats():
+    """Hit/miss counters for this process, plus the derived hit ratio."""
+    with _lock:
+        stats = dict(_stats)
+    served = sum(stats.values())
+    hits = stats['hits'] + stats['shared_hits'] + stats['stale_hits']
+    stats['hit_ratio'] = round(hits / served, 4) if served else None
+    stats['version'] = _local['version']
+    return stats
@@ -0,0 +1,169 @@
+"""
+Read-only JSON catalogue API (packages, guides, destinations) for the
+mobile app and partner sites, which poll it.
+
+Every response carries a strong ETag computed from the tables it is built
+from: their row count and ``MAX(updated_at)`` (for the guide link tables,
+which are only ever inserted into and deleted from, ``MAX(id)``). These
+are a couple of indexed aggregate queries, run before anything is loaded,
+so a poll with a matching ``If-None-Match`` is answered ``304 Not
+Modified`` without reading or serialising a single row.
+
+Bodies are gzip-compressed (or brotli, when the ``brotli`` package is
+installed) for clients that accept it. Each encoding is its own
+representation with its own ETag, and an encoded body is kept in the cache
+under that ETag, so after a change only the first client pays for
+serialising and compressing it.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.utils.text import compress_string
+from django.views.decorators.http import require_http_methods
+
+from .models import Package
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+BODY_KEY = 'bookings:catalogue_api:{etag}'
+DEFAULT_BODY_CACHE_TIMEOUT = 10 * 60
+BROTLI_QUALITY = 5
+
+
+def _compressors():
+    compressors = {}
+    if brotli is not None:
+        compressors['br'] = lambda body: brotli.compress(body, quality=BROTLI_QUALITY)
+    compressors['gzip'] = compress_string
+    return compressors
+
+
+COMPRESSORS = _compressors()
+
+
+def negotiate_encoding(request):
+    """The preferred encoding in COMPRESSORS the client accepts, or None for identity."""
+    accepted = set()
+    for item in request.headers.get('Accept-Encoding', '').split(','):
+        coding, _, params = item.strip().partition(';')
+        if params.replace(' ', '').lower() in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(coding.strip().lower())
+    for encoding in COMPRESSORS:
+        if encoding in accepted or '*' in accepted:
+            return encoding
+    return None
+
+
+def table_state(queryset, field='updated_at'):
+    """``(row count, MAX(field))``: changes whenever a row is added, removed or (for updated_at) saved."""
+    state = queryset.order_by().aggregate(count=Count('pk'), latest=Max(field))
+    return state['count'], state['latest']
+
+
+def catalogue_response(request, name, states, build, last_modified=None):
+    """
+    Answer a conditional GET for the catalogue resource ``name`` whose
+    content is determined by ``states``; ``build()`` returns the payload
+    and is only called when the client's copy is out of date.
+    """
+    encoding = negotiate_encoding(request)
+    digest = hashlib.blake2b(repr((name, states)).encode(), digest_size=16).hexdigest()
+    etag = f'"{digest}-{encoding}"' if encoding else f'"{digest}"'
+
+    # The 304 decision is made on the ETag alone: MAX(updated_at) does not
+    # move when a row is deleted, so If-Modified-Since could serve stale data.
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        key = BODY_KEY.format(etag=etag)
+        body = cache.get(key)
+        if body is None:
+            body = json.dumps(build(), cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+            if encoding:
+                body = COMPRESSORS[encoding](body)
+            cache.set(key, body, getattr(settings, 'CATALOGUE_API_BODY_CACHE_TIMEOUT', DEFAULT_BODY_CACHE_TIMEOUT))
+        response = HttpResponse(body, content_type='application/json')
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_vary_headers(response, ['Accept-Encoding'])
+    # Clients may reuse their copy for max_age seconds, then must revalidate.
+    patch_cache_control(response, public=True, max_age=getattr(settings, 'CATALOGUE_API_MAX_AGE', 0))
+    return response
+
+
+@require_http_methods(["GET", "HEAD"])
+def package_catalogue(request):
+    """Active packages, by name"""
+    count, latest = table_state(Package.objects.all())
+
+    def build():
+        packages = list(
+            Package.objects.filter(is_active=True).order_by('name').values(
+                'package_id', 'name', 'destination', 'description', 'duration_days', 'price', 'updated_at',
+            )
+        )
+        return {'success': True, 'count': len(packages), 'results': packages}
+
+    return catalogue_response(request, 'packages', (count, latest), build, last_modified=latest)
+
+
+@require_http_methods(["GET", "HEAD"])
+def destination_catalogue(request):
+    """Guide destinations, by name"""
+    from guide.models import Destination
+
+    count, latest = table_state(Destination.objects.all())
+
+    def build():
+        destinations = list(Destination.objects.order_by('name').values('id', 'name', 'country', 'description'))
+        return {'success': True, 'count': len(destinations), 'results': destinations}
+
+    return catalogue_response(request, 'destinations', (count, latest), build, last_modified=latest)
+
+
+@require_http_methods(["GET", "HEAD"])
+def guide_catalogue(request):
+    """Guides with their destinations, specialities and languages, by guide_id"""
+    from guide.models import Destination, Guide, Language, Speciality
+
+    states = [table_state(model.objects.all()) for model in (Guide, Destination, Speciality, Language)]
+    states += [
+        table_state(getattr(Guide, name).through.objects.all(), field='id')
+        for name in ('destinations', 'specialities', 'languages')
+    ]
+
+    def build():
+        guides = Guide.objects.prefetch_related('destinations', 'specialities', 'languages').order_by('guide_id')
+        results = [
+            {
+                'guide_id': guide.guide_id,
+                'name': guide.name,
+                'description': guide.description,
+                'rate_per_day': guide.rate_per_day,
+                'rating': guide.rating,
+                'rating_count': guide.rating_count,
+                'is_available': guide.is_available,
+                'destinations': [value.name for value in guide.destinations.all()],
+                'specialities': [value.name for value in guide.specialities.all()],
+                'languages': [value.name for value in guide.languages.all()],
+                'updated_at': guide.updated_at,
+            }
+            for guide in guides.iterator(chunk_size=2000)
+        ]
+        return {'success': True, 'count': len(results), 'results': results}
+
+    # No Last-Modified: a link change moves no updated_at.
+    return catalogue_response(request, 'guides', states, build)
@@ -0,0 +1,113 @@
+"""
+Streaming CSV / NDJSON export of bookings.
+
+Rows are pulled with ``QuerySet.iterator(chunk_size=...)`` and written to a
+``StreamingHttpResponse`` one line at a time, so memory use does not grow
+with the number of exported bookings.
+"""
+import csv
+import json
+from datetime import datetime
+
+from django.http import StreamingHttpResponse
+
+CHUNK_SIZE = 2000
+
+EXPORT_COLUMNS = [
+    'booking_id', 'created_at', 'updated_at', 'status', 'travel_date',
+    'package_id', 'package_name', 'destination',
+    'user_email', 'full_name', 'email', 'phone',
+    'number_of_people', 'total_amount',
+    'guide_id', 'guide_name', 'guide_amount', 'guide_rating',
+]
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Query-string filters accepted by the export URL, mirroring the admin filters.
+FILTER_PARAMS = {
+    'status': 'status',
+    'package': 'package_id',
+    'travel_date': 'travel_date',
+    'travel_date__gte': 'travel_date__gte',
+    'travel_date__lte': 'travel_date__lte',
+}
+
+
+class Echo:
+    """File-like object whose write() hands the value back, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def filter_bookings(queryset, params):
+    """Apply the supported ``FILTER_PARAMS`` present in ``params`` to ``queryset``."""
+    lookups = {}
+    for param, lookup in FILTER_PARAMS.items():
+        value = params.get(param)
+        if value:
+            lookups[lookup] = value
+    return queryset.filter(**lookups)
+
+
+def _export_value(value):
+    if value is None:
+        return ''
+    return str(value)
+
+
+def export_rows(queryset):
+    """Yield one tuple per booking in ``EXPORT_COLUMNS`` order."""
+    queryset = queryset.select_related('user', 'package', 'guide')
+    for booking in queryset.iterator(chunk_size=CHUNK_SIZE):
+        guide = booking.guide
+        yield (
+            booking.booking_id,
+            booking.created_at,
+            booking.updated_at,
+            booking.status,
+            booking.travel_date,
+            booking.package_id,
+            booking.package.name,
+            booking.package.destination,
+            booking.user.email,
+            booking.full_name,
+            booking.email,
+            booking.phone,
+            booking.number_of_people,
+            booking.total_amount,
+            guide.guide_id if guide else None,
+            guide.name if guide else None,
+            booking.guide_amount,
+            booking.guide_rating,
+        )
+
+
+def iter_csv(queryset):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in export_rows(queryset):
+        yield writer.writerow([_export_value(value) for value in row])
+
+
+def iter_ndjson(queryset):
+    for row in export_rows(queryset):
+        record = {
+            column: (None if value is None else _export_value(value))
+            for column, value in zip(EXPORT_COLUMNS, row)
+        }
+        yield json.dumps(record) + '\n'
+
+
+def streaming_export_response(queryset, fmt='csv'):
+    """Return a ``StreamingHttpResponse`` exporting ``queryset`` as CSV or NDJSON."""
+    if fmt not in CONTENT_TYPES:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    rows = iter_csv(queryset) if fmt == 'csv' else iter_ndjson(queryset)
+    response = StreamingHttpResponse(rows, content_type=CONTENT_TYPES[fmt])
+    filename = f"bookings-{datetime.now():%Y%m%d-%H%M%S}.{fmt}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,137 @@
+"""
+``Idempotency-Key`` support for booking creation.
+
+Clients that retry a POST after a timeout send the same ``Idempotency-Key``
+header. The first request claims the key by inserting an ``IdempotencyKey``
+row inside the same transaction that runs the view, and stores the response
+on it before committing. A retry finds the stored row and gets the original
+response back without the view (and so ``Package``/``Booking``) being
+touched. A concurrent duplicate blocks on the unique (user, key) index until
+the first transaction commits, so exactly one booking is ever inserted.
+
+Keys are scoped per user and expire after ``IDEMPOTENCY_KEY_TTL`` seconds.
+"""
+import hashlib
+import inspect
+from datetime import timedelta
+from functools import wraps
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAY_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+DEFAULT_TTL = 24 * 60 * 60
+
+
+def key_ttl():
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', DEFAULT_TTL))
+
+
+def expired_keys():
+    return IdempotencyKey.objects.filter(created_at__lt=timezone.now() - key_ttl())
+
+
+def _fingerprint(request):
+    return hashlib.sha256(request.body).hexdigest()
+
+
+def _replay(record):
+    response = HttpResponse(
+        record.response_body,
+        status=record.status_code,
+        content_type=record.content_type or 'application/json',
+    )
+    response[REPLAY_HEADER] = 'true'
+    return response
+
+
+def _claim(request, user, key, fingerprint):
+    """
+    Claim ``key`` for this request. Returns ``(record, None)`` when the view
+    should run, or ``(None, response)`` when the stored or an error response
+    must be returned instead. Must be called inside a transaction.
+    """
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user=user, key=key, path=request.path, request_hash=fingerprint
+                )
+            return record, None
+        except IntegrityError:
+            # Blocks until a concurrent holder of the key commits.
+            record = IdempotencyKey.objects.select_for_update().filter(
+                user=user, key=key
+            ).first()
+        if record is None:
+            continue
+        if record.created_at < timezone.now() - key_ttl():
+            record.delete()
+            continue
+        if record.path != request.path or record.request_hash != fingerprint:
+            return None, JsonResponse({
+                'success': False,
+                'error': 'Idempotency-Key was already used for a different request.'
+            }, status=422)
+        if record.status_code is None:
+            return None, JsonResponse({
+                'success': False,
+                'error': 'A request with this Idempotency-Key is still in progress.'
+            }, status=409)
+        return None, _replay(record)
+    return None, JsonResponse({'success': False, 'error': 'Could not claim Idempotency-Key.'}, status=409)
+
+
+def _run(view, user, request, key, *args, **kwargs):
+    if len(key) > MAX_KEY_LENGTH:
+        return JsonResponse({'success': False, 'error': 'Idempotency-Key is too long.'}, status=400)
+    fingerprint = _fingerprint(request)
+    with transaction.atomic():
+        record, response = _claim(request, user, key, fingerprint)
+        if response is not None:
+            return response
+        response = view(request, *args, **kwargs)
+        if response.status_code >= 500:
+            # Server errors are not remembered: undo the claim (and anything
+            # the view wrote) so the client's retry runs again.
+            transaction.set_rollback(True)
+            return response
+        record.status_code = response.status_code
+        record.content_type = response.get('Content-Type', '')
+        record.response_body = response.content.decode(response.charset)
+        record.save(update_fields=['status_code', 'content_type', 'response_body'])
+    return response
+
+
+def idempotent(view):
+    """
+    Make a POST view honour the ``Idempotency-Key`` header. Requests without
+    the header are passed straight through. Apply below ``login_required``.
+    """
+    if inspect.iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            if not key:
+                return await view(request, *args, **kwargs)
+            # request.user would load the user a second time: auser() caches
+            # separately and login_required has already called it.
+            user = await request.auser()
+            # Transactions are sync-only, so claim, run and store on one thread.
+            return await sync_to_async(_run)(async_to_sync(view), user, request, key, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view(request, *args, **kwargs)
+        return _run(view, request.user, request, key, *args, **kwargs)
+    return wrapper
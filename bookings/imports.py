@@ -0,0 +1,362 @@
+"""
+Bulk upsert of the package and guide catalogue from CSV, NDJSON or JSON.
+
+Files are read row by row and processed in batches. Per batch, the existing
+rows (matched on ``Package.name`` / ``Guide.guide_id``), their M2M links and
+the destinations, specialities and languages named in the batch are each
+fetched with one query. Every value is validated with the model field's own
+``clean()``, and only rows that actually change are written: one
+``bulk_create(update_conflicts=True)`` plus, per M2M table, one delete and
+one insert.
+
+An empty cell (or a missing key) leaves a field alone: new rows get the
+field's default, existing rows keep their value. M2M columns hold names
+separated by ``;`` (or a JSON list) and replace the guide's links; in JSON,
+``[]`` clears them.
+
+``bulk_create`` skips the save signals, so after writing the catalogue
+cache, the guide facet index and the search index are invalidated.
+"""
+import csv
+import io
+import json
+import os
+
+from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import BooleanField
+
+IMPORT_TYPES = {
+    'package': {
+        'model': 'bookings.Package',
+        'key': 'name',
+        'fields': ['name', 'destination', 'description', 'duration_days', 'price', 'is_active'],
+        'm2m': {},
+        'touch': ['updated_at'],
+    },
+    'guide': {
+        'model': 'guide.Guide',
+        'key': 'guide_id',
+        'fields': ['guide_id', 'name', 'description', 'rate_per_day', 'is_available'],
+        # M2M field -> attribute of the related model the file refers to.
+        'm2m': {'destinations': 'name', 'specialities': 'name', 'languages': 'name'},
+        'touch': ['updated_at'],
+    },
+}
+
+FORMATS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson', '.json': 'json'}
+M2M_SEPARATOR = ';'
+BOOLEAN_WORDS = {
+    'true': True, 't': True, 'yes': True, 'y': True, '1': True,
+    'false': False, 'f': False, 'no': False, 'n': False, '0': False,
+}
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def format_for(filename):
+    """Import format implied by a file name's extension."""
+    fmt = FORMATS.get(os.path.splitext(filename)[1].lower())
+    if fmt is None:
+        raise ImportFormatError(f"Unsupported file type: {filename} (use .csv, .ndjson or .json)")
+    return fmt
+
+
+def read_rows(fileobj, fmt):
+    """
+    Yield ``(line, row, error)`` from ``fileobj`` (text or binary). CSV and
+    NDJSON are streamed; a JSON array is loaded whole.
+    """
+    if isinstance(fileobj.read(0), bytes):
+        fileobj = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(fileobj)
+        for row in reader:
+            yield reader.line_num, row, None
+    elif fmt == 'ndjson':
+        for line, text in enumerate(fileobj, start=1):
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+            except json.JSONDecodeError as e:
+                yield line, None, f"Invalid JSON: {e.msg}"
+                continue
+            if isinstance(row, dict):
+                yield line, row, None
+            else:
+                yield line, None, "Each line must be a JSON object."
+    elif fmt == 'json':
+        try:
+            data = json.load(fileobj)
+        except json.JSONDecodeError as e:
+            raise ImportFormatError(f"Invalid JSON: {e.msg} (line {e.lineno})")
+        if not isinstance(data, list):
+            raise ImportFormatError("A JSON import must be an array of objects.")
+        for index, row in enumerate(data, start=1):
+            if isinstance(row, dict):
+                yield index, row, None
+            else:
+                yield index, None, "Each item must be a JSON object."
+    else:
+        raise ImportFormatError(f"Unknown import format: {fmt}")
+
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _clean(field, value):
+    if isinstance(value, str):
+        value = value.strip()
+        if isinstance(field, BooleanField):
+            value = BOOLEAN_WORDS.get(value.lower(), value)
+    return field.clean(value, None)
+
+
+def _names(value):
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [name.strip() for name in str(value).split(M2M_SEPARATOR) if name.strip()]
+
+
+class CatalogueImport:
+    """
+    Upsert rows of one ``IMPORT_TYPES`` entry. ``on_diff(diff)`` and
+    ``on_error(line, key, message)`` are called as rows are processed; a diff
+    is ``{'line', 'key', 'action': 'create'|'update', 'changes'}`` where
+    ``changes`` maps a field to ``(old, new)`` (M2M fields to
+    ``(removed, added)`` name lists).
+    """
+
+    def __init__(self, doc_type, dry_run=False, batch_size=1000, on_diff=None, on_error=None):
+        if doc_type not in IMPORT_TYPES:
+            raise ImportFormatError(f"Unknown import type: {doc_type}")
+        self.doc_type = doc_type
+        self.spec = IMPORT_TYPES[doc_type]
+        self.model = apps.get_model(self.spec['model'])
+        self.key = self.spec['key']
+        self.fields = {name: self.model._meta.get_field(name) for name in self.spec['fields']}
+        self.m2m = {name: self.model._meta.get_field(name) for name in self.spec['m2m']}
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.on_diff = on_diff
+        self.on_error = on_error
+        self.counts = {'rows': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'failed': 0}
+        self._seen = set()
+
+    def run(self, rows):
+        """Process ``(line, row, error)`` tuples from ``read_rows``; returns the counts."""
+        batch = []
+        for line, row, error in rows:
+            self.counts['rows'] += 1
+            if error:
+                self._error(line, None, error)
+                continue
+            batch.append((line, row))
+            if len(batch) >= self.batch_size:
+                self._process(batch)
+                batch = []
+        if batch:
+            self._process(batch)
+        if not self.dry_run and (self.counts['created'] or self.counts['updated']):
+            transaction.on_commit(self._invalidate)
+        return self.counts
+
+    def _error(self, line, key, message):
+        self.counts['failed'] += 1
+        if self.on_error:
+            self.on_error(line, key, message)
+
+    # ------------------------------------------------------------------
+    # One batch
+    # ------------------------------------------------------------------
+    def _process(self, batch):
+        keyed = []
+        for line, row in batch:
+            key = row.get(self.key)
+            key = str(key).strip() if not _blank(key) else ''
+            if not key:
+                self._error(line, None, f"{self.key}: This field is required.")
+            elif key in self._seen:
+                self._error(line, key, f"Duplicate {self.key}; an earlier row already has it.")
+            else:
+                self._seen.add(key)
+                keyed.append((line, key, row))
+        if not keyed:
+            return
+
+        existing = {
+            values[self.key]: values
+            for values in self.model.objects.filter(**{f'{self.key}__in': [key for _, key, _ in keyed]})
+            .values('pk', *self.fields)
+        }
+        links = self._existing_links([values['pk'] for values in existing.values()])
+        lookups = self._resolve_lookups(row for _, _, row in keyed)
+
+        objs, m2m_writes = [], []
+        for line, key, row in keyed:
+            current = existing.get(key)
+            values, desired, errors = self._clean_row(row, current, lookups)
+            if errors:
+                self._error(line, key, '; '.join(errors))
+                continue
+            changes = {}
+            if current is not None:
+                changes = {
+                    name: (current[name], value) for name, value in values.items() if current[name] != value
+                }
+            for name, wanted in desired.items():
+                have = links[name].get(current['pk'], {}) if current is not None else {}
+                removed = sorted(label for pk, (label, _) in have.items() if pk not in wanted)
+                added = sorted(label for pk, label in wanted.items() if pk not in have)
+                if removed or added:
+                    changes[name] = (removed, added)
+                    m2m_writes.append((key, name, set(wanted), have))
+
+            if current is None:
+                self.counts['created'] += 1
+                self._diff(line, key, 'create', {
+                    **{name: (None, value) for name, value in values.items()}, **changes
+                })
+            elif changes:
+                self.counts['updated'] += 1
+                self._diff(line, key, 'update', changes)
+            else:
+                self.counts['unchanged'] += 1
+                continue
+            if current is not None:
+                values = {**{name: current[name] for name in self.fields}, **values}
+            objs.append(self.model(**values))
+
+        if objs and not self.dry_run:
+            self._write(objs, m2m_writes)
+
+    def _clean_row(self, row, current, lookups):
+        values, desired, errors = {}, {}, []
+        for name, field in self.fields.items():
+            raw = row.get(name)
+            if _blank(raw):
+                if current is None:
+                    if field.has_default():
+                        values[name] = field.get_default()
+                    elif field.blank:
+                        values[name] = ''
+                    else:
+                        errors.append(f"{name}: This field is required.")
+                continue
+            try:
+                values[name] = _clean(field, raw)
+            except ValidationError as e:
+                errors.append(f"{name}: {' '.join(e.messages)}")
+        for name in self.m2m:
+            raw = row.get(name)
+            if _blank(raw) and raw != []:
+                continue
+            wanted = {}
+            for label in _names(raw):
+                match = lookups[name].get(label.casefold())
+                if match is None:
+                    errors.append(f"{name}: unknown value '{label}'.")
+                else:
+                    wanted[match[0]] = match[1]
+            desired[name] = wanted
+        return values, desired, errors
+
+    def _resolve_lookups(self, rows):
+        """``{m2m field: {casefolded label: (pk, label)}}`` for every label in ``rows``."""
+        if not self.m2m:
+            return {}
+        wanted = {name: set() for name in self.m2m}
+        for row in rows:
+            for name in self.m2m:
+                raw = row.get(name)
+                if not _blank(raw):
+                    wanted[name].update(_names(raw))
+        lookups = {}
+        for name, field in self.m2m.items():
+            label_attr = self.spec['m2m'][name]
+            lookups[name] = {
+                str(label).casefold(): (pk, label)
+                for pk, label in field.related_model.objects.filter(
+                    **{f'{label_attr}__in': wanted[name]}
+                ).values_list('pk', label_attr)
+            } if wanted[name] else {}
+        return lookups
+
+    def _existing_links(self, pks):
+        """``{m2m field: {owner pk: {value pk: (label, through pk)}}}``."""
+        links = {name: {} for name in self.m2m}
+        if not pks:
+            return links
+        for name, field in self.m2m.items():
+            through = field.remote_field.through
+            source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+            label_attr = self.spec['m2m'][name]
+            for through_pk, owner_pk, value_pk, label in through.objects.filter(
+                **{f'{source}__in': pks}
+            ).values_list('pk', source, target, f'{target}__{label_attr}'):
+                links[name].setdefault(owner_pk, {})[value_pk] = (label, through_pk)
+        return links
+
+    def _write(self, objs, m2m_writes):
+        options = {'update_conflicts': True}
+        options['update_fields'] = [name for name in self.fields if name != self.key] + self.spec['touch']
+        if connection.features.supports_update_conflicts_with_target:
+            options['unique_fields'] = [self.key]
+        with transaction.atomic():
+            # Matched on the natural key, so existing rows keep their primary keys.
+            self.model.objects.bulk_create(objs, batch_size=self.batch_size, **options)
+            if not m2m_writes:
+                return
+            pks = dict(
+                self.model.objects.filter(**{f'{self.key}__in': {key for key, _, _, _ in m2m_writes}})
+                .values_list(self.key, 'pk')
+            )
+            for name, field in self.m2m.items():
+                through = field.remote_field.through
+                source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+                stale, fresh = [], []
+                for key, field_name, wanted, have in m2m_writes:
+                    if field_name != name:
+                        continue
+                    stale += [through_pk for value_pk, (_, through_pk) in have.items() if value_pk not in wanted]
+                    fresh += [
+                        through(**{f'{source}_id': pks[key], f'{target}_id': value_pk})
+                        for value_pk in wanted if value_pk not in have
+                    ]
+                if stale:
+                    through.objects.filter(pk__in=stale).delete()
+                through.objects.bulk_create(fresh, batch_size=self.batch_size, ignore_conflicts=True)
+
+    def _diff(self, line, key, action, changes):
+        if self.on_diff:
+            self.on_diff({'line': line, 'key': key, 'action': action, 'changes': changes})
+
+    def _invalidate(self):
+        from search.backends import get_backend
+
+        if self.doc_type == 'package':
+            from .cache import bump_version
+            bump_version()
+        else:
+            from guide.facets import facet_index
+            facet_index.invalidate()
+        get_backend().rebuild()
+
+
+def format_diff(diff):
+    """One human-readable line for a diff from ``CatalogueImport``."""
+    marker = '+' if diff['action'] == 'create' else '~'
+    parts = []
+    for name, (old, new) in diff['changes'].items():
+        if diff['action'] == 'create':
+            parts.append(f"{name}={'; '.join(new) if isinstance(new, list) else new}")
+        elif isinstance(new, list):
+            parts.append(f"{name} " + ' '.join([f"-{label}" for label in old] + [f"+{label}" for label in new]))
+        else:
+            parts.append(f"{name}: {old} -> {new}")
+    return f"{marker} {diff['key']} (line {diff['line']}): {', '.join(parts)}"
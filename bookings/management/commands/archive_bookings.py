@@ -0,0 +1,39 @@
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from bookings.archive import archivable, archive, archive_cutoff
+
+
+class Command(BaseCommand):
+    help = (
+        "Move completed and cancelled bookings that travelled more than "
+        "BOOKING_ARCHIVE_AFTER_DAYS ago into the archive table, in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, help="Override BOOKING_ARCHIVE_AFTER_DAYS.")
+        parser.add_argument('--today', help="Treat this ISO date as today (default: the current date).")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--pause', type=float, default=0, help="Seconds to sleep between batches.")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the bookings that would move.")
+
+    def handle(self, *args, **options):
+        try:
+            today = date.fromisoformat(options['today']) if options['today'] else None
+        except ValueError:
+            raise CommandError("--today must be an ISO date (YYYY-MM-DD).")
+        if options['older_than_days'] is not None:
+            cutoff = (today or timezone.localdate()) - timedelta(days=options['older_than_days'])
+        else:
+            cutoff = archive_cutoff(today)
+        if options['dry_run']:
+            self.stdout.write(f"{archivable(cutoff).count()} bookings travelling before {cutoff} would be archived.")
+            return
+        started = time.perf_counter()
+        moved = archive(cutoff, batch_size=options['batch_size'], pause=options['pause'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {moved} bookings travelling before {cutoff} in {time.perf_counter() - started:.2f}s."
+        ))
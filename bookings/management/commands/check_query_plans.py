@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.query_plans import HOT_QUERIES, check
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the hot booking queries and fail if any has regressed to a full "
+        "table scan or a sort. Use -v 2 to print every plan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help=f"Only these checks: {', '.join(HOT_QUERIES)}.")
+
+    def handle(self, *args, **options):
+        unknown = set(options['names']) - set(HOT_QUERIES)
+        if unknown:
+            raise CommandError(f"Unknown checks: {', '.join(sorted(unknown))}.")
+        try:
+            results = check(options['names'])
+        except NotImplementedError as e:
+            raise CommandError(str(e))
+
+        failed = 0
+        for result in results:
+            if result.problems:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"FAIL {result.name}: {'; '.join(result.problems)}"))
+            else:
+                self.stdout.write(f"ok   {result.name}")
+            if result.problems or options['verbosity'] > 1:
+                self.stdout.write(f"     {result.sql}")
+                for line in result.plan:
+                    self.stdout.write(f"     {line}")
+        if failed:
+            raise CommandError(f"{failed} of {len(results)} hot queries lost their index.")
+        self.stdout.write(self.style.SUCCESS(f"All {len(results)} query plans use an index."))
@@ -0,0 +1,56 @@
+import time
+from datetime import date
+from functools import reduce
+from operator import or_
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+
+from bookings.models import Booking, Package
+from bookings.transitions import bulk_transition
+from guide.calendar import interval_for
+
+
+def finished_before(today):
+    """Bookings whose trip (travel_date plus the package's duration) ended by ``today``."""
+    durations = Package.objects.order_by().values_list('duration_days', flat=True).distinct()
+    clauses = []
+    for duration in durations:
+        # The trip occupies [travel_date, end); it is over once end <= today.
+        _, end = interval_for(today, duration)
+        latest_start = today - (end - today)
+        clauses.append(Q(package__duration_days=duration, travel_date__lte=latest_start))
+    if not clauses:
+        return Booking.objects.none()
+    return Booking.objects.filter(reduce(or_, clauses))
+
+
+class Command(BaseCommand):
+    help = "Mark confirmed bookings whose trip has ended as completed. Run nightly."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--today', help="Treat this ISO date as today (default: the current date).")
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Only count the bookings that would change.")
+
+    def handle(self, *args, **options):
+        try:
+            today = date.fromisoformat(options['today']) if options['today'] else timezone.localdate()
+        except ValueError:
+            raise CommandError("--today must be an ISO date (YYYY-MM-DD).")
+        due = finished_before(today).filter(status='confirmed')
+        if options['dry_run']:
+            self.stdout.write(f"{due.count()} confirmed bookings would be marked completed.")
+            return
+        started = time.perf_counter()
+        changed = bulk_transition(
+            due,
+            'completed',
+            source='complete_past_bookings',
+            note=f"Trip ended by {today}",
+            chunk_size=options['chunk_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Marked {changed} bookings completed in {time.perf_counter() - started:.2f}s."
+        ))
@@ -0,0 +1,62 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.imports import IMPORT_TYPES, CatalogueImport, ImportFormatError, format_diff, format_for, read_rows
+
+
+class Command(BaseCommand):
+    help = "Upsert packages (on name) or guides (on guide_id, with their M2M links) from a CSV, NDJSON or JSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('type', choices=sorted(IMPORT_TYPES))
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'ndjson', 'json'], help='Default: from the file extension.')
+        parser.add_argument('--dry-run', action='store_true', help='Print the changes without writing them.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--errors', help='Write rejected rows to this CSV file instead of the console.')
+
+    def handle(self, *args, **options):
+        show_diff = options['dry_run'] or options['verbosity'] >= 2
+        error_file = open(options['errors'], 'w', newline='') if options['errors'] else None
+        error_writer = csv.writer(error_file) if error_file else None
+        if error_writer:
+            error_writer.writerow(['line', 'key', 'error'])
+
+        def on_error(line, key, message):
+            if error_writer:
+                error_writer.writerow([line, key or '', message])
+            else:
+                self.stderr.write(f"line {line}{f' ({key})' if key else ''}: {message}")
+
+        def on_diff(diff):
+            self.stdout.write(format_diff(diff))
+
+        started = time.perf_counter()
+        try:
+            fmt = options['format'] or format_for(options['path'])
+            importer = CatalogueImport(
+                options['type'],
+                dry_run=options['dry_run'],
+                batch_size=options['batch_size'],
+                on_diff=on_diff if show_diff else None,
+                on_error=on_error,
+            )
+            with open(options['path'], 'rb') as fh:
+                counts = importer.run(read_rows(fh, fmt))
+        except (ImportFormatError, OSError) as e:
+            raise CommandError(str(e))
+        finally:
+            if error_file:
+                error_file.close()
+
+        elapsed = time.perf_counter() - started
+        summary = (
+            f"{counts['rows']} rows in {elapsed:.2f}s: {counts['created']} created, "
+            f"{counts['updated']} updated, {counts['unchanged']} unchanged, {counts['failed']} rejected"
+        )
+        if options['dry_run']:
+            summary += " (dry run, nothing written)"
+        style = self.style.WARNING if counts['failed'] else self.style.SUCCESS
+        self.stdout.write(style(summary + '.'))
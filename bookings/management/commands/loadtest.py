@@ -0,0 +1,251 @@
+"""
+Load test for the booking funnel.
+
+Simulated users run, concurrently and through the real URLconf and
+middleware stack (Django's in-process test client, no network):
+
+    POST /login/  ->  GET /book/  ->  POST /booking/create/  (repeated)
+
+while simulated agents page through ``/admin/bookings/booking/``. Latency
+percentiles and throughput are reported per endpoint and written to JSON so
+two releases can be compared with ``--compare``.
+
+Run it against a disposable database, e.g.::
+
+    python manage.py migrate --settings=tourism_backend.settings_loadtest
+    python manage.py loadtest --settings=tourism_backend.settings_loadtest --seed
+"""
+import json
+import math
+import platform
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.utils import timezone
+
+from bookings.models import Package
+
+USER_PREFIX = 'loadtest-user-'
+AGENT_EMAIL = 'loadtest-agent@example.com'
+PASSWORD = 'loadtest-password'
+DESTINATIONS = ['Goa', 'Kerala', 'Manali', 'Jaipur', 'Leh', 'Rishikesh', 'Darjeeling', 'Andaman']
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def timed(self, endpoint, call, ok_statuses):
+        started = time.perf_counter()
+        try:
+            response = call()
+            ok = response.status_code in ok_statuses
+        except Exception:
+            response, ok = None, False
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.samples[endpoint].append(elapsed)
+            if not ok:
+                self.errors[endpoint] += 1
+        return response
+
+    def report(self, wall_time):
+        endpoints = {}
+        for endpoint, samples in sorted(self.samples.items()):
+            ordered = sorted(samples)
+            endpoints[endpoint] = {
+                'requests': len(ordered),
+                'errors': self.errors[endpoint],
+                'rps': round(len(ordered) / wall_time, 2) if wall_time else None,
+                'p50_ms': round(percentile(ordered, 50) * 1000, 2),
+                'p95_ms': round(percentile(ordered, 95) * 1000, 2),
+                'p99_ms': round(percentile(ordered, 99) * 1000, 2),
+                'max_ms': round(ordered[-1] * 1000, 2),
+            }
+        return endpoints
+
+
+class Command(BaseCommand):
+    help = "Drive the booking funnel with concurrent simulated users and report latency/throughput."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true', help='Create load-test users and packages first.')
+        parser.add_argument('--packages', type=int, default=50, help='Packages to seed.')
+        parser.add_argument('--users', type=int, default=20, help='Concurrent simulated customers.')
+        parser.add_argument('--agents', type=int, default=2, help='Concurrent simulated admin agents.')
+        parser.add_argument('--iterations', type=int, default=10, help='Browse/book rounds per customer.')
+        parser.add_argument('--output', default='loadtest-results.json', help='Where to write the JSON report.')
+        parser.add_argument('--compare', help='Earlier JSON report to diff p95 and rps against.')
+        parser.add_argument('--random-seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            self.seed(options['packages'], options['users'])
+
+        package_ids = [str(pk) for pk in Package.objects.filter(is_active=True).values_list('package_id', flat=True)]
+        User = get_user_model()
+        emails = list(
+            User.objects.filter(username__startswith=USER_PREFIX)
+            .order_by('username')
+            .values_list('email', flat=True)[:options['users']]
+        )
+        if not package_ids or len(emails) < options['users']:
+            raise CommandError("Not enough load-test data; run again with --seed.")
+
+        recorder = Recorder()
+        threads = [
+            threading.Thread(target=self.customer, args=(
+                recorder, email, package_ids, options['iterations'], options['random_seed'] + index
+            ))
+            for index, email in enumerate(emails)
+        ]
+        threads += [
+            threading.Thread(target=self.agent, args=(recorder, options['iterations']))
+            for _ in range(options['agents'])
+        ]
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall_time = time.perf_counter() - started
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'options': {key: options[key] for key in ('users', 'agents', 'iterations', 'random_seed')},
+            'wall_time_s': round(wall_time, 3),
+            'endpoints': recorder.report(wall_time),
+        }
+        with open(options['output'], 'w') as fh:
+            json.dump(report, fh, indent=2)
+
+        self.print_report(report)
+        if options['compare']:
+            self.print_comparison(report, options['compare'])
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    # ------------------------------------------------------------------
+    # Seeding
+    # ------------------------------------------------------------------
+    def seed(self, package_count, user_count):
+        User = get_user_model()
+        rng = random.Random(0)
+        existing = Package.objects.filter(name__startswith='Load Test').count()
+        Package.objects.bulk_create([
+            Package(
+                name=f"Load Test {DESTINATIONS[i % len(DESTINATIONS)]} {i}",
+                destination=DESTINATIONS[i % len(DESTINATIONS)],
+                description="Seeded for load testing.",
+                duration_days=rng.randint(2, 12),
+                price=Decimal(rng.randint(800, 40000)),
+            )
+            for i in range(existing, package_count)
+        ])
+
+        # Hash once; every seeded account shares the password.
+        password = make_password(PASSWORD)
+        taken = set(User.objects.filter(username__startswith=USER_PREFIX).values_list('username', flat=True))
+        User.objects.bulk_create([
+            User(
+                username=f"{USER_PREFIX}{i:05d}",
+                email=f"{USER_PREFIX}{i:05d}@example.com",
+                first_name='Load',
+                last_name=f"User {i}",
+                password=password,
+            )
+            for i in range(user_count)
+            if f"{USER_PREFIX}{i:05d}" not in taken
+        ])
+        if not User.objects.filter(email=AGENT_EMAIL).exists():
+            User.objects.create_superuser(email=AGENT_EMAIL, username='loadtest-agent', password=PASSWORD)
+        self.stdout.write(f"Seeded up to {package_count} packages and {user_count} users.")
+
+    # ------------------------------------------------------------------
+    # Simulated clients
+    # ------------------------------------------------------------------
+    def customer(self, recorder, email, package_ids, iterations, seed):
+        rng = random.Random(seed)
+        client = Client()
+        try:
+            recorder.timed('POST /login/', lambda: client.post(
+                '/login/', {'username': email, 'password': PASSWORD}
+            ), ok_statuses=(302,))
+            for _ in range(iterations):
+                recorder.timed('GET /book/', lambda: client.get('/book/'), ok_statuses=(200,))
+                payload = {
+                    'package_id': rng.choice(package_ids),
+                    'full_name': 'Load Test',
+                    'email': email,
+                    'phone': '9000000000',
+                    'travel_date': (date.today() + timedelta(days=rng.randint(7, 365))).isoformat(),
+                    'number_of_people': rng.randint(1, 6),
+                }
+                recorder.timed('POST /booking/create/', lambda: client.post(
+                    '/booking/create/', json.dumps(payload), content_type='application/json'
+                ), ok_statuses=(201,))
+        finally:
+            connection.close()
+
+    def agent(self, recorder, iterations):
+        client = Client()
+        try:
+            recorder.timed('POST /login/', lambda: client.post(
+                '/login/', {'username': AGENT_EMAIL, 'password': PASSWORD}
+            ), ok_statuses=(302,))
+            for page in range(iterations):
+                recorder.timed('GET /admin/bookings/booking/', lambda: client.get(
+                    '/admin/bookings/booking/', {'p': page % 5}
+                ), ok_statuses=(200,))
+        finally:
+            connection.close()
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+    def print_report(self, report):
+        self.stdout.write(f"\nWall time: {report['wall_time_s']}s on {report['database']}\n")
+        header = f"{'endpoint':<32}{'reqs':>7}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for endpoint, row in report['endpoints'].items():
+            self.stdout.write(
+                f"{endpoint:<32}{row['requests']:>7}{row['errors']:>6}{row['rps']:>9}"
+                f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}"
+            )
+
+    def print_comparison(self, report, path):
+        with open(path) as fh:
+            previous = json.load(fh)
+        self.stdout.write(f"\nCompared with {path} ({previous.get('generated_at', '?')}):")
+        for endpoint, row in report['endpoints'].items():
+            before = previous.get('endpoints', {}).get(endpoint)
+            if not before:
+                self.stdout.write(f"  {endpoint}: new endpoint")
+                continue
+            p95_change = (row['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0
+            rps_change = (row['rps'] - before['rps']) / before['rps'] * 100 if before['rps'] else 0
+            self.stdout.write(f"  {endpoint}: p95 {p95_change:+.1f}%, rps {rps_change:+.1f}%")
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from bookings.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily booking rollups from the bookings table, e.g. after raw SQL or bulk edits."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rows = rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {rows} rollup rows in {time.perf_counter() - started:.2f}s."
+        ))
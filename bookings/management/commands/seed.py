@@ -0,0 +1,443 @@
+"""
+Synthetic data for capacity testing.
+
+Generates users, packages, guides (with their destination, speciality and
+language links) and bookings with skewed, roughly realistic distributions:
+a few packages and destinations take most of the demand, party sizes
+cluster around couples and families, travel dates follow the tourist
+season, past trips are completed or cancelled, and confirmed trips get a
+guide who serves the destination and is free on those dates.
+
+Every table is filled from a generator in ``--batch-size`` chunks with
+``bulk_create`` (M2M links through their through tables), so memory stays
+bounded by the number of packages and guides, not by the number of users
+or bookings. The same ``--seed`` and ``--today`` give the same rows.
+
+Bulk inserts skip ``save()`` and the signals, so bookings with a guide get
+their guide occupancy rows inserted alongside (by the same rule as
+``sync_booking``), and afterwards the command rebuilds what the rest
+would have maintained: guide ratings, the daily booking rollups, the facet
+and search indexes and the catalogue cache.
+Example::
+
+    python manage.py seed --users 200000 --packages 2000 --guides 20000 --bookings 2000000
+"""
+import math
+import random
+import time
+import uuid
+from collections import namedtuple
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from bookings import cache as catalogue_cache
+from bookings.models import Booking, Package
+from bookings.pricing import quote_many
+from bookings.rollups import rebuild as rebuild_rollups
+from guide.calendar import holds_interval, interval_for
+from guide.facets import facet_index
+from guide.models import Destination, Guide, GuideOccupancy, Language, Speciality
+from search.backends import get_backend
+
+PASSWORD = 'seed-password'
+PAST_DAYS = 365
+FUTURE_DAYS = 180
+
+DESTINATIONS = [
+    ('Goa', 'India'), ('Kerala', 'India'), ('Manali', 'India'), ('Jaipur', 'India'),
+    ('Leh', 'India'), ('Rishikesh', 'India'), ('Darjeeling', 'India'), ('Andaman', 'India'),
+    ('Udaipur', 'India'), ('Varanasi', 'India'), ('Shimla', 'India'), ('Ooty', 'India'),
+    ('Munnar', 'India'), ('Agra', 'India'), ('Hampi', 'India'), ('Coorg', 'India'),
+    ('Sikkim', 'India'), ('Mysore', 'India'), ('Kathmandu', 'Nepal'), ('Pokhara', 'Nepal'),
+    ('Thimphu', 'Bhutan'), ('Colombo', 'Sri Lanka'), ('Bali', 'Indonesia'), ('Dubai', 'UAE'),
+    ('Bangkok', 'Thailand'), ('Singapore', 'Singapore'), ('Maldives', 'Maldives'), ('Paris', 'France'),
+]
+SPECIALITIES = [
+    'Trekking', 'Heritage', 'Wildlife', 'Food', 'Photography', 'Adventure Sports',
+    'Spiritual', 'Architecture', 'Beaches', 'Nightlife', 'Birdwatching', 'Family Tours',
+]
+LANGUAGES = [
+    ('English', 'en'), ('Hindi', 'hi'), ('Bengali', 'bn'), ('Tamil', 'ta'), ('Malayalam', 'ml'),
+    ('Marathi', 'mr'), ('French', 'fr'), ('German', 'de'), ('Spanish', 'es'), ('Japanese', 'ja'),
+    ('Russian', 'ru'), ('Arabic', 'ar'),
+]
+FIRST_NAMES = [
+    'Aarav', 'Aditi', 'Arjun', 'Ananya', 'Dev', 'Diya', 'Ishaan', 'Kavya', 'Kabir', 'Meera',
+    'Nikhil', 'Neha', 'Rahul', 'Priya', 'Rohan', 'Sneha', 'Vikram', 'Tara', 'Yash', 'Zoya',
+    'Emma', 'Liam', 'Sofia', 'Noah', 'Mia', 'Lucas', 'Hana', 'Omar', 'Elena', 'Kenji',
+]
+LAST_NAMES = [
+    'Sharma', 'Verma', 'Iyer', 'Nair', 'Reddy', 'Das', 'Ghosh', 'Patel', 'Mehta', 'Kapoor',
+    'Singh', 'Gupta', 'Rao', 'Menon', 'Bose', 'Khan', 'Joshi', 'Pillai', 'Chatterjee', 'Sadhak',
+    'Smith', 'Müller', 'Dubois', 'García', 'Tanaka', 'Ivanova', 'Haddad', 'Rossi', 'Kim', 'Silva',
+]
+PACKAGE_STYLES = ['Classic', 'Luxury', 'Budget', 'Weekend', 'Grand', 'Family', 'Backpacker', 'Honeymoon']
+PACKAGE_KINDS = ['Escape', 'Retreat', 'Explorer', 'Getaway', 'Circuit', 'Trail', 'Discovery', 'Holiday']
+
+PARTY_SIZES = [1, 2, 3, 4, 5, 6, 7, 8]
+PARTY_WEIGHTS = [20, 38, 10, 16, 6, 6, 2, 2]
+# Relative demand by travel month, January first.
+SEASON = [1.3, 1.2, 1.0, 0.8, 0.9, 1.1, 0.7, 0.7, 0.8, 1.2, 1.4, 1.5]
+RATINGS = [Decimal(value) for value in ('5', '4.5', '4', '3.5', '3', '2', '1')]
+RATING_WEIGHTS = [35, 25, 20, 8, 6, 4, 2]
+
+
+# What booking generation and ``quote_many`` need from a package.
+SeedPackage = namedtuple('SeedPackage', ['pk', 'price', 'duration_days', 'destination_pk'])
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def zipf_cum_weights(count, exponent=0.9):
+    """Cumulative weights where item ``i`` is ``1 / (i + 1) ** exponent`` as likely."""
+    total = 0.0
+    weights = []
+    for rank in range(count):
+        total += 1 / (rank + 1) ** exponent
+        weights.append(total)
+    return weights
+
+
+class Command(BaseCommand):
+    help = "Generate large, deterministic synthetic users, packages, guides and bookings."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--packages', type=int, default=100)
+        parser.add_argument('--guides', type=int, default=300)
+        parser.add_argument('--bookings', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=1, help='Same seed, same data.')
+        parser.add_argument('--today', type=date.fromisoformat, help='Date travel dates are spread around (YYYY-MM-DD); default today.')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per bulk_create.')
+
+    def handle(self, *args, **options):
+        self.seed = options['seed']
+        self.batch_size = options['batch_size']
+        self.today = options['today'] or date.today()
+        self.namespace = uuid.uuid5(uuid.NAMESPACE_DNS, f'seed-{self.seed}.tourism.invalid')
+        self.prefix = f'seed{self.seed}-'
+        self.timings = []
+        if options['users'] < 1 or options['packages'] < 1:
+            raise CommandError("At least one user and one package are needed.")
+        User = get_user_model()
+        if User.objects.filter(username__startswith=self.prefix).exists():
+            raise CommandError(f"Data for seed {self.seed} already exists; pick another --seed.")
+
+        started = time.perf_counter()
+        lookups = self.seed_lookups()
+        self.seed_users(options['users'])
+        packages = self.seed_packages(options['packages'], lookups['destination'])
+        guides = self.seed_guides(options['guides'], lookups)
+        self.seed_bookings(options['bookings'], options['users'], packages, guides, lookups)
+        self.rebuild_derived()
+        self.report(time.perf_counter() - started)
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+    def rng(self, stream):
+        return random.Random(f'{self.seed}:{stream}')
+
+    def insert(self, label, model, rows, after_chunk=None):
+        """``bulk_create`` ``rows`` in chunks, one transaction each, and time it."""
+        started = time.perf_counter()
+        count = 0
+        for chunk in chunked(rows, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(chunk, batch_size=self.batch_size)
+                if after_chunk is not None:
+                    after_chunk(chunk)
+            count += len(chunk)
+            self.stdout.write(f"  {label}: {count}", ending='\r')
+        self.stdout.write('')
+        self.timings.append((label, count, time.perf_counter() - started))
+
+    def user_pk(self, index):
+        return uuid.uuid5(self.namespace, f'user:{index}')
+
+    def user_name(self, index):
+        first = FIRST_NAMES[(index * 7 + self.seed) % len(FIRST_NAMES)]
+        last = LAST_NAMES[(index * 13 + self.seed * 3) % len(LAST_NAMES)]
+        return first, last
+
+    def username(self, index):
+        return f'{self.prefix}user{index:07d}'
+
+    # ------------------------------------------------------------------
+    # Tables
+    # ------------------------------------------------------------------
+    def seed_lookups(self):
+        """Destinations, specialities and languages (shared by every seed)."""
+        started = time.perf_counter()
+        Destination.objects.bulk_create(
+            [Destination(name=name, country=country) for name, country in DESTINATIONS], ignore_conflicts=True
+        )
+        Speciality.objects.bulk_create([Speciality(name=name) for name in SPECIALITIES], ignore_conflicts=True)
+        Language.objects.bulk_create(
+            [Language(name=name, code=code) for name, code in LANGUAGES], ignore_conflicts=True
+        )
+        lookups = {
+            'destination': dict(Destination.objects.filter(
+                name__in=[name for name, _ in DESTINATIONS]
+            ).values_list('name', 'pk')),
+            'speciality': dict(Speciality.objects.filter(name__in=SPECIALITIES).values_list('name', 'pk')),
+            'language': dict(Language.objects.filter(
+                name__in=[name for name, _ in LANGUAGES]
+            ).values_list('name', 'pk')),
+        }
+        self.timings.append(('lookups', sum(len(values) for values in lookups.values()), time.perf_counter() - started))
+        return lookups
+
+    def seed_users(self, count):
+        # Hash once; every seeded account shares the password.
+        password = make_password(PASSWORD)
+        User = get_user_model()
+
+        def rows():
+            for index in range(count):
+                first, last = self.user_name(index)
+                yield User(
+                    pk=self.user_pk(index),
+                    username=self.username(index),
+                    email=f'{self.username(index)}@example.com',
+                    first_name=first,
+                    last_name=last,
+                    password=password,
+                )
+
+        self.insert('users', User, rows())
+
+    def seed_packages(self, count, destinations):
+        """Returns ``(packages, cum_weights)``; packages are ``(pk, price, duration_days, destination_pk)``."""
+        rng = self.rng('packages')
+        names = [name for name, _ in DESTINATIONS]
+        destination_weights = zipf_cum_weights(len(names), 0.8)
+        packages = []
+
+        def rows():
+            for index in range(count):
+                destination = rng.choices(names, cum_weights=destination_weights)[0]
+                duration_days = rng.choices(range(2, 15), weights=[6, 10, 12, 14, 12, 10, 8, 7, 6, 5, 4, 3, 3])[0]
+                per_day = rng.lognormvariate(math.log(3000), 0.45)
+                price = Decimal(max(999, round(per_day * duration_days, -2) - 1))
+                package = Package(
+                    pk=uuid.UUID(int=rng.getrandbits(128), version=4),
+                    name=f'{rng.choice(PACKAGE_STYLES)} {destination} {rng.choice(PACKAGE_KINDS)} #{index + 1}',
+                    destination=destination,
+                    description=(
+                        f'{duration_days} days in {destination}: '
+                        f'{", ".join(rng.sample(SPECIALITIES, 2)).lower()} and more.'
+                    ),
+                    duration_days=duration_days,
+                    price=price,
+                    is_active=rng.random() < 0.95,
+                )
+                packages.append(SeedPackage(package.pk, price, duration_days, destinations[destination]))
+                yield package
+
+        self.insert('packages', Package, rows())
+        # Popularity is independent of creation order.
+        popularity = list(range(len(packages)))
+        rng.shuffle(popularity)
+        return [packages[index] for index in popularity], zipf_cum_weights(len(packages))
+
+    def seed_guides(self, count, lookups):
+        """Returns ``(guides_by_destination, rates)`` for the available seeded guides."""
+        rng = self.rng('guides')
+        destination_names = [name for name, _ in DESTINATIONS]
+        destination_weights = zipf_cum_weights(len(destination_names), 0.8)
+        other_languages = [name for name, _ in LANGUAGES[2:]]
+        links = {}
+        guides_by_destination = {}
+        rates = {}
+
+        def rows():
+            for index in range(count):
+                code = f'{self.prefix.upper()}G{index:06d}'
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                destinations = set()
+                for _ in range(rng.choices([1, 2, 3], weights=[50, 35, 15])[0]):
+                    destinations.add(rng.choices(destination_names, cum_weights=destination_weights)[0])
+                languages = set(rng.sample(other_languages, rng.choices([0, 1, 2], weights=[55, 35, 10])[0]))
+                if rng.random() < 0.85:
+                    languages.add('English')
+                if rng.random() < 0.65 or not languages:
+                    languages.add('Hindi')
+                specialities = rng.sample(SPECIALITIES, rng.choices([1, 2, 3], weights=[40, 40, 20])[0])
+                rate = Decimal(min(max(round(rng.lognormvariate(math.log(2500), 0.35), -1), 800), 12000))
+                available = rng.random() < 0.92
+                links[code] = (
+                    [lookups['destination'][name] for name in sorted(destinations)],
+                    [lookups['speciality'][name] for name in specialities],
+                    [lookups['language'][name] for name in sorted(languages)],
+                    rate,
+                    available,
+                )
+                yield Guide(
+                    guide_id=code,
+                    name=f'{first} {last}',
+                    description=(
+                        f'{rng.randint(1, 25)} years guiding in {", ".join(sorted(destinations))}. '
+                        f'Speaks {", ".join(sorted(languages))}.'
+                    ),
+                    rate_per_day=rate,
+                    is_available=available,
+                )
+
+        through = {
+            name: getattr(Guide, field).through
+            for name, field in (('destination', 'destinations'), ('speciality', 'specialities'), ('language', 'languages'))
+        }
+        link_counts = {name: 0 for name in through}
+
+        def link(chunk):
+            # MySQL does not return ids from bulk_create, so look them up by code.
+            pks = dict(Guide.objects.filter(guide_id__in=[guide.guide_id for guide in chunk]).values_list('guide_id', 'pk'))
+            rows = {name: [] for name in through}
+            for code, pk in pks.items():
+                destination_pks, speciality_pks, language_pks, rate, available = links.pop(code)
+                rows['destination'] += [through['destination'](guide_id=pk, destination_id=value) for value in destination_pks]
+                rows['speciality'] += [through['speciality'](guide_id=pk, speciality_id=value) for value in speciality_pks]
+                rows['language'] += [through['language'](guide_id=pk, language_id=value) for value in language_pks]
+                if available:
+                    rates[pk] = rate
+                    for value in destination_pks:
+                        guides_by_destination.setdefault(value, []).append(pk)
+            for name, objs in rows.items():
+                through[name].objects.bulk_create(objs, batch_size=self.batch_size)
+                link_counts[name] += len(objs)
+
+        self.insert('guides', Guide, rows(), after_chunk=link)
+        for name, total in link_counts.items():
+            self.timings.append((f'guide {name} links', total, None))
+        return guides_by_destination, rates
+
+    def seed_bookings(self, count, user_count, packages, guides, lookups):
+        rng = self.rng('bookings')
+        packages, package_weights = packages
+        guides_by_destination, rates = guides
+        loyal = max(user_count // 10, 1)
+        first_day = self.today - timedelta(days=PAST_DAYS)
+        # One byte per guide per day of the seeded window: 1 = on a trip.
+        window = PAST_DAYS + FUTURE_DAYS + 16
+        busy = {}
+        peak = max(SEASON)
+        language_names = list(lookups['language'])
+        occupancies = []
+
+        def travel_date():
+            while True:
+                day = first_day + timedelta(days=rng.randrange(PAST_DAYS + FUTURE_DAYS))
+                if rng.random() * peak < SEASON[day.month - 1]:
+                    return day
+
+        def free_guide(package, start_date, end_date):
+            candidates = guides_by_destination.get(package.destination_pk)
+            if not candidates:
+                return None
+            offset = (start_date - first_day).days
+            length = (end_date - start_date).days
+            for _ in range(3):
+                pk = rng.choice(candidates)
+                days = busy.setdefault(pk, bytearray(window))
+                if 1 not in days[offset:offset + length]:
+                    days[offset:offset + length] = b'\x01' * length
+                    return pk
+            return None
+
+        def rows():
+            for _ in range(count):
+                package = rng.choices(packages, cum_weights=package_weights)[0]
+                user_index = rng.randrange(loyal) if rng.random() < 0.3 else rng.randrange(user_count)
+                first, last = self.user_name(user_index)
+                start_date = travel_date()
+                if start_date < self.today:
+                    status = 'completed' if rng.random() < 0.85 else 'cancelled'
+                else:
+                    status = rng.choices(['pending', 'confirmed', 'cancelled'], weights=[35, 55, 10])[0]
+                guide_pk = rating = None
+                if status in ('confirmed', 'completed') and rng.random() < 0.75:
+                    start_date, end_date = interval_for(start_date, package.duration_days)
+                    guide_pk = free_guide(package, start_date, end_date)
+                    if guide_pk is not None and status == 'completed' and rng.random() < 0.7:
+                        rating = rng.choices(RATINGS, weights=RATING_WEIGHTS)[0]
+                special_requests = ''
+                if rng.random() < 0.15:
+                    special_requests = f'Prefer a {rng.choice(language_names)}-speaking guide.'
+                booking = Booking(
+                    pk=uuid.UUID(int=rng.getrandbits(128), version=4),
+                    package_id=package.pk,
+                    user_id=self.user_pk(user_index),
+                    full_name=f'{first} {last}',
+                    email=f'{self.username(user_index)}@example.com',
+                    phone=f'9{rng.randrange(10 ** 9):09d}',
+                    travel_date=start_date,
+                    number_of_people=rng.choices(PARTY_SIZES, weights=PARTY_WEIGHTS)[0],
+                    total_amount=Decimal('0'),
+                    guide_id=guide_pk,
+                    guide_amount=rates[guide_pk] if guide_pk is not None else None,
+                    guide_rating=rating,
+                    status=status,
+                    special_requests=special_requests,
+                )
+                if holds_interval(guide_pk, status):
+                    occupancies.append(GuideOccupancy(
+                        booking_id=booking.pk, guide_id=guide_pk, start_date=start_date, end_date=end_date
+                    ))
+                booking._seed_package = package
+                yield booking
+
+        started = time.perf_counter()
+        written = occupied = 0
+        for chunk in chunked(rows(), self.batch_size):
+            quotes = quote_many(
+                (booking._seed_package, booking.number_of_people, booking.travel_date, None) for booking in chunk
+            )
+            for booking, booking_quote in zip(chunk, quotes):
+                booking.total_amount = booking_quote.total
+            with transaction.atomic():
+                Booking.objects.bulk_create(chunk, batch_size=self.batch_size)
+                GuideOccupancy.objects.bulk_create(occupancies, batch_size=self.batch_size)
+            written += len(chunk)
+            occupied += len(occupancies)
+            occupancies.clear()
+            self.stdout.write(f"  bookings: {written}", ending='\r')
+        self.stdout.write('')
+        self.timings.append(('bookings', written, time.perf_counter() - started))
+        self.timings.append(('guide occupancies', occupied, None))
+
+    # ------------------------------------------------------------------
+    # Derived data
+    # ------------------------------------------------------------------
+    def rebuild_derived(self):
+        """Bring up to date what save() and the signals would have maintained."""
+        started = time.perf_counter()
+        call_command('rebuild_guide_ratings', stdout=self.stdout)
+        rows = rebuild_rollups(batch_size=self.batch_size)
+        self.timings.append(('rollup rows', rows, None))
+        facet_index.invalidate()
+        get_backend().rebuild()
+        catalogue_cache.bump_version()
+        self.timings.append(('derived data', None, time.perf_counter() - started))
+
+    def report(self, elapsed):
+        self.stdout.write(f"{'table':<24}{'rows':>12}{'seconds':>10}{'rows/sec':>12}")
+        for label, rows, seconds in self.timings:
+            rate = f'{rows / seconds:,.0f}' if rows and seconds else ''
+            self.stdout.write(
+                f"{label:<24}{rows if rows is not None else '':>12}"
+                f"{f'{seconds:.2f}' if seconds is not None else '':>10}{rate:>12}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Seed {self.seed} done in {elapsed:.1f}s."))
+
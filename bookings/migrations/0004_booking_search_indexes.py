@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0003_idempotency_key"),
+        ("guide", "0003_guide_occupancy"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(fields=["full_name"], name="booking_full_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(fields=["email"], name="booking_email_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(fields=["phone"], name="booking_phone_idx"),
+        ),
+    ]
@@ -0,0 +1,115 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:26
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0004_booking_search_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GroupDiscount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "min_people",
+                    models.PositiveIntegerField(
+                        validators=[django.core.validators.MinValueValidator(2)]
+                    ),
+                ),
+                (
+                    "discount_percent",
+                    models.DecimalField(
+                        decimal_places=2,
+                        max_digits=5,
+                        validators=[
+                            django.core.validators.MinValueValidator(0),
+                            django.core.validators.MaxValueValidator(100),
+                        ],
+                    ),
+                ),
+                ("is_active", models.BooleanField(default=True)),
+                (
+                    "package",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Leave empty to apply to every package",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="group_discounts",
+                        to="bookings.package",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Group discounts",
+                "ordering": ["min_people"],
+            },
+        ),
+        migrations.CreateModel(
+            name="SeasonalPrice",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                ("start_date", models.DateField()),
+                (
+                    "end_date",
+                    models.DateField(
+                        help_text="Last travel date of the season (inclusive)"
+                    ),
+                ),
+                (
+                    "multiplier",
+                    models.DecimalField(
+                        decimal_places=4,
+                        help_text="1.2500 = 25% surcharge, 0.9000 = 10% off",
+                        max_digits=5,
+                        validators=[django.core.validators.MinValueValidator(0)],
+                    ),
+                ),
+                ("is_active", models.BooleanField(default=True)),
+                (
+                    "package",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Leave empty to apply to every package",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="seasonal_prices",
+                        to="bookings.package",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Seasonal prices",
+                "ordering": ["start_date"],
+                "constraints": [
+                    models.CheckConstraint(
+                        condition=models.Q(("end_date__gte", models.F("start_date"))),
+                        name="seasonal_price_end_after_start",
+                    )
+                ],
+            },
+        ),
+    ]
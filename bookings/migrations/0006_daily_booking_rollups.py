@@ -0,0 +1,109 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:30
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rollups(apps, schema_editor):
+    Booking = apps.get_model("bookings", "Booking")
+    DailyBookingRollup = apps.get_model("bookings", "DailyBookingRollup")
+    rows = (
+        Booking.objects.order_by()
+        .values("travel_date", "package_id", "status")
+        .annotate(
+            count=Count("pk"),
+            people=Sum("number_of_people"),
+            total=Sum("total_amount"),
+            guide=Sum("guide_amount"),
+        )
+    )
+    DailyBookingRollup.objects.bulk_create(
+        (
+            DailyBookingRollup(
+                day=row["travel_date"],
+                package_id=row["package_id"],
+                status=row["status"],
+                bookings=row["count"],
+                people=row["people"] or 0,
+                total_amount=row["total"] or Decimal("0"),
+                guide_amount=row["guide"] or Decimal("0"),
+            )
+            for row in rows.iterator(chunk_size=2000)
+        ),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0005_pricing_rules"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyBookingRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(help_text="Travel date")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("confirmed", "Confirmed"),
+                            ("cancelled", "Cancelled"),
+                            ("completed", "Completed"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("bookings", models.PositiveIntegerField(default=0)),
+                ("people", models.PositiveIntegerField(default=0)),
+                (
+                    "total_amount",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0"), max_digits=14
+                    ),
+                ),
+                (
+                    "guide_amount",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0"), max_digits=14
+                    ),
+                ),
+                (
+                    "package",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_rollups",
+                        to="bookings.package",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Daily booking rollups",
+                "indexes": [
+                    models.Index(
+                        fields=["package", "day"], name="rollup_package_day_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("day", "package", "status"), name="unique_daily_rollup"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
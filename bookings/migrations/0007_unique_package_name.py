@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:36
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def rename_duplicate_packages(apps, schema_editor):
+    """Suffix repeated package names ("Goa Trip (2)") so the constraint can be added."""
+    Package = apps.get_model("bookings", "Package")
+    duplicated = (
+        Package.objects.values("name")
+        .annotate(count=Count("pk"))
+        .filter(count__gt=1)
+        .values_list("name", flat=True)
+    )
+    for name in list(duplicated):
+        packages = Package.objects.filter(name=name).order_by("created_at", "pk")
+        for number, package in enumerate(packages[1:], start=2):
+            suffix = f" ({number})"
+            package.name = name[: 200 - len(suffix)] + suffix
+            package.save(update_fields=["name"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0006_daily_booking_rollups"),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicate_packages, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="package",
+            constraint=models.UniqueConstraint(
+                fields=("name",), name="unique_package_name"
+            ),
+        ),
+    ]
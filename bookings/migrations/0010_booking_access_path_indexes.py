@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0009_archived_bookings"),
+        ("guide", "0003_guide_occupancy"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["user", "created_at", "booking_id"],
+                name="booking_user_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["user", "travel_date", "booking_id"],
+                name="booking_user_travel_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["guide", "status", "guide_rating"],
+                name="booking_guide_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["status", "travel_date", "booking_id"],
+                name="booking_status_travel_idx",
+            ),
+        ),
+    ]
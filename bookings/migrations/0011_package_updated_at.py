@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0010_booking_access_path_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="package",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name="package",
+            index=models.Index(fields=["updated_at"], name="package_updated_at_idx"),
+        ),
+    ]
@@ -1,6 +1,8 @@
 import uuid
-from django.db import models
+from decimal import Decimal
+from django.db import models, transaction
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.translation import gettext_lazy as _
 
@@ -18,14 +20,84 @@ class Package(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name_plural = 'Packages'
+        constraints = [
+            # Catalogue imports match packages on their name.
+            models.UniqueConstraint(fields=['name'], name='unique_package_name'),
+        ]
+        indexes = [
+            # MAX(updated_at) validates the catalogue API's ETag.
+            models.Index(fields=['updated_at'], name='package_updated_at_idx'),
+        ]
     
     def __str__(self):
         return self.name
 
 
+class SeasonalPrice(models.Model):
+    """Per-person price multiplier for travel dates within a season"""
+    name = models.CharField(max_length=100)
+    package = models.ForeignKey(
+        Package,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='seasonal_prices',
+        help_text="Leave empty to apply to every package"
+    )
+    start_date = models.DateField()
+    end_date = models.DateField(help_text="Last travel date of the season (inclusive)")
+    multiplier = models.DecimalField(
+        max_digits=5,
+        decimal_places=4,
+        validators=[MinValueValidator(0)],
+        help_text="1.2500 = 25% surcharge, 0.9000 = 10% off"
+    )
+    is_active = models.BooleanField(default=True)
+    
+    class Meta:
+        verbose_name_plural = 'Seasonal prices'
+        ordering = ['start_date']
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(end_date__gte=models.F('start_date')),
+                name='seasonal_price_end_after_start',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.start_date} - {self.end_date}, x{self.multiplier})"
+
+
+class GroupDiscount(models.Model):
+    """Percentage off the package total for parties of at least ``min_people``"""
+    package = models.ForeignKey(
+        Package,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='group_discounts',
+        help_text="Leave empty to apply to every package"
+    )
+    min_people = models.PositiveIntegerField(validators=[MinValueValidator(2)])
+    discount_percent = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        validators=[MinValueValidator(0), MaxValueValidator(100)]
+    )
+    is_active = models.BooleanField(default=True)
+    
+    class Meta:
+        verbose_name_plural = 'Group discounts'
+        ordering = ['min_people']
+    
+    def __str__(self):
+        return f"{self.discount_percent}% off for {self.min_people}+ people"
+
+
 
 class Booking(models.Model):
     """Customer bookings"""
@@ -105,12 +177,271 @@ class Booking(models.Model):
     class Meta:
         verbose_name_plural = 'Bookings'
         ordering = ['-created_at']
+        indexes = [
+            # Prefix search from the admin changelist (``LIKE 'term%'``).
+            models.Index(fields=['full_name'], name='booking_full_name_idx'),
+            models.Index(fields=['email'], name='booking_email_idx'),
+            models.Index(fields=['phone'], name='booking_phone_idx'),
+            # A customer's bookings, newest first or by travel date (keyset pages).
+            models.Index(fields=['user', 'created_at', 'booking_id'], name='booking_user_created_idx'),
+            models.Index(fields=['user', 'travel_date', 'booking_id'], name='booking_user_travel_idx'),
+            # A guide's completed, rated bookings; covers the rating count/sum.
+            models.Index(fields=['guide', 'status', 'guide_rating'], name='booking_guide_status_idx'),
+            # Bookings in a status by travel date: admin filters, guide
+            # assignment, the completion sweep and archiving.
+            models.Index(fields=['status', 'travel_date', 'booking_id'], name='booking_status_travel_idx'),
+        ]
     
     def __str__(self):
         return f"{self.full_name} - {self.package.name}"
     
+    # Fields that decide whether a booking counts towards its guide's rating,
+    # and where and how much it counts in the daily rollups.
+    RATING_FIELDS = ('guide_id', 'status', 'guide_rating')
+    ROLLUP_FIELDS = ('travel_date', 'package_id', 'status', 'number_of_people', 'total_amount', 'guide_amount')
+    # save(update_fields=...) names that require the guide aggregates, the
+    # guide calendar or the rollups to be brought up to date.
+    RATING_SAVE_FIELDS = {'guide', 'guide_id', 'status', 'guide_rating'}
+    CALENDAR_SAVE_FIELDS = {'guide', 'guide_id', 'status', 'travel_date', 'package', 'package_id'}
+    ROLLUP_SAVE_FIELDS = {
+        'travel_date', 'package', 'package_id', 'status', 'number_of_people',
+        'total_amount', 'guide', 'guide_id', 'guide_amount',
+    }
+
+    def rating_contribution(self):
+        """(guide_id, rating) this booking adds to Guide.rating_count/rating_sum, or None"""
+        if self.status != 'completed' or self.guide_id is None or self.guide_rating is None:
+            return None
+        return self.guide_id, Decimal(str(self.guide_rating))
+
+    def rollup_contribution(self):
+        """((day, package_id, status), (bookings, people, total_amount, guide_amount)) for DailyBookingRollup"""
+        travel_date = self._meta.get_field('travel_date').to_python(self.travel_date)
+        return (travel_date, self.package_id, self.status), (
+            1,
+            self.number_of_people,
+            Decimal(str(self.total_amount)),
+            Decimal(str(self.guide_amount or 0)),
+        )
+
+    def _lock_stored(self, fields):
+        """
+        The stored row (only ``fields``) as a Booking, locked until the end
+        of the transaction, or None for a new booking. Concurrent saves of
+        the same booking then take turns, and each applies its deltas
+        against the row it actually replaces.
+        """
+        if self._state.adding or not fields:
+            return None
+        row = type(self).objects.select_for_update().filter(pk=self.pk).values(*fields).first()
+        return None if row is None else Booking(**row)
+
+    def _sync_guide_rating(self, previous):
+        from guide.models import Guide
+        current = self.rating_contribution()
+        if previous != current:
+            if previous is not None:
+                Guide.apply_rating_delta(previous[0], -1, -previous[1])
+            if current is not None:
+                Guide.apply_rating_delta(current[0], 1, current[1])
+
     def save(self, *args, **kwargs):
         # Auto-calculate guide amount based on guide's rate
         if self.guide and not self.guide_amount:
             self.guide_amount = self.guide.rate_per_day
-        super().save(*args, **kwargs)
\ No newline at end of file
+        from guide.calendar import holds_interval, sync_booking
+        update_fields = kwargs.get('update_fields')
+        touched = None if update_fields is None else set(update_fields)
+        sync_rating = touched is None or bool(touched & self.RATING_SAVE_FIELDS)
+        sync_calendar = touched is None or bool(touched & self.CALENDAR_SAVE_FIELDS)
+        sync_rollup = touched is None or bool(touched & self.ROLLUP_SAVE_FIELDS)
+        fields = set()
+        if sync_rating:
+            fields.update(self.RATING_FIELDS)
+        if sync_rollup:
+            fields.update(self.ROLLUP_FIELDS)
+        if sync_calendar:
+            fields.update(('guide_id', 'status'))
+        with transaction.atomic():
+            stored = self._lock_stored(fields)
+            previous = stored.rating_contribution() if sync_rating and stored else None
+            previous_rollup = stored.rollup_contribution() if sync_rollup and stored else None
+            super().save(*args, **kwargs)
+            if sync_rating:
+                self._sync_guide_rating(previous)
+            if sync_rollup:
+                from .rollups import apply_change
+                apply_change(previous_rollup, self.rollup_contribution())
+            if sync_calendar:
+                had_interval = stored is not None and holds_interval(stored.guide_id, stored.status)
+                # Raises GuideUnavailable (rolling the save back) on a double-booking.
+                sync_booking(self, had_interval=had_interval)
+
+    def clean(self):
+        from guide.calendar import RELEASED_STATUSES, booking_interval, is_free
+        super().clean()
+        if self.guide_id and self.package_id and self.travel_date and self.status not in RELEASED_STATUSES:
+            start_date, end_date = booking_interval(self)
+            if not is_free(self.guide_id, start_date, end_date, exclude_booking=self.pk):
+                raise ValidationError({
+                    'guide': _("This guide is already booked between %(start)s and %(end)s.") % {
+                        'start': start_date, 'end': end_date,
+                    }
+                })
+
+    def delete(self, *args, **kwargs):
+        fields = set(self.RATING_FIELDS) | set(self.ROLLUP_FIELDS)
+        with transaction.atomic():
+            # Delete with the stored values, so the post_delete receiver
+            # (bookings.signals) takes out what the row actually counted
+            # even if this instance is a stale copy.
+            stored = self._lock_stored(fields)
+            if stored is not None:
+                for field in fields:
+                    setattr(self, field, getattr(stored, field))
+            return super().delete(*args, **kwargs)
+
+
+class IdempotencyKey(models.Model):
+    """
+    Stored outcome of a request sent with an ``Idempotency-Key`` header, so a
+    retried request can be answered with the original response.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='idempotency_keys'
+    )
+    key = models.CharField(max_length=255)
+    path = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    response_body = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        verbose_name_plural = 'Idempotency keys'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key_per_user'),
+        ]
+    
+    def __str__(self):
+        return f"{self.key} ({self.path})"
+
+
+class BookingStatusChange(models.Model):
+    """Audit log of booking status transitions, written by ``bookings.transitions``"""
+    # No database constraint: the history stays when its booking is archived
+    # (see ``bookings.archive``) and is still found by booking_id.
+    booking = models.ForeignKey(
+        Booking,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='status_changes'
+    )
+    from_status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES)
+    changed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='booking_status_changes'
+    )
+    source = models.CharField(max_length=50, blank=True, help_text="What made the change, e.g. admin or a command name")
+    note = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name_plural = 'Booking status changes'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['booking', 'created_at'], name='status_change_booking_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.booking_id}: {self.from_status} -> {self.to_status}"
+
+
+class ArchivedBooking(models.Model):
+    """
+    A completed or cancelled booking moved out of ``Booking`` by
+    ``bookings.archive`` once it is old enough. Same columns, read-only.
+    """
+    STATUS_CHOICES = Booking.STATUS_CHOICES
+    
+    booking_id = models.UUIDField(primary_key=True, editable=False)
+    package = models.ForeignKey(
+        'Package',
+        on_delete=models.PROTECT,
+        related_name='archived_bookings'
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_bookings'
+    )
+    full_name = models.CharField(max_length=200)
+    email = models.EmailField()
+    phone = models.CharField(max_length=20)
+    travel_date = models.DateField()
+    number_of_people = models.PositiveIntegerField(default=1)
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    guide = models.ForeignKey(
+        'guide.Guide',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='archived_bookings',
+    )
+    guide_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    guide_rating = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True)
+    guide_review = models.TextField(blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    special_requests = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name_plural = 'Archived bookings'
+        ordering = ['-created_at']
+        indexes = [
+            # The customer's booking history, in the orders the pages use.
+            models.Index(fields=['user', 'created_at', 'booking_id'], name='archived_user_created_idx'),
+            models.Index(fields=['user', 'travel_date', 'booking_id'], name='archived_user_travel_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.full_name} - {self.package.name}"
+
+
+class DailyBookingRollup(models.Model):
+    """
+    Bookings per travel date, package and status with their traveller count
+    and amount sums, maintained incrementally by ``bookings.rollups``.
+    """
+    day = models.DateField(help_text="Travel date")
+    package = models.ForeignKey(
+        Package,
+        on_delete=models.CASCADE,
+        related_name='daily_rollups'
+    )
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES)
+    bookings = models.PositiveIntegerField(default=0)
+    people = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0'))
+    guide_amount = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0'))
+    
+    class Meta:
+        verbose_name_plural = 'Daily booking rollups'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'package', 'status'], name='unique_daily_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['package', 'day'], name='rollup_package_day_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} {self.package_id} {self.status}: {self.bookings}"
@@ -0,0 +1,176 @@
+"""
+Keyset (cursor) pagination for booking listings.
+
+Instead of OFFSET, each page remembers the sort key of its last row and the
+next page asks for rows strictly after it, e.g. for ``(-created_at,
+-booking_id)``::
+
+    created_at < last.created_at
+    OR (created_at = last.created_at AND booking_id < last.booking_id)
+
+With an index on the sort columns every page costs the same, however deep.
+Cursors are opaque to clients: URL-safe base64 of the JSON-encoded key.
+
+``EstimatedCountPaginator`` covers the admin changelist, which needs page
+numbers: past a threshold it trusts the query planner's row estimate rather
+than running an exact ``COUNT(*)``.
+"""
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps([str(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, fields):
+    """Decode ``cursor`` into python values typed by the model ``fields``."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor('Malformed cursor.')
+    if not isinstance(raw, list) or len(raw) != len(fields):
+        raise InvalidCursor('Malformed cursor.')
+    try:
+        return [field.to_python(value) for field, value in zip(fields, raw)]
+    except ValidationError:
+        raise InvalidCursor('Malformed cursor.')
+
+
+def _keyset_queryset(queryset, keys, cursor, page_size):
+    model = queryset.model
+    fields = [model._meta.get_field(key) for key in keys]
+    queryset = queryset.order_by(*[f'-{key}' for key in keys])
+
+    if cursor:
+        values = decode_cursor(cursor, fields)
+        condition = Q()
+        for position, key in enumerate(keys):
+            step = Q(**{f'{key}__lt': values[position]})
+            for previous, value in zip(keys[:position], values[:position]):
+                step &= Q(**{previous: value})
+            condition |= step
+        queryset = queryset.filter(condition)
+    return fields, queryset[:page_size + 1]
+
+
+def _finish_page(rows, fields, page_size):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, field.attname) for field in fields])
+    return rows, next_cursor
+
+
+def keyset_page(queryset, keys, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Return ``(rows, next_cursor)`` for one page of ``queryset``.
+
+    ``keys`` are field names sorted in descending order, the last of which
+    must be unique (the primary key) so the order is total. ``next_cursor``
+    is None on the last page. Raises ``InvalidCursor`` for a bad cursor.
+    """
+    fields, page = _keyset_queryset(queryset, keys, cursor, page_size)
+    return _finish_page(list(page), fields, page_size)
+
+
+def page_queryset(queryset, keys, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """The sliced queryset ``keyset_page`` runs, e.g. to inspect its plan."""
+    return _keyset_queryset(queryset, keys, cursor, page_size)[1]
+
+
+async def akeyset_page(queryset, keys, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """Async variant of ``keyset_page`` using async queryset iteration."""
+    fields, page = _keyset_queryset(queryset, keys, cursor, page_size)
+    return _finish_page([row async for row in page], fields, page_size)
+
+
+def _merge_pages(pages, keys):
+    return sorted(
+        (row for page in pages for row in page),
+        key=lambda row: [getattr(row, key) for key in keys],
+        reverse=True,
+    )
+
+
+def merged_keyset_page(querysets, keys, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    ``keyset_page`` over several querysets (e.g. of models sharing ``keys``)
+    read as one listing: each contributes at most one page and the rows are
+    merged in key order, so a cursor works across all of them.
+    """
+    pages = []
+    for queryset in querysets:
+        fields, page = _keyset_queryset(queryset, keys, cursor, page_size)
+        pages.append(list(page))
+    return _finish_page(_merge_pages(pages, keys), fields, page_size)
+
+
+async def amerged_keyset_page(querysets, keys, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """Async variant of ``merged_keyset_page``."""
+    pages = []
+    for queryset in querysets:
+        fields, page = _keyset_queryset(queryset, keys, cursor, page_size)
+        pages.append([row async for row in page])
+    return _finish_page(_merge_pages(pages, keys), fields, page_size)
+
+
+def page_size_from(request, default=DEFAULT_PAGE_SIZE):
+    try:
+        size = int(request.GET.get('page_size', default))
+    except (TypeError, ValueError):
+        size = default
+    return min(max(size, 1), MAX_PAGE_SIZE)
+
+
+def estimated_count(queryset):
+    """
+    Planner row estimate for ``queryset`` from MySQL's ``EXPLAIN``, or None
+    where the backend gives no estimate.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'mysql':
+        return None
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN {sql}', params)
+        columns = [column[0].lower() for column in cursor.description]
+        rows = cursor.fetchall()
+    if 'rows' not in columns:
+        return None
+    position = columns.index('rows')
+    return max((row[position] or 0 for row in rows), default=0)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that reports the planner's estimate once a listing is larger
+    than ``ADMIN_COUNT_ESTIMATE_THRESHOLD`` rows; smaller listings, and
+    backends without estimates, still get an exact count.
+    """
+
+    @cached_property
+    def count(self):
+        threshold = getattr(settings, 'ADMIN_COUNT_ESTIMATE_THRESHOLD', 10000)
+        estimate = estimated_count(self.object_list)
+        if estimate is not None and estimate > threshold:
+            return estimate
+        return super().count
@@ -0,0 +1,249 @@
+"""
+Package pricing and quotes.
+
+A quote for one (package, party size, travel date, guide) combination is::
+
+    per_person   = package.price x seasonal multiplier for the travel date
+    gross        = per_person x people
+    discount     = gross x group discount for the party size
+    total        = gross - discount               -> Booking.total_amount
+    guide_amount = guide.rate_per_day             (billed separately, as
+                                                   Booking.save() does)
+
+A package's own ``SeasonalPrice`` / ``GroupDiscount`` rows take precedence
+over the global ones (no package). Among overlapping seasons the highest
+multiplier wins. The group discount is the one with the largest
+``min_people`` not above the party size.
+
+``quote_many`` prices a whole batch in one vectorised NumPy pass over
+integer paise (rounded half up), so a catalogue page pricing every package
+for several party sizes costs a few array operations, not a loop of ORM
+calls. The rule tables are kept in process memory and reloaded when the
+version counter in the Django cache moves; ``bookings.signals`` bumps it
+when a rule changes. Other processes only see the bump if ``CACHES`` is
+shared (Redis, Memcached).
+"""
+import threading
+from collections import namedtuple
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+from django.core.cache import cache
+
+from .models import GroupDiscount, SeasonalPrice
+
+VERSION_KEY = 'bookings:pricing:version'
+
+# Fixed-point scale for multipliers and discounts: 10000 = 1.0 / 100%.
+SCALE = 10000
+GLOBAL = -1
+UNKNOWN_PACKAGE = -2
+NO_DATE = -1
+# Largest gross (in paise) whose discount product still fits in int64.
+MAX_GROSS = np.iinfo(np.int64).max // SCALE
+
+# Party sizes shown on the catalogue page.
+CATALOGUE_PARTY_SIZES = (1, 4)
+
+
+class Quote(namedtuple('Quote', [
+    'package_id', 'people', 'travel_date', 'per_person', 'gross', 'discount',
+    'total', 'guide_amount', 'multiplier', 'discount_percent',
+])):
+    __slots__ = ()
+
+    @property
+    def total_per_person(self):
+        """Per-person share of the discounted total."""
+        return (self.total / self.people).quantize(Decimal('0.01'))
+
+
+_lock = threading.Lock()
+_rules = {'version': None, 'tables': None}
+
+
+def current_version():
+    cache.add(VERSION_KEY, 0, None)
+    return cache.get(VERSION_KEY, 0)
+
+
+def bump_version():
+    """Make every process reload the pricing rules."""
+    cache.add(VERSION_KEY, 0, None)
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+        return 1
+
+
+def _paise(amount):
+    return int((Decimal(amount) * 100).to_integral_value())
+
+
+def _rupees(paise):
+    return Decimal(int(paise)).scaleb(-2)
+
+
+class RuleTables:
+    """Active pricing rules as parallel NumPy arrays."""
+
+    def __init__(self, seasons, discounts):
+        self.package_codes = {}
+        self.season_start = np.array([rule.start_date.toordinal() for rule in seasons], dtype=np.int64)
+        self.season_end = np.array([rule.end_date.toordinal() for rule in seasons], dtype=np.int64)
+        self.season_bp = np.array([int(rule.multiplier * SCALE) for rule in seasons], dtype=np.int64)
+        self.season_package = np.array([self._code(rule.package_id) for rule in seasons], dtype=np.int64)
+        # Largest discount first, so ties on min_people resolve to it.
+        discounts = sorted(discounts, key=lambda rule: -rule.discount_percent)
+        self.group_min = np.array([rule.min_people for rule in discounts], dtype=np.int64)
+        self.group_bp = np.array([int(rule.discount_percent * 100) for rule in discounts], dtype=np.int64)
+        self.group_package = np.array([self._code(rule.package_id) for rule in discounts], dtype=np.int64)
+
+    def _code(self, package_id):
+        if package_id is None:
+            return GLOBAL
+        return self.package_codes.setdefault(package_id, len(self.package_codes))
+
+    def codes_for(self, package_ids):
+        return np.array(
+            [self.package_codes.get(package_id, UNKNOWN_PACKAGE) for package_id in package_ids],
+            dtype=np.int64,
+        )
+
+
+def get_rules():
+    """Rule tables for the current version, loaded at most once per version."""
+    version = current_version()
+    if _rules['version'] == version:
+        return _rules['tables']
+    tables = RuleTables(
+        list(SeasonalPrice.objects.filter(is_active=True)),
+        list(GroupDiscount.objects.filter(is_active=True)),
+    )
+    with _lock:
+        _rules['version'] = version
+        _rules['tables'] = tables
+    return tables
+
+
+def _most_specific(matches, codes_column, package_column, values, fallback):
+    """
+    Per row, the best of ``values`` among matching package-specific rules,
+    else among matching global rules, else ``fallback``. "Best" is the
+    largest value.
+    """
+    specific = matches & (codes_column == package_column)
+    general = matches & (package_column == GLOBAL)
+    best_specific = np.where(specific, values, -1).max(axis=1, initial=-1)
+    best_general = np.where(general, values, -1).max(axis=1, initial=-1)
+    return np.where(best_specific >= 0, best_specific, np.where(best_general >= 0, best_general, fallback))
+
+
+def _seasonal_bp(rules, codes, days):
+    if not len(rules.season_bp):
+        return np.full(len(codes), SCALE, dtype=np.int64)
+    in_season = (days[:, None] >= rules.season_start) & (days[:, None] <= rules.season_end)
+    return _most_specific(in_season, codes[:, None], rules.season_package, rules.season_bp, SCALE)
+
+
+def _discount_bp(rules, codes, people):
+    if not len(rules.group_bp):
+        return np.zeros(len(codes), dtype=np.int64)
+    rows = np.arange(len(codes))
+    eligible = people[:, None] >= rules.group_min
+    chosen = []
+    for mask in (
+        eligible & (codes[:, None] == rules.group_package),
+        eligible & (rules.group_package == GLOBAL),
+    ):
+        # Index of the matching rule with the largest min_people.
+        key = np.where(mask, rules.group_min, -1)
+        index = key.argmax(axis=1)
+        found = key[rows, index] >= 0
+        chosen.append(np.where(found, rules.group_bp[index], -1))
+    specific, general = chosen
+    return np.where(specific >= 0, specific, np.maximum(general, 0))
+
+
+def quote_many(items):
+    """
+    Price ``items``, an iterable of ``(package, people, travel_date, guide)``
+    tuples (``travel_date`` and ``guide`` may be None), in one pass.
+    Returns a list of ``Quote`` in the same order. Raises ``ValueError`` for
+    a party too large to price in int64 paise; the views cap party sizes at
+    ``BOOKING_MAX_PEOPLE`` well before that.
+    """
+    items = list(items)
+    if not items:
+        return []
+    rules = get_rules()
+    packages = [item[0] for item in items]
+    codes = rules.codes_for([package.pk for package in packages])
+    party_sizes = [int(item[1]) for item in items]
+    if max(party_sizes) > MAX_GROSS:
+        raise ValueError('Party size too large to price.')
+    people = np.array(party_sizes, dtype=np.int64)
+    days = np.array(
+        [item[2].toordinal() if isinstance(item[2], date) else NO_DATE for item in items],
+        dtype=np.int64,
+    )
+    price = np.array([_paise(package.price) for package in packages], dtype=np.int64)
+
+    multiplier_bp = _seasonal_bp(rules, codes, days)
+    discount_bp = _discount_bp(rules, codes, people)
+    per_person = (price * multiplier_bp + SCALE // 2) // SCALE
+    # NumPy wraps around on overflow instead of raising.
+    if (people > MAX_GROSS // np.maximum(per_person, 1)).any():
+        raise ValueError('Party size too large to price.')
+    gross = per_person * people
+    discount = (gross * discount_bp + SCALE // 2) // SCALE
+    total = gross - discount
+
+    quotes = []
+    for position, (package, party_size, travel_date, guide) in enumerate(items):
+        quotes.append(Quote(
+            package_id=package.pk,
+            people=party_size,
+            travel_date=travel_date,
+            per_person=_rupees(per_person[position]),
+            gross=_rupees(gross[position]),
+            discount=_rupees(discount[position]),
+            total=_rupees(total[position]),
+            guide_amount=guide.rate_per_day if guide is not None else None,
+            multiplier=Decimal(int(multiplier_bp[position])).scaleb(-4),
+            discount_percent=Decimal(int(discount_bp[position])).scaleb(-2),
+        ))
+    return quotes
+
+
+def quote(package, people, travel_date=None, guide=None):
+    return quote_many([(package, people, travel_date, guide)])[0]
+
+
+def catalogue_prices(packages, party_sizes=CATALOGUE_PARTY_SIZES, travel_date=None):
+    """``[(package, [Quote per party size]), ...]`` for a catalogue page, in one pass."""
+    quotes = quote_many(
+        (package, size, travel_date, None) for package in packages for size in party_sizes
+    )
+    width = len(party_sizes)
+    return [
+        (package, quotes[index * width:(index + 1) * width])
+        for index, package in enumerate(packages)
+    ]
+
+
+def quote_to_json(quote):
+    return {
+        'package_id': str(quote.package_id),
+        'number_of_people': quote.people,
+        'travel_date': quote.travel_date.isoformat() if quote.travel_date else None,
+        'per_person': str(quote.per_person),
+        'gross': str(quote.gross),
+        'discount': str(quote.discount),
+        'total': str(quote.total),
+        'guide_amount': str(quote.guide_amount) if quote.guide_amount is not None else None,
+        'seasonal_multiplier': str(quote.multiplier),
+        'discount_percent': str(quote.discount_percent),
+    }
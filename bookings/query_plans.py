@@ -0,0 +1,121 @@
+"""
+Query-plan checks for the booking access paths.
+
+``HOT_QUERIES`` builds the querysets the busiest code runs: the booking
+history pages in ``bookings.views`` and ``users.views`` (first page and a
+cursor page, for the live and archived tables), a guide's completed, rated
+bookings (what ``Guide.get_average_rating`` is kept in step with, and what a
+recount reads) and the status/travel date filters used by guide assignment,
+the completion sweep and archiving.
+
+``check`` runs ``EXPLAIN`` on each and reports a full table scan or a sort
+(MySQL ``type: ALL`` / ``Using filesort``, SQLite ``SCAN <table>`` /
+``USE TEMP B-TREE FOR ORDER BY``), i.e. a query that has lost its index.
+``manage.py check_query_plans`` runs it and fails on any problem. Run it
+against a database with realistic row counts (e.g. after ``manage.py seed``):
+on near-empty tables MySQL may rightly prefer a scan.
+"""
+import uuid
+from collections import namedtuple
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import connections
+
+from .models import ArchivedBooking, Booking
+from .pagination import DEFAULT_PAGE_SIZE, encode_cursor, page_queryset
+
+PlanCheck = namedtuple('PlanCheck', ['name', 'sql', 'plan', 'problems'])
+
+# Placeholder filter values: only the plan matters, not the rows.
+SAMPLE_USER = uuid.UUID(int=1)
+SAMPLE_GUIDE = 1
+SAMPLE_DATE = date(2000, 1, 1)
+SAMPLE_CURSORS = {
+    'created_at': encode_cursor([datetime(2000, 1, 1, tzinfo=dt_timezone.utc), uuid.UUID(int=1)]),
+    'travel_date': encode_cursor([SAMPLE_DATE, uuid.UUID(int=1)]),
+}
+
+
+def _history(model, key, cursor):
+    return page_queryset(
+        model.objects.filter(user_id=SAMPLE_USER).select_related('package'),
+        [key, 'booking_id'],
+        cursor=SAMPLE_CURSORS[key] if cursor else None,
+        page_size=DEFAULT_PAGE_SIZE,
+    )
+
+
+HOT_QUERIES = {
+    # home / my_bookings_api: newest first
+    'history_by_created': lambda: _history(Booking, 'created_at', cursor=False),
+    'history_by_created_cursor': lambda: _history(Booking, 'created_at', cursor=True),
+    # package_list: by travel date
+    'history_by_travel_date': lambda: _history(Booking, 'travel_date', cursor=False),
+    'history_by_travel_date_cursor': lambda: _history(Booking, 'travel_date', cursor=True),
+    'archived_history_by_created': lambda: _history(ArchivedBooking, 'created_at', cursor=True),
+    'archived_history_by_travel_date': lambda: _history(ArchivedBooking, 'travel_date', cursor=True),
+    'guide_completed_ratings': lambda: Booking.objects.filter(
+        guide_id=SAMPLE_GUIDE, status='completed', guide_rating__isnull=False,
+    ).order_by().values('guide_rating'),
+    # guide.assignment.load_pending
+    'pending_by_travel_date': lambda: Booking.objects.filter(
+        status='pending', guide__isnull=True, travel_date__gte=SAMPLE_DATE,
+    ).order_by('travel_date', 'pk')[:DEFAULT_PAGE_SIZE],
+    # complete_past_bookings / archive_bookings
+    'status_before_date': lambda: Booking.objects.filter(
+        status='confirmed', travel_date__lt=SAMPLE_DATE,
+    ).order_by().values('pk')[:DEFAULT_PAGE_SIZE],
+}
+
+
+def explain(queryset):
+    """``(sql, rows)``: the query and its plan rows as dicts, for MySQL or SQLite."""
+    connection = connections[queryset.db]
+    sql, params = queryset.query.sql_with_params()
+    if connection.vendor == 'mysql':
+        statement = f'EXPLAIN {sql}'
+    elif connection.vendor == 'sqlite':
+        statement = f'EXPLAIN QUERY PLAN {sql}'
+    else:
+        raise NotImplementedError(f"No plan checks for the {connection.vendor} backend.")
+    with connection.cursor() as cursor:
+        cursor.execute(statement, params)
+        columns = [column[0].lower() for column in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    return str(queryset.query), rows
+
+
+def problems(rows, vendor):
+    """Full scans and sorts found in ``explain`` rows."""
+    found = []
+    for row in rows:
+        if vendor == 'mysql':
+            extra = row.get('extra') or ''
+            if row.get('type') == 'ALL':
+                found.append(f"full scan of {row.get('table')}")
+            if 'Using filesort' in extra:
+                found.append(f"filesort on {row.get('table')}")
+        else:
+            detail = row.get('detail') or ''
+            if detail.startswith('SCAN ') and 'INDEX' not in detail:
+                found.append(f"full scan: {detail}")
+            if 'TEMP B-TREE' in detail:
+                found.append(f"sort: {detail}")
+    return found
+
+
+def _plan_lines(rows):
+    return [', '.join(f'{key}={value}' for key, value in row.items() if value not in (None, '')) for row in rows]
+
+
+def check(names=None):
+    """Explain each hot query (or only ``names``); returns a list of ``PlanCheck``."""
+    results = []
+    for name, build in HOT_QUERIES.items():
+        if names and name not in names:
+            continue
+        queryset = build()
+        sql, rows = explain(queryset)
+        vendor = connections[queryset.db].vendor
+        results.append(PlanCheck(name, sql, _plan_lines(rows), problems(rows, vendor)))
+    return results
@@ -0,0 +1,210 @@
+"""
+Materialised booking rollups.
+
+``DailyBookingRollup`` keeps, per travel date x package x status, how many
+bookings there are, how many people they cover and their total_amount and
+guide_amount sums. Dashboards read these few rows instead of aggregating
+the bookings table.
+
+``Booking.save()`` and the ``post_delete`` receiver in ``bookings.signals``
+move a booking's contribution between rows with ``apply_change`` inside
+their transaction. Writers that bypass them (``bulk_create``,
+``bulk_update``) call ``record_bulk``, and ``rebuild`` recomputes
+everything from the bookings and archived bookings tables with one grouped
+query each.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Sum, Value, When
+from django.db.models.functions import TruncMonth
+
+from .models import ArchivedBooking, Booking, DailyBookingRollup
+
+logger = logging.getLogger('tourism.rollups')
+
+VALUE_FIELDS = ('bookings', 'people', 'total_amount', 'guide_amount')
+# Statuses whose amounts count as revenue.
+REVENUE_STATUSES = ('confirmed', 'completed')
+
+
+def _added(name, delta):
+    """
+    ``name + delta`` for an UPDATE, floored at zero so a table that has
+    drifted from the bookings never holds negative counts or amounts. The
+    branch is picked in SQL, so an unsigned column never computes a
+    negative sum (which MySQL rejects).
+    """
+    if delta >= 0:
+        return F(name) + delta
+    return Case(
+        When(**{f'{name}__gte': -delta}, then=F(name) + delta),
+        default=Value(0),
+        output_field=DailyBookingRollup._meta.get_field(name),
+    )
+
+
+def _add_to(rows, deltas):
+    return rows.update(**{name: _added(name, delta) for name, delta in deltas.items()})
+
+
+def apply(key, values):
+    """Add ``values`` (bookings, people, total_amount, guide_amount) to the row for ``key``."""
+    day, package_id, status = key
+    bucket = DailyBookingRollup.objects.filter(day=day, package_id=package_id, status=status)
+    deltas = dict(zip(VALUE_FIELDS, values))
+    if _add_to(bucket, deltas):
+        return
+    if any(delta < 0 for delta in deltas.values()):
+        # Taking a booking out of a row that does not exist: the table has
+        # drifted (e.g. bookings edited with raw SQL). Don't write a row
+        # with negative counts; the rebuild puts it right.
+        logger.warning(
+            "No booking rollup row for %s %s %s to subtract from; "
+            "run `manage.py rebuild_booking_rollups`.", day, package_id, status,
+        )
+        deltas = {name: max(delta, 0) for name, delta in deltas.items()}
+        if not any(deltas.values()):
+            return
+    # Create the row unless a concurrent writer just did, then add to it:
+    # one statement fewer than a savepoint around an INSERT, like record_bulk.
+    DailyBookingRollup.objects.bulk_create(
+        [DailyBookingRollup(day=day, package_id=package_id, status=status)], ignore_conflicts=True
+    )
+    _add_to(bucket, deltas)
+
+
+def apply_change(previous, current):
+    """Move a booking from its ``previous`` contribution to its ``current`` one (either may be None)."""
+    if previous == current:
+        return
+    if previous is not None:
+        apply(previous[0], [-value for value in previous[1]])
+    if current is not None:
+        apply(current[0], current[1])
+
+
+def record_bulk(contributions):
+    """Apply many ``(key, values)`` contributions with one INSERT and one UPDATE per distinct row."""
+    totals = defaultdict(lambda: [0, 0, Decimal('0'), Decimal('0')])
+    for key, values in contributions:
+        row = totals[key]
+        for position, value in enumerate(values):
+            row[position] += value
+    keys = sorted(
+        (key for key, values in totals.items() if any(values)),
+        key=lambda key: (key[0], str(key[1]), key[2]),
+    )
+    if not keys:
+        return
+    with transaction.atomic():
+        # Make sure every row exists, then add to each. Sorted so concurrent
+        # bulk writers lock rows in the same order.
+        DailyBookingRollup.objects.bulk_create(
+            [DailyBookingRollup(day=day, package_id=package_id, status=status) for day, package_id, status in keys],
+            ignore_conflicts=True,
+        )
+        for day, package_id, status in keys:
+            _add_to(
+                DailyBookingRollup.objects.filter(day=day, package_id=package_id, status=status),
+                dict(zip(VALUE_FIELDS, totals[(day, package_id, status)])),
+            )
+
+
+def record_created(bookings):
+    """Count bookings written with ``bulk_create``."""
+    record_bulk(booking.rollup_contribution() for booking in bookings)
+
+
+def rebuild(batch_size=2000):
+    """
+    Recompute every rollup row from the live and archived bookings; returns
+    the row count. A booking written while this runs may be missed until
+    the next rebuild.
+    """
+    totals = defaultdict(lambda: [0, 0, Decimal('0'), Decimal('0')])
+    for model in (Booking, ArchivedBooking):
+        rows = (
+            model.objects.order_by()
+            .values('travel_date', 'package_id', 'status')
+            .annotate(
+                count=Count('pk'),
+                people=Sum('number_of_people'),
+                total=Sum('total_amount'),
+                guide=Sum('guide_amount'),
+            )
+        )
+        for row in rows.iterator(chunk_size=batch_size):
+            values = totals[(row['travel_date'], row['package_id'], row['status'])]
+            values[0] += row['count']
+            values[1] += row['people'] or 0
+            values[2] += row['total'] or Decimal('0')
+            values[3] += row['guide'] or Decimal('0')
+    rollups = [
+        DailyBookingRollup(day=day, package_id=package_id, status=status, **dict(zip(VALUE_FIELDS, values)))
+        for (day, package_id, status), values in totals.items()
+    ]
+    with transaction.atomic():
+        DailyBookingRollup.objects.all().delete()
+        DailyBookingRollup.objects.bulk_create(rollups, batch_size=batch_size)
+    return len(rollups)
+
+
+def status_totals():
+    """``{status: {'bookings', 'people', 'total_amount', 'guide_amount'}}`` over all dates."""
+    rows = (
+        DailyBookingRollup.objects.order_by().values('status')
+        .annotate(**{name: Sum(name) for name in VALUE_FIELDS})
+    )
+    return {row.pop('status'): row for row in rows}
+
+
+def monthly_revenue(date_from, date_to):
+    """
+    ``(months, rows)`` of revenue by package and travel month for
+    ``date_from <= day < date_to``: ``rows`` is a list of
+    ``(package name, [amount per month], total)`` ordered by total, descending.
+    """
+    rows = (
+        DailyBookingRollup.objects
+        .filter(day__gte=date_from, day__lt=date_to, status__in=REVENUE_STATUSES)
+        .annotate(month=TruncMonth('day'))
+        .order_by()
+        .values('package__name', 'month')
+        .annotate(amount=Sum('total_amount'))
+    )
+    amounts = defaultdict(dict)
+    for row in rows:
+        amounts[row['package__name']][row['month']] = row['amount']
+    months = []
+    month = date_from.replace(day=1)
+    while month < date_to:
+        months.append(month)
+        month = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+    table = [
+        (name, [by_month.get(month, Decimal('0')) for month in months], sum(by_month.values()))
+        for name, by_month in amounts.items()
+    ]
+    table.sort(key=lambda row: (-row[2], row[0]))
+    return months, table
+
+
+def upcoming(date_from, days):
+    """``[(day, {status: bookings}, people), ...]`` for the ``days`` days from ``date_from``."""
+    rows = (
+        DailyBookingRollup.objects
+        .filter(day__gte=date_from, day__lt=date_from + timedelta(days=days), bookings__gt=0)
+        .order_by()
+        .values('day', 'status')
+        .annotate(bookings=Sum('bookings'), people=Sum('people'))
+    )
+    by_day = defaultdict(lambda: ({}, [0]))
+    for row in rows:
+        statuses, people = by_day[row['day']]
+        statuses[row['status']] = row['bookings']
+        if row['status'] != 'cancelled':
+            people[0] += row['people']
+    return [(day, statuses, people[0]) for day, (statuses, people) in sorted(by_day.items())]
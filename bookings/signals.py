@@ -0,0 +1,66 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from jobs.queue import enqueue
+
+from . import pricing, rollups
+from .cache import bump_version
+from .models import Booking, GroupDiscount, Package, SeasonalPrice
+from .tasks import send_booking_confirmation
+
+_keep_aggregates = ContextVar('keep_booking_aggregates', default=False)
+
+
+@contextmanager
+def keep_aggregates():
+    """
+    Delete bookings inside this block without taking them out of the guide
+    ratings and daily rollups, for callers (``bookings.archive``) that move
+    them elsewhere and keep counting them.
+    """
+    token = _keep_aggregates.set(True)
+    try:
+        yield
+    finally:
+        _keep_aggregates.reset(token)
+
+
+@receiver(post_save, sender=Package)
+@receiver(post_delete, sender=Package)
+def package_changed(sender, instance, **kwargs):
+    # Bump after commit so no reader can cache the pre-commit catalogue
+    # under the new version.
+    transaction.on_commit(bump_version)
+
+
+@receiver(post_save, sender=SeasonalPrice)
+@receiver(post_delete, sender=SeasonalPrice)
+@receiver(post_save, sender=GroupDiscount)
+@receiver(post_delete, sender=GroupDiscount)
+def pricing_rule_changed(sender, instance, **kwargs):
+    transaction.on_commit(pricing.bump_version)
+
+
+@receiver(post_save, sender=Booking)
+def booking_created(sender, instance, created, raw=False, **kwargs):
+    # The job row commits with the booking; a worker sends the email.
+    if created and not raw:
+        enqueue(send_booking_confirmation, booking_id=str(instance.pk))
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted(sender, instance, **kwargs):
+    # A receiver rather than Booking.delete(), so QuerySet.delete() and
+    # cascades (e.g. deleting a user) adjust the aggregates too. It runs in
+    # the delete's transaction.
+    if _keep_aggregates.get():
+        return
+    from guide.models import Guide
+    previous = instance.rating_contribution()
+    if previous is not None:
+        Guide.apply_rating_delta(previous[0], -1, -previous[1])
+    rollups.apply_change(instance.rollup_contribution(), None)
@@ -0,0 +1,61 @@
+"""
+Booking side effects run by the job queue (see ``jobs.queue``) instead of
+inside the booking request.
+"""
+from django.core.mail import send_mail
+
+from .models import Booking
+
+
+def send_booking_confirmation(booking_id):
+    """Email the customer that their booking request was received."""
+    booking = Booking.objects.select_related('package', 'user').filter(pk=booking_id).first()
+    if booking is None:
+        # Deleted before the job ran; nothing to confirm.
+        return
+    recipient = booking.email or booking.user.email
+    if not recipient:
+        return
+    send_mail(
+        subject=f"Booking received: {booking.package.name}",
+        message=(
+            f"Hi {booking.full_name or booking.user.get_full_name() or 'there'},\n\n"
+            f"We have received your booking for {booking.package.name} "
+            f"({booking.number_of_people} people, travelling {booking.travel_date}).\n"
+            f"Total: ₹{booking.total_amount}\n"
+            f"Booking reference: {booking.booking_id}\n\n"
+            f"We will confirm it shortly."
+        ),
+        from_email=None,
+        recipient_list=[recipient],
+    )
+
+
+STATUS_MESSAGES = {
+    'confirmed': "Your booking for {package} on {date} is confirmed.",
+    'cancelled': "Your booking for {package} on {date} has been cancelled.",
+    'completed': (
+        "We hope you enjoyed {package}! You can rate your guide from your "
+        "bookings page."
+    ),
+}
+
+
+def send_booking_status_update(booking_id, status):
+    """Email the customer that their booking moved to ``status``."""
+    booking = Booking.objects.select_related('package', 'user').filter(pk=booking_id).first()
+    if booking is None or status not in STATUS_MESSAGES:
+        return
+    recipient = booking.email or booking.user.email
+    if not recipient:
+        return
+    send_mail(
+        subject=f"Booking {status}: {booking.package.name}",
+        message=(
+            f"Hi {booking.full_name or booking.user.get_full_name() or 'there'},\n\n"
+            + STATUS_MESSAGES[status].format(package=booking.package.name, date=booking.travel_date)
+            + f"\nBooking reference: {booking.booking_id}\n"
+        ),
+        from_email=None,
+        recipient_list=[recipient],
+    )
@@ -1,3 +1,541 @@
-from django.test import TestCase
+import gzip
+import json
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import AsyncRequestFactory, TestCase, override_settings
+
+from guide.calendar import rebuild_calendar
+from guide.models import Guide, GuideOccupancy
+
+from . import pricing, rollups, views
+from .archive import archive, history_page
+from .idempotency import REPLAY_HEADER
+from .models import ArchivedBooking, Booking, BookingStatusChange, DailyBookingRollup, Package
+from .pricing import quote
+from .transitions import InvalidTransition, bulk_transition, can_transition, transition
+
+
+def make_user(name='alice', **extra):
+    return get_user_model().objects.create_user(
+        email=f'{name}@example.com', username=name, password='secret', **extra
+    )
+
+
+def make_package(name='Goa Beaches', **extra):
+    fields = {
+        'name': name,
+        'destination': 'Goa',
+        'description': 'Sun and sand.',
+        'duration_days': 3,
+        'price': Decimal('1000.00'),
+    }
+    fields.update(extra)
+    return Package.objects.create(**fields)
+
+
+def make_guide(guide_id='G1', **extra):
+    fields = {'guide_id': guide_id, 'name': f'Guide {guide_id}', 'rate_per_day': Decimal('500.00')}
+    fields.update(extra)
+    return Guide.objects.create(**fields)
+
+
+def make_booking(user, package, days_ahead=30, **extra):
+    fields = {
+        'package': package,
+        'user': user,
+        'full_name': 'Alice Example',
+        'email': user.email,
+        'phone': '9000000000',
+        'travel_date': date.today() + timedelta(days=days_ahead),
+        'number_of_people': 2,
+        'total_amount': Decimal('2000.00'),
+    }
+    fields.update(extra)
+    return Booking.objects.create(**fields)
+
+
+class AggregateAssertions:
+    """Check the incrementally maintained aggregates against a full rebuild."""
+
+    def assertAggregatesMatchRebuild(self):
+        columns = ('day', 'package_id', 'status', 'bookings', 'people', 'total_amount', 'guide_amount')
+        kept = sorted(DailyBookingRollup.objects.exclude(bookings=0).values_list(*columns), key=str)
+        rollups.rebuild()
+        rebuilt = sorted(DailyBookingRollup.objects.values_list(*columns), key=str)
+        self.assertEqual(kept, rebuilt)
+
+        out = StringIO()
+        call_command('rebuild_guide_ratings', stdout=out)
+        self.assertIn(', 0 updated.', out.getvalue())
+
+        occupancies = sorted(GuideOccupancy.objects.values_list('booking_id', 'guide_id', 'start_date', 'end_date'))
+        rebuild_calendar()
+        self.assertEqual(
+            occupancies,
+            sorted(GuideOccupancy.objects.values_list('booking_id', 'guide_id', 'start_date', 'end_date')),
+        )
+
+
+class TransitionTests(AggregateAssertions, TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.staff = make_user('staff', is_staff=True)
+        self.package = make_package()
+        self.guide = make_guide()
+
+    def test_allowed_transitions(self):
+        self.assertTrue(can_transition('pending', 'confirmed'))
+        self.assertTrue(can_transition('pending', 'cancelled'))
+        self.assertTrue(can_transition('confirmed', 'completed'))
+        self.assertTrue(can_transition('confirmed', 'cancelled'))
+        self.assertFalse(can_transition('pending', 'completed'))
+        for final in ('cancelled', 'completed'):
+            for status in ('pending', 'confirmed', 'cancelled', 'completed'):
+                self.assertFalse(can_transition(final, status))
+
+    def test_transition_writes_audit_row(self):
+        booking = make_booking(self.user, self.package)
+        transition(booking, 'confirmed', user=self.staff, source='admin', note='paid')
+
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'confirmed')
+        change = BookingStatusChange.objects.get(booking_id=booking.pk)
+        self.assertEqual(
+            (change.from_status, change.to_status, change.changed_by, change.source, change.note),
+            ('pending', 'confirmed', self.staff, 'admin', 'paid'),
+        )
+
+    def test_invalid_transition_changes_nothing(self):
+        booking = make_booking(self.user, self.package, status='cancelled')
+        with self.assertRaises(InvalidTransition):
+            transition(booking, 'confirmed')
+
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'cancelled')
+        self.assertFalse(BookingStatusChange.objects.exists())
+
+    def test_bulk_transition_skips_ineligible_bookings(self):
+        pending = make_booking(self.user, self.package, days_ahead=10)
+        confirmed = make_booking(self.user, self.package, days_ahead=20, guide=self.guide, status='confirmed')
+        completed = make_booking(self.user, self.package, days_ahead=30, status='completed')
+
+        changed = bulk_transition(Booking.objects.all(), 'cancelled', user=self.staff, source='bulk', chunk_size=1)
+
+        self.assertEqual(changed, 2)
+        statuses = dict(Booking.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses[pending.pk], 'cancelled')
+        self.assertEqual(statuses[confirmed.pk], 'cancelled')
+        self.assertEqual(statuses[completed.pk], 'completed')
+        self.assertEqual(
+            sorted(BookingStatusChange.objects.values_list('from_status', 'to_status')),
+            [('confirmed', 'cancelled'), ('pending', 'cancelled')],
+        )
+        # The cancelled booking gave its guide's time back.
+        self.assertFalse(GuideOccupancy.objects.exists())
+        self.assertAggregatesMatchRebuild()
+
+    def test_bulk_transition_rejects_unknown_status(self):
+        with self.assertRaises(ValueError):
+            bulk_transition(Booking.objects.all(), 'lost')
+
+    def test_aggregates_follow_transitions(self):
+        booking = make_booking(self.user, self.package, guide=self.guide)
+        transition(booking, 'confirmed')
+        self.assertAggregatesMatchRebuild()
+
+        rated = make_booking(self.user, self.package, days_ahead=60, guide=self.guide, status='confirmed')
+        Booking.objects.filter(pk=rated.pk).update(guide_rating=Decimal('4.50'))
+        bulk_transition(Booking.objects.all(), 'completed')
+        self.assertAggregatesMatchRebuild()
+        self.guide.refresh_from_db()
+        self.assertEqual((self.guide.rating_count, self.guide.rating), (1, Decimal('4.50')))
+
+
+class AggregateTests(AggregateAssertions, TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.package = make_package()
+        self.guide = make_guide()
+        self.other_guide = make_guide('G2')
+
+    def test_save_and_delete(self):
+        booking = make_booking(self.user, self.package, guide=self.guide, status='confirmed')
+        booking.status = 'completed'
+        booking.guide_rating = Decimal('4.00')
+        booking.save()
+        self.assertAggregatesMatchRebuild()
+        self.guide.refresh_from_db()
+        self.assertEqual((self.guide.rating_count, self.guide.rating), (1, Decimal('4.00')))
+
+        booking.guide = self.other_guide
+        booking.guide_amount = None
+        booking.number_of_people = 5
+        booking.save()
+        self.assertAggregatesMatchRebuild()
+
+        booking.delete()
+        self.assertAggregatesMatchRebuild()
+        self.guide.refresh_from_db()
+        self.assertEqual(self.guide.rating_count, 0)
+
+    def test_saves_from_stale_copies(self):
+        booking = make_booking(self.user, self.package, guide=self.guide, status='confirmed')
+        first = Booking.objects.get(pk=booking.pk)
+        second = Booking.objects.get(pk=booking.pk)
+
+        first.status = 'completed'
+        first.guide_rating = Decimal('5.00')
+        first.save()
+        # Loaded before the first save: its deltas must start from the stored row.
+        second.status = 'completed'
+        second.guide_rating = Decimal('3.00')
+        second.number_of_people = 4
+        second.save()
+
+        self.assertAggregatesMatchRebuild()
+        self.guide.refresh_from_db()
+        self.assertEqual((self.guide.rating_count, self.guide.rating_sum), (1, Decimal('3.00')))
+
+    def test_rebuild_keeps_rating_of_unrated_guides(self):
+        Guide.objects.filter(pk=self.guide.pk).update(rating=Decimal('4.20'))
+        call_command('rebuild_guide_ratings', stdout=StringIO())
+        self.guide.refresh_from_db()
+        self.assertEqual((self.guide.rating_count, self.guide.rating), (0, Decimal('4.20')))
+
+    def test_queryset_and_cascade_deletes(self):
+        make_booking(self.user, self.package, guide=self.guide, status='completed', guide_rating=Decimal('4.00'))
+        make_booking(self.user, self.package, days_ahead=40, guide=self.guide, status='confirmed')
+        other = make_user('bob')
+        make_booking(other, self.package, guide=self.other_guide, status='completed', guide_rating=Decimal('2.00'))
+
+        Booking.objects.filter(user=self.user).delete()
+        self.assertAggregatesMatchRebuild()
+        # Deleting a user cascades to their bookings.
+        other.delete()
+        self.assertAggregatesMatchRebuild()
+        self.assertFalse(DailyBookingRollup.objects.exclude(bookings=0).exists())
+        self.assertEqual(sorted(Guide.objects.values_list('rating_count', flat=True)), [0, 0])
+
+    def test_archive_keeps_aggregates_and_history(self):
+        old = make_booking(
+            self.user, self.package, days_ahead=-400, guide=self.guide,
+            status='completed', guide_rating=Decimal('4.00'),
+        )
+        cancelled = make_booking(self.user, self.package, days_ahead=-500, status='cancelled')
+        recent = make_booking(self.user, self.package, days_ahead=-10, status='completed')
+        upcoming = make_booking(self.user, self.package, days_ahead=30)
+
+        moved = archive(date.today() - timedelta(days=365), batch_size=1)
+
+        self.assertEqual(moved, 2)
+        self.assertEqual(set(ArchivedBooking.objects.values_list('pk', flat=True)), {old.pk, cancelled.pk})
+        self.assertEqual(set(Booking.objects.values_list('pk', flat=True)), {recent.pk, upcoming.pk})
+        self.assertFalse(GuideOccupancy.objects.filter(booking_id=old.pk).exists())
+        self.assertAggregatesMatchRebuild()
+        self.guide.refresh_from_db()
+        self.assertEqual(self.guide.rating_count, 1)
+
+        # The customer's history pages through both tables in one ordering.
+        seen = []
+        cursor = None
+        while True:
+            rows, cursor = history_page(self.user, ['travel_date', 'booking_id'], cursor=cursor, page_size=1)
+            seen.extend(row.pk for row in rows)
+            if cursor is None:
+                break
+        self.assertEqual(seen, [upcoming.pk, recent.pk, old.pk, cancelled.pk])
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.package = make_package()
+
+    def test_subtracting_from_missing_row_writes_nothing(self):
+        booking = make_booking(self.user, self.package)
+        DailyBookingRollup.objects.all().delete()
+        with self.assertLogs('tourism.rollups', 'WARNING'):
+            booking.delete()
+        self.assertFalse(DailyBookingRollup.objects.exists())
+
+    def test_drifted_row_is_floored_at_zero(self):
+        booking = make_booking(self.user, self.package, number_of_people=3)
+        DailyBookingRollup.objects.update(people=1, total_amount=Decimal('5.00'))
+        booking.delete()
+        row = DailyBookingRollup.objects.get()
+        self.assertEqual(
+            (row.bookings, row.people, row.total_amount, row.guide_amount),
+            (0, 0, Decimal('0'), Decimal('0')),
+        )
+
+
+class PartySizeTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.package = make_package()
+        self.client.force_login(self.user)
+
+    def payload(self, people):
+        return {
+            'package_id': str(self.package.pk),
+            'full_name': 'Alice Example',
+            'email': self.user.email,
+            'phone': '9000000000',
+            'travel_date': (date.today() + timedelta(days=30)).isoformat(),
+            'number_of_people': people,
+        }
+
+    def test_party_above_limit_is_refused(self):
+        for people in (51, 10 ** 20):
+            with self.subTest(people=people):
+                response = self.client.post('/booking/create/', self.payload(people), content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+                response = self.client.post(
+                    '/quotes/',
+                    {'items': [{'package_id': str(self.package.pk), 'number_of_people': people}]},
+                    content_type='application/json',
+                )
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_quote_refuses_parties_that_overflow(self):
+        quote(self.package, 50)
+        for people in (10 ** 20, 2 ** 62):
+            with self.subTest(people=people), self.assertRaises(ValueError):
+                quote(self.package, people)
+
+
+class QueryBudgetTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.package = make_package()
+        self.client.force_login(self.user)
+
+    def create(self, days_ahead, **headers):
+        payload = {
+            'package_id': str(self.package.pk),
+            'full_name': 'Alice Example',
+            'email': self.user.email,
+            'phone': '9000000000',
+            'travel_date': (date.today() + timedelta(days=days_ahead)).isoformat(),
+            'number_of_people': 2,
+        }
+        return self.client.post('/booking/create/', payload, content_type='application/json', **headers)
+
+    def test_create_booking_queries(self):
+        self.assertEqual(self.create(30).status_code, 201)
+        # Pricing rules cached and the day's rollup row already there.
+        with self.assertNumQueries(8):
+            self.assertEqual(self.create(30).status_code, 201)
+
+    @override_settings(QUERY_BUDGET_ACTION='raise')
+    def test_create_booking_worst_case_within_budget(self):
+        # Cold pricing rules, a new rollup row and an Idempotency-Key.
+        pricing.bump_version()
+        with self.assertNumQueries(settings.QUERY_BUDGETS['create_booking']):
+            response = self.create(40, HTTP_IDEMPOTENCY_KEY='budget-1')
+        self.assertEqual(response.status_code, 201)
+
+
+class BatchBookingTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.package = make_package()
+        self.client.force_login(self.user)
+        self.payload = {'bookings': [{
+            'package_id': str(self.package.pk),
+            'full_name': 'Alice Example',
+            'email': self.user.email,
+            'phone': '9000000000',
+            'travel_date': (date.today() + timedelta(days=30)).isoformat(),
+            'number_of_people': 2,
+        }]}
+
+    def test_write_failure_is_logged_not_returned(self):
+        with mock.patch('bookings.views.enqueue_many', side_effect=RuntimeError('db password in here')), \
+                self.assertLogs('tourism.bookings', 'ERROR') as logs:
+            response = self.client.post('/booking/batch/', self.payload, content_type='application/json')
+        self.assertEqual(response.status_code, 500)
+        self.assertNotIn('db password', response.content.decode())
+        self.assertIn('db password', '\n'.join(logs.output))
+        self.assertFalse(Booking.objects.exists())
+
+
+class CreateBookingErrorTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.package = make_package()
+        self.factory = AsyncRequestFactory()
+
+    def payload(self, package_id):
+        return {
+            'package_id': package_id,
+            'full_name': 'Alice Example',
+            'email': self.user.email,
+            'phone': '9000000000',
+            'travel_date': (date.today() + timedelta(days=30)).isoformat(),
+            'number_of_people': 2,
+        }
+
+    async def post_async(self, payload):
+        request = self.factory.post('/booking/create/', payload, content_type='application/json')
+
+        async def auser():
+            return self.user
+        request.user, request.auser = self.user, auser
+        return await views.create_booking_async(request)
+
+    def test_unknown_package(self):
+        self.client.force_login(self.user)
+        for package_id in (str(uuid.uuid4()), 'not-a-uuid'):
+            with self.subTest(package_id=package_id):
+                response = self.client.post('/booking/create/', self.payload(package_id), content_type='application/json')
+                self.assertEqual((response.status_code, response.json()['error']), (404, 'Package not found.'))
+
+    async def test_unknown_package_async(self):
+        for package_id in (str(uuid.uuid4()), 'not-a-uuid'):
+            with self.subTest(package_id=package_id):
+                response = await self.post_async(self.payload(package_id))
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(json.loads(response.content)['error'], 'Package not found.')
+
+    async def test_unexpected_errors_are_logged(self):
+        with mock.patch('bookings.views.quote', side_effect=RuntimeError('boom')), \
+                self.assertLogs('tourism.bookings', 'ERROR'):
+            response = await self.post_async(self.payload(str(self.package.pk)))
+        self.assertEqual(response.status_code, 500)
+        self.assertNotIn('boom', response.content.decode())
+
+
+class AdminExportTests(TestCase):
+    def setUp(self):
+        self.client.force_login(make_user('admin', is_staff=True, is_superuser=True))
+        make_booking(make_user(), make_package())
+
+    def test_export_formats(self):
+        response = self.client.get('/admin/bookings/booking/export/csv/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 2)
+        self.assertEqual(self.client.get('/admin/bookings/booking/export/xml/').status_code, 404)
+
+
+class MyBookingsApiTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.package = make_package()
+        self.client.force_login(self.user)
+
+    def test_cursor_pages_cover_every_booking(self):
+        created = {make_booking(self.user, self.package, days_ahead=days).pk for days in range(10, 15)}
+        make_booking(make_user('bob'), self.package)
+
+        seen = []
+        params = {'page_size': 2}
+        while True:
+            response = self.client.get('/bookings/mine/', params)
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            seen.extend(uuid.UUID(row['booking_id']) for row in body['results'])
+            if not body['next_cursor']:
+                break
+            params['cursor'] = body['next_cursor']
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(set(seen), created)
+
+    def test_bad_cursor(self):
+        for cursor in ('not-a-cursor', 'WyJ4Il0', 'WyIyMDI1LTAxLTAxIiwieCJd'):
+            response = self.client.get('/bookings/mine/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.package = make_package()
+        self.client.force_login(self.user)
+        self.payload = {
+            'package_id': str(self.package.pk),
+            'full_name': 'Alice Example',
+            'email': 'alice@example.com',
+            'phone': '9000000000',
+            'travel_date': (date.today() + timedelta(days=30)).isoformat(),
+            'number_of_people': 2,
+        }
+
+    def post(self, payload, key):
+        return self.client.post(
+            '/booking/create/', json.dumps(payload), content_type='application/json',
+            headers={'Idempotency-Key': key},
+        )
+
+    def test_replay_returns_stored_response(self):
+        first = self.post(self.payload, 'key-1')
+        second = self.post(self.payload, 'key-1')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second[REPLAY_HEADER], 'true')
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_key_reused_for_different_request(self):
+        self.post(self.payload, 'key-1')
+        response = self.post({**self.payload, 'number_of_people': 3}, 'key-1')
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_other_key_creates_another_booking(self):
+        self.post(self.payload, 'key-1')
+        self.post(self.payload, 'key-2')
+        self.assertEqual(Booking.objects.count(), 2)
+
+
+class CatalogueApiTests(TestCase):
+    url = '/api/catalogue/packages/'
+
+    def setUp(self):
+        self.package = make_package()
+
+    def test_etag_and_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 1)
+        etag = response['ETag']
+
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+    def test_etag_changes_with_catalogue(self):
+        etag = self.client.get(self.url)['ETag']
+        self.package.price = Decimal('1200.00')
+        self.package.save()
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_changes_on_delete(self):
+        older = make_package('Kerala Backwaters')
+        self.package.save()  # the newest updated_at stays on a surviving row
+        etag = self.client.get(self.url)['ETag']
+
+        older.delete()
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 1)
+
+    def test_gzip(self):
+        response = self.client.get(self.url, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(response.content))['count'], 1)
+        self.assertNotEqual(response['ETag'], self.client.get(self.url)['ETag'])
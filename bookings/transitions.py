@@ -0,0 +1,195 @@
+"""
+Booking status state machine.
+
+``TRANSITIONS`` lists which statuses a booking may move to from each status;
+cancelled and completed bookings are final. Every change goes through
+``transition`` (one booking) or ``bulk_transition`` (a queryset), which
+refuse anything else, write a ``BookingStatusChange`` audit row and run the
+hooks registered with ``on_transition``.
+
+``bulk_transition`` validates in SQL: only rows whose current status may
+move to the target are selected, each chunk is locked and flipped with one
+``QuerySet.update``, and the audit rows go in with one ``bulk_create``.
+Because ``update`` bypasses ``Booking.save()``, it applies the rollup, guide
+rating and calendar changes for the chunk itself.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from jobs.queue import enqueue_many
+
+from . import rollups
+from .models import Booking, BookingStatusChange
+from .tasks import send_booking_status_update
+
+TRANSITIONS = {
+    'pending': ('confirmed', 'cancelled'),
+    'confirmed': ('completed', 'cancelled'),
+    'cancelled': (),
+    'completed': (),
+}
+
+# Columns read under lock to work out what a chunk's status change moves.
+CHUNK_FIELDS = ('booking_id',) + tuple(dict.fromkeys(Booking.RATING_FIELDS + Booking.ROLLUP_FIELDS))
+
+_hooks = defaultdict(list)
+
+
+class InvalidTransition(Exception):
+    """The booking's current status cannot move to the requested one."""
+
+    def __init__(self, from_status, to_status):
+        self.from_status = from_status
+        self.to_status = to_status
+        super().__init__(f"A {from_status} booking cannot be marked {to_status}.")
+
+
+def can_transition(from_status, to_status):
+    return to_status in TRANSITIONS.get(from_status, ())
+
+
+def sources_for(to_status):
+    """Statuses a booking may be in to move to ``to_status``."""
+    return [status for status, targets in TRANSITIONS.items() if to_status in targets]
+
+
+def on_transition(to_status, from_status=None):
+    """
+    Register ``hook(booking_ids, from_status, to_status)`` to run, inside the
+    transaction, after bookings move to ``to_status`` (from any status, or
+    only from ``from_status``). Bulk transitions call it once per chunk.
+    """
+    def register(hook):
+        _hooks[to_status].append((from_status, hook))
+        return hook
+    return register
+
+
+def _run_hooks(booking_ids, from_status, to_status):
+    for only_from, hook in _hooks[to_status]:
+        if only_from is None or only_from == from_status:
+            hook(booking_ids, from_status, to_status)
+
+
+def record(booking, from_status, to_status, user=None, source='', note=''):
+    """Audit and run hooks for a status change already saved on ``booking``."""
+    BookingStatusChange.objects.create(
+        booking=booking,
+        from_status=from_status,
+        to_status=to_status,
+        changed_by=user,
+        source=source,
+        note=note,
+    )
+    _run_hooks([booking.pk], from_status, to_status)
+
+
+def transition(booking, to_status, user=None, source='', note=''):
+    """Move one booking to ``to_status``; raises ``InvalidTransition`` if not allowed."""
+    with transaction.atomic():
+        from_status = (
+            Booking.objects.select_for_update().filter(pk=booking.pk)
+            .values_list('status', flat=True).first()
+        )
+        if not can_transition(from_status, to_status):
+            raise InvalidTransition(from_status, to_status)
+        booking.status = to_status
+        # save() keeps the guide rating, calendar and rollups in step.
+        booking.save(update_fields=['status', 'updated_at'])
+        record(booking, from_status, to_status, user=user, source=source, note=note)
+    return booking
+
+
+def bulk_transition(queryset, to_status, user=None, source='', note='', chunk_size=1000):
+    """
+    Move every booking in ``queryset`` that is allowed to go to ``to_status``,
+    ``chunk_size`` at a time, each chunk in its own transaction. Bookings in
+    any other status are left alone. Returns how many were changed.
+    """
+    if to_status not in TRANSITIONS:
+        raise ValueError(f"Unknown booking status {to_status!r}.")
+    sources = sources_for(to_status)
+    eligible = queryset.filter(status__in=sources).order_by('pk')
+    changed = 0
+    last_pk = None
+    while True:
+        page = eligible if last_pk is None else eligible.filter(pk__gt=last_pk)
+        pks = list(page.values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            return changed
+        last_pk = pks[-1]
+        changed += _transition_chunk(pks, sources, to_status, user, source, note)
+
+
+def _transition_chunk(pks, sources, to_status, user, source, note):
+    from guide.calendar import RELEASED_STATUSES
+    from guide.models import Guide, GuideOccupancy
+
+    with transaction.atomic():
+        # Re-check the status under the lock: a concurrent change may have
+        # moved some of these since they were selected.
+        rows = list(
+            Booking.objects.select_for_update()
+            .filter(pk__in=pks, status__in=sources)
+            .order_by('pk')
+            .values(*CHUNK_FIELDS)
+        )
+        if not rows:
+            return 0
+        booking_ids = [row['booking_id'] for row in rows]
+        now = timezone.now()
+        Booking.objects.filter(pk__in=booking_ids).update(status=to_status, updated_at=now)
+
+        contributions = []
+        rating_deltas = defaultdict(lambda: [0, Decimal('0')])
+        by_source = defaultdict(list)
+        for row in rows:
+            before = Booking(**row)
+            after = Booking(**{**row, 'status': to_status})
+            key, values = before.rollup_contribution()
+            contributions.append((key, [-value for value in values]))
+            contributions.append(after.rollup_contribution())
+            for contribution, sign in ((before.rating_contribution(), -1), (after.rating_contribution(), 1)):
+                if contribution is not None:
+                    delta = rating_deltas[contribution[0]]
+                    delta[0] += sign
+                    delta[1] += sign * contribution[1]
+            by_source[row['status']].append(row['booking_id'])
+        rollups.record_bulk(contributions)
+        # Sorted so concurrent writers lock guides in the same order.
+        for guide_id in sorted(rating_deltas, key=str):
+            count, total = rating_deltas[guide_id]
+            if count or total:
+                Guide.apply_rating_delta(guide_id, count, total)
+        # Released statuses are final, so a transition can only ever give a
+        # guide's time back, never take it.
+        if to_status in RELEASED_STATUSES:
+            GuideOccupancy.objects.filter(booking_id__in=booking_ids).delete()
+
+        BookingStatusChange.objects.bulk_create([
+            BookingStatusChange(
+                booking_id=row['booking_id'],
+                from_status=row['status'],
+                to_status=to_status,
+                changed_by=user,
+                source=source,
+                note=note,
+            )
+            for row in rows
+        ])
+        for from_status, ids in by_source.items():
+            _run_hooks(ids, from_status, to_status)
+    return len(rows)
+
+
+@on_transition('confirmed')
+@on_transition('cancelled')
+@on_transition('completed')
+def notify_customer(booking_ids, from_status, to_status):
+    enqueue_many(
+        send_booking_status_update,
+        [{'booking_id': str(pk), 'status': to_status} for pk in booking_ids],
+    )
@@ -1,31 +1,148 @@
-from django.shortcuts import render, get_object_or_404
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.shortcuts import render, get_object_or_404, aget_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.views.decorators.http import require_http_methods
-from decimal import Decimal
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import transaction
+from django.core.exceptions import ValidationError
+from jobs.queue import enqueue_many
 import json
+import logging
+import uuid
 from datetime import datetime, date
 
 from .models import Package, Booking
+from .archive import ahistory_page, history_page
+from .cache import aget_active_packages, get_active_packages, catalogue_stats
+from .export import CONTENT_TYPES, filter_bookings, streaming_export_response
+from .idempotency import idempotent
+from .pagination import InvalidCursor, page_size_from
+from .pricing import catalogue_prices, quote, quote_many, quote_to_json
+from .rollups import record_created
+from .tasks import send_booking_confirmation
+
+logger = logging.getLogger('tourism.bookings')
+
+MAX_BATCH_SIZE = 500
+DEFAULT_MAX_PEOPLE = 50
+BULK_CREATE_BATCH_SIZE = 200
 
 
 def home(request):
     """Display packages and user bookings"""
-    packages = Package.objects.filter(is_active=True).order_by('-created_at')
+    packages = get_active_packages()
     
     my_bookings = []
+    next_cursor = None
     if request.user.is_authenticated:
-        my_bookings = Booking.objects.filter(user=request.user).order_by('-created_at')
+        keys = ['created_at', 'booking_id']
+        try:
+            my_bookings, next_cursor = history_page(
+                request.user, keys, cursor=request.GET.get('cursor'), page_size=page_size_from(request)
+            )
+        except InvalidCursor:
+            # A stale or mangled cursor just starts over from the first page
+            my_bookings, next_cursor = history_page(request.user, keys, page_size=page_size_from(request))
     
     context = {
         'packages': packages,
-        'my_bookings': my_bookings
+        'priced_packages': catalogue_prices(packages),
+        'my_bookings': my_bookings,
+        'next_cursor': next_cursor
     }
     return render(request, 'users/booking-page.html', context)
 
 
+def max_people():
+    return getattr(settings, 'BOOKING_MAX_PEOPLE', DEFAULT_MAX_PEOPLE)
+
+
+def clean_booking_fields(data):
+    """
+    Validate the customer and travel fields of one booking payload.
+
+    Returns ``(cleaned, error)``; exactly one of them is None.
+    """
+    full_name = str(data.get('full_name') or '').strip()
+    email = str(data.get('email') or '').strip()
+    phone = str(data.get('phone') or '').strip()
+    travel_date_str = str(data.get('travel_date') or '').strip()
+    number_of_people = data.get('number_of_people')
+    special_requests = str(data.get('special_requests') or '').strip()
+    
+    # Validate required fields
+    if not all([full_name, email, phone, travel_date_str]):
+        return None, 'All required fields must be filled.'
+    
+    # Validate number of people
+    try:
+        number_of_people = int(number_of_people)
+        if number_of_people < 1:
+            raise ValueError("Number must be at least 1")
+    except (ValueError, TypeError):
+        return None, 'Invalid number of people.'
+    if number_of_people > max_people():
+        return None, f'At most {max_people()} people per booking.'
+    
+    # Parse travel date
+    try:
+        travel_date = datetime.strptime(travel_date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return None, 'Invalid date format.'
+    if travel_date <= date.today():
+        return None, 'Travel date must be in the future.'
+    
+    return {
+        'full_name': full_name,
+        'email': email,
+        'phone': phone,
+        'travel_date': travel_date,
+        'number_of_people': number_of_people,
+        'special_requests': special_requests,
+    }, None
+
+
+def booking_to_json(booking):
+    """Serialise a booking (with its package selected) for the JSON endpoints"""
+    return {
+        'booking_id': str(booking.booking_id),
+        'package_id': str(booking.package_id),
+        'package_name': booking.package.name,
+        'destination': booking.package.destination,
+        'travel_date': booking.travel_date.isoformat(),
+        'number_of_people': booking.number_of_people,
+        'total_amount': str(booking.total_amount),
+        'status': booking.status,
+        'created_at': booking.created_at.isoformat(),
+    }
+
+
+@login_required
+@require_http_methods(["GET"])
+def my_bookings_api(request):
+    """JSON list of the current user's bookings (archived included), newest first, cursor-paginated"""
+    try:
+        bookings, next_cursor = history_page(
+            request.user,
+            ['created_at', 'booking_id'],
+            cursor=request.GET.get('cursor'),
+            page_size=page_size_from(request),
+        )
+    except InvalidCursor:
+        return JsonResponse({'success': False, 'error': 'Invalid cursor.'}, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'results': [booking_to_json(booking) for booking in bookings],
+        'next_cursor': next_cursor
+    })
+
+
 @login_required
 @require_http_methods(["POST"])
+@idempotent
 def create_booking(request):
     """Create a new booking from JSON data"""
     try:
@@ -37,49 +154,311 @@ def create_booking(request):
         
         package = get_object_or_404(Package, package_id=package_id, is_active=True)
         
-        # Extract data
-        full_name = data.get('full_name', '').strip()
-        email = data.get('email', '').strip()
-        phone = data.get('phone', '').strip()
-        travel_date_str = data.get('travel_date', '').strip()
-        number_of_people = data.get('number_of_people')
-        special_requests = data.get('special_requests', '').strip()
+        cleaned, error = clean_booking_fields(data)
+        if error:
+            return JsonResponse({'success': False, 'error': error}, status=400)
         
-        # Validate required fields
-        if not all([full_name, email, phone, travel_date_str]):
-            return JsonResponse({'success': False, 'error': 'All required fields must be filled.'}, status=400)
+        # Seasonal and group-discount rules apply (see bookings.pricing)
+        total_amount = quote(package, cleaned['number_of_people'], cleaned['travel_date']).total
         
-        # Validate number of people
-        try:
-            number_of_people = int(number_of_people)
-            if number_of_people < 1:
-                raise ValueError("Number must be at least 1")
-        except (ValueError, TypeError):
-            return JsonResponse({'success': False, 'error': 'Invalid number of people.'}, status=400)
+        # Create booking
+        booking = Booking.objects.create(
+            package=package,
+            user=request.user,
+            total_amount=total_amount,
+            status='pending',
+            **cleaned
+        )
+        
+        return JsonResponse({
+            'success': True,
+            'message': 'Booking created successfully!',
+            'booking_id': str(booking.booking_id)
+        }, status=201)
         
-        # Parse travel date
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'Invalid JSON data.'}, status=400)
+    except (Http404, ValidationError):
+        # Unknown, inactive or malformed package_id.
+        return JsonResponse({'success': False, 'error': 'Package not found.'}, status=404)
+    except Exception:
+        logger.exception("Booking failed")
+        return JsonResponse({'success': False, 'error': 'An unexpected error occurred.'}, status=500)
+
+
+@login_required
+@require_http_methods(["POST"])
+@idempotent
+def create_booking_batch(request):
+    """
+    Create many bookings from one JSON request.
+
+    Accepts ``{"bookings": [...]}`` (or a bare list) where every item has the
+    same shape as the ``create_booking`` payload. All referenced packages are
+    fetched in one query and every item is validated before anything is
+    written; if any item fails, nothing is inserted. Valid batches are written
+    with a single ``bulk_create`` inside one transaction.
+    """
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'Invalid JSON data.'}, status=400)
+    
+    items = data.get('bookings') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return JsonResponse({'success': False, 'error': 'A non-empty "bookings" list is required.'}, status=400)
+    if len(items) > MAX_BATCH_SIZE:
+        return JsonResponse({
+            'success': False,
+            'error': f'At most {MAX_BATCH_SIZE} bookings per batch.'
+        }, status=400)
+    
+    package_ids = set()
+    for item in items:
+        if isinstance(item, dict) and item.get('package_id'):
+            try:
+                package_ids.add(uuid.UUID(str(item['package_id'])))
+            except ValueError:
+                pass
+    packages = Package.objects.filter(is_active=True).in_bulk(package_ids)
+    
+    results = []
+    bookings = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results.append({'index': index, 'success': False, 'error': 'Each booking must be an object.'})
+            continue
         try:
-            travel_date = datetime.strptime(travel_date_str, '%Y-%m-%d').date()
-            if travel_date <= date.today():
-                return JsonResponse({'success': False, 'error': 'Travel date must be in the future.'}, status=400)
+            package = packages.get(uuid.UUID(str(item.get('package_id'))))
         except ValueError:
-            return JsonResponse({'success': False, 'error': 'Invalid date format.'}, status=400)
+            package = None
+        if package is None:
+            results.append({'index': index, 'success': False, 'error': 'Package not found.'})
+            continue
+        cleaned, error = clean_booking_fields(item)
+        if error:
+            results.append({'index': index, 'success': False, 'error': error})
+            continue
+        booking = Booking(
+            package=package,
+            user=request.user,
+            status='pending',
+            **cleaned
+        )
+        bookings.append(booking)
+        results.append({'index': index, 'success': True, 'booking_id': str(booking.booking_id)})
+    
+    if len(bookings) != len(items):
+        for result in results:
+            result.pop('booking_id', None)
+        return JsonResponse({'success': False, 'error': 'Batch rejected; no bookings were created.',
+                             'results': results}, status=400)
+    
+    # Price the whole batch in one pass
+    quotes = quote_many(
+        (booking.package, booking.number_of_people, booking.travel_date, None) for booking in bookings
+    )
+    for booking, booking_quote in zip(bookings, quotes):
+        booking.total_amount = booking_quote.total
+    
+    try:
+        with transaction.atomic():
+            Booking.objects.bulk_create(bookings, batch_size=BULK_CREATE_BATCH_SIZE)
+            record_created(bookings)
+            # bulk_create skips post_save, so queue the confirmations here
+            enqueue_many(send_booking_confirmation, [{'booking_id': str(booking.pk)} for booking in bookings])
+    except Exception:
+        logger.exception("Batch booking failed")
+        return JsonResponse({'success': False, 'error': 'An unexpected error occurred.'}, status=500)
+    
+    return JsonResponse({
+        'success': True,
+        'message': f'{len(bookings)} bookings created successfully!',
+        'results': results
+    }, status=201)
+
+
+@require_http_methods(["POST"])
+def quote_prices(request):
+    """
+    Price many (package, party size, travel date, guide) combinations at once.
+
+    Accepts ``{"items": [{"package_id", "number_of_people", "travel_date"?,
+    "guide_id"?}, ...]}``. Packages and guides are fetched with one query each
+    and all items are priced in a single vectorised pass.
+    """
+    from guide.models import Guide
+    
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'Invalid JSON data.'}, status=400)
+    
+    items = data.get('items') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return JsonResponse({'success': False, 'error': 'A non-empty "items" list is required.'}, status=400)
+    if len(items) > MAX_BATCH_SIZE:
+        return JsonResponse({'success': False, 'error': f'At most {MAX_BATCH_SIZE} items per request.'}, status=400)
+    
+    package_ids = set()
+    guide_ids = set()
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            package_ids.add(uuid.UUID(str(item.get('package_id'))))
+        except ValueError:
+            pass
+        if item.get('guide_id'):
+            guide_ids.add(str(item['guide_id']))
+    packages = Package.objects.filter(is_active=True).in_bulk(package_ids)
+    guides = Guide.objects.in_bulk(guide_ids, field_name='guide_id')
+    
+    combinations = []
+    errors = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({'index': index, 'error': 'Each item must be an object.'})
+            continue
+        try:
+            package = packages.get(uuid.UUID(str(item.get('package_id'))))
+        except ValueError:
+            package = None
+        if package is None:
+            errors.append({'index': index, 'error': 'Package not found.'})
+            continue
+        try:
+            people = int(item.get('number_of_people', 1))
+            if people < 1:
+                raise ValueError
+        except (TypeError, ValueError):
+            errors.append({'index': index, 'error': 'Invalid number of people.'})
+            continue
+        if people > max_people():
+            errors.append({'index': index, 'error': f'At most {max_people()} people per booking.'})
+            continue
+        travel_date = None
+        if item.get('travel_date'):
+            try:
+                travel_date = datetime.strptime(str(item['travel_date']), '%Y-%m-%d').date()
+            except ValueError:
+                errors.append({'index': index, 'error': 'Invalid date format.'})
+                continue
+        guide = None
+        if item.get('guide_id'):
+            guide = guides.get(str(item['guide_id']))
+            if guide is None:
+                errors.append({'index': index, 'error': 'Guide not found.'})
+                continue
+        combinations.append((package, people, travel_date, guide))
+    
+    if errors:
+        return JsonResponse({'success': False, 'error': 'Some items could not be priced.', 'errors': errors}, status=400)
+    return JsonResponse({'success': True, 'quotes': [quote_to_json(result) for result in quote_many(combinations)]})
+
+
+@staff_member_required
+def catalogue_cache_stats(request):
+    """Hit/miss counters of the package catalogue cache for this worker"""
+    return JsonResponse({'success': True, 'stats': catalogue_stats()})
+
+
+@staff_member_required
+@require_http_methods(["GET"])
+def export_bookings(request):
+    """Stream bookings as CSV or NDJSON, filtered by status/package/travel_date"""
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in CONTENT_TYPES:
+        return JsonResponse({'success': False, 'error': 'Unsupported export format.'}, status=400)
+    try:
+        queryset = filter_bookings(Booking.objects.all(), request.GET)
+        return streaming_export_response(queryset, fmt)
+    except ValidationError:
+        return JsonResponse({'success': False, 'error': 'Invalid filter value.'}, status=400)
+
+
+# ----------------------------------------------------------------------
+# Native async views, routed instead of the sync ones when ASYNC_VIEWS is
+# enabled (see README, "Running under ASGI"). They use the async ORM and
+# cache APIs so a request never parks a thread while waiting on I/O.
+# ----------------------------------------------------------------------
+
+async def home_async(request):
+    """Async twin of ``home``"""
+    packages = await aget_active_packages()
+    
+    # Resolve the lazy user up front so templates never hit the DB synchronously.
+    user = await request.auser()
+    request.user = user
+    
+    my_bookings = []
+    next_cursor = None
+    if user.is_authenticated:
+        keys = ['created_at', 'booking_id']
+        try:
+            my_bookings, next_cursor = await ahistory_page(
+                user, keys, cursor=request.GET.get('cursor'), page_size=page_size_from(request)
+            )
+        except InvalidCursor:
+            my_bookings, next_cursor = await ahistory_page(user, keys, page_size=page_size_from(request))
+    
+    context = {
+        'packages': packages,
+        'priced_packages': await sync_to_async(catalogue_prices)(packages),
+        'my_bookings': my_bookings,
+        'next_cursor': next_cursor
+    }
+    return render(request, 'users/booking-page.html', context)
+
+
+@login_required
+@require_http_methods(["GET"])
+async def my_bookings_api_async(request):
+    """Async twin of ``my_bookings_api``"""
+    user = await request.auser()
+    try:
+        bookings, next_cursor = await ahistory_page(
+            user,
+            ['created_at', 'booking_id'],
+            cursor=request.GET.get('cursor'),
+            page_size=page_size_from(request),
+        )
+    except InvalidCursor:
+        return JsonResponse({'success': False, 'error': 'Invalid cursor.'}, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'results': [booking_to_json(booking) for booking in bookings],
+        'next_cursor': next_cursor
+    })
+
+
+@login_required
+@require_http_methods(["POST"])
+@idempotent
+async def create_booking_async(request):
+    """Async twin of ``create_booking``"""
+    try:
+        data = json.loads(request.body)
+        
+        package_id = data.get('package_id')
+        if not package_id:
+            return JsonResponse({'success': False, 'error': 'Package ID is required.'}, status=400)
         
-        # Calculate total
-        total_amount = Decimal(str(package.price)) * number_of_people
+        package = await aget_object_or_404(Package, package_id=package_id, is_active=True)
         
-        # Create booking
-        booking = Booking.objects.create(
+        cleaned, error = clean_booking_fields(data)
+        if error:
+            return JsonResponse({'success': False, 'error': error}, status=400)
+        
+        # Pricing rules may need loading from the database on a cache miss
+        booking_quote = await sync_to_async(quote)(package, cleaned['number_of_people'], cleaned['travel_date'])
+        booking = await Booking.objects.acreate(
             package=package,
-            user=request.user,
-            full_name=full_name,
-            email=email,
-            phone=phone,
-            travel_date=travel_date,
-            number_of_people=number_of_people,
-            total_amount=total_amount,
-            special_requests=special_requests,
-            status='pending'
+            user=await request.auser(),
+            total_amount=booking_quote.total,
+            status='pending',
+            **cleaned
         )
         
         return JsonResponse({
@@ -90,6 +469,9 @@ def create_booking(request):
         
     except json.JSONDecodeError:
         return JsonResponse({'success': False, 'error': 'Invalid JSON data.'}, status=400)
-    except Exception as e:
-        print(f"Booking error: {str(e)}")
-        return JsonResponse({'success': False, 'error': 'An unexpected error occurred.'}, status=500)
\ No newline at end of file
+    except (Http404, ValidationError):
+        # Unknown, inactive or malformed package_id.
+        return JsonResponse({'success': False, 'error': 'Package not found.'}, status=404)
+    except Exception:
+        logger.exception("Booking failed")
+        return JsonResponse({'success': False, 'error': 'An unexpected error occurred.'}, status=500)
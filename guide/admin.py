@@ -1,3 +1,20 @@
 from django.contrib import admin
 
-# Register your models here.
+from bookings.admin import CatalogueImportMixin
+from .models import Destination, Guide, Language, Speciality
+
+
+@admin.register(Guide)
+class GuideAdmin(CatalogueImportMixin, admin.ModelAdmin):
+    import_type = 'guide'
+    list_display = ['guide_id', 'name', 'rate_per_day', 'rating', 'is_available']
+    list_filter = ['is_available']
+    search_fields = ['^guide_id', 'name']
+    ordering = ['name']
+    filter_horizontal = ['destinations', 'specialities', 'languages']
+    readonly_fields = ['rating', 'rating_count', 'rating_sum', 'created_at', 'updated_at']
+
+
+@admin.register(Destination, Speciality, Language)
+class GuideLookupAdmin(admin.ModelAdmin):
+    search_fields = ['name']
@@ -0,0 +1,219 @@
+"""
+Batch guide assignment for pending bookings.
+
+``plan_assignments`` solves one batch in memory. Every booking gets the set
+of eligible guides: available, serving the package's destination, speaking
+a language named in the special requests (if any), and not already booked
+for those dates. Bookings are then placed most-constrained first (fewest
+eligible guides, then earliest trip). Each takes its best-scoring eligible
+guide that is still free after the placements before it, scored as in
+``guide.matching``.
+
+``apply_assignments`` writes the plan with ``bulk_update`` and
+``GuideOccupancy.bulk_create`` in a few transactions, and moves the guide
+fees into the daily booking rollups. It locks the bookings and then their
+guides, the same order as ``Booking.save()``, and re-checks the calendar,
+so bookings or guides taken since planning are skipped rather than
+double-booked.
+"""
+from collections import Counter, defaultdict, namedtuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .calendar import interval_for, overlapping
+from .facets import facet_index
+from .matching import destination_ids, mentioned, score_candidates
+from .models import Guide, GuideOccupancy
+
+PendingBooking = namedtuple(
+    'PendingBooking',
+    ['pk', 'package_pk', 'start_date', 'end_date', 'destination_pks', 'language_pks', 'speciality_pks'],
+)
+Assignment = namedtuple('Assignment', ['booking', 'guide_pk', 'score', 'components'])
+
+
+def load_pending(date_from=None, limit=None):
+    """Unassigned pending bookings travelling on or after ``date_from``, in one query."""
+    from bookings.models import Booking
+
+    date_from = date_from or timezone.localdate()
+    rows = (
+        Booking.objects.filter(status='pending', guide__isnull=True, travel_date__gte=date_from)
+        .order_by('travel_date', 'pk')
+        .values_list(
+            'pk', 'package_id', 'travel_date', 'package__destination', 'package__duration_days',
+            'special_requests',
+        )
+    )
+    if limit:
+        rows = rows[:limit]
+
+    destinations = {}
+    pending = []
+    for pk, package_pk, travel_date, destination, duration_days, special_requests in rows.iterator(
+        chunk_size=2000
+    ):
+        if destination not in destinations:
+            destinations[destination] = frozenset(destination_ids(destination))
+        start_date, end_date = interval_for(travel_date, duration_days)
+        pending.append(PendingBooking(
+            pk, package_pk, start_date, end_date, destinations[destination],
+            frozenset(mentioned('language', special_requests)),
+            frozenset(mentioned('speciality', special_requests)),
+        ))
+    return pending
+
+
+def _overlaps(intervals, start_date, end_date):
+    return any(start < end_date and end > start_date for start, end in intervals)
+
+
+def _calendar(start_date, end_date, guide_pks=None):
+    """``{guide_pk: [(start, end), ...]}`` of commitments inside the window."""
+    intervals = defaultdict(list)
+    occupancies = overlapping(start_date, end_date)
+    if guide_pks is not None:
+        occupancies = occupancies.filter(guide_id__in=guide_pks)
+    for guide_pk, start, end in occupancies.values_list('guide_id', 'start_date', 'end_date'):
+        intervals[guide_pk].append((start, end))
+    return intervals
+
+
+def plan_assignments(pending):
+    """
+    Return ``(assignments, unassigned)`` where ``unassigned`` maps a reason
+    ('no_destination', 'no_guide', 'all_busy') to booking ids.
+    """
+    unassigned = defaultdict(list)
+    if not pending:
+        return [], unassigned
+
+    eligible = {}
+    for booking in pending:
+        if not booking.destination_pks:
+            unassigned['no_destination'].append(booking.pk)
+            continue
+        candidates = facet_index.members('destination', booking.destination_pks)
+        if booking.language_pks:
+            candidates &= facet_index.members('language', booking.language_pks)
+        if not candidates:
+            unassigned['no_guide'].append(booking.pk)
+            continue
+        eligible[booking.pk] = candidates
+
+    guide_rows = facet_index.guide_rows(set().union(*eligible.values()))
+    window_start = min(booking.start_date for booking in pending)
+    window_end = max(booking.end_date for booking in pending)
+    # Every commitment in the batch's date range, rather than a huge IN list.
+    calendar = _calendar(window_start, window_end)
+
+    speciality_members = {}
+    queue = []
+    for booking in pending:
+        if booking.pk not in eligible:
+            continue
+        rows = {
+            pk: guide_rows[pk] for pk in eligible[booking.pk]
+            if pk in guide_rows and guide_rows[pk]['is_available']
+            and not _overlaps(calendar[pk], booking.start_date, booking.end_date)
+        }
+        if not rows:
+            unassigned['all_busy'].append(booking.pk)
+            continue
+        covered = []
+        for value in booking.speciality_pks:
+            if value not in speciality_members:
+                speciality_members[value] = facet_index.members('speciality', [value])
+            covered.append(speciality_members[value])
+        ranked = sorted(score_candidates(rows, None, covered), key=lambda item: -item.score)
+        queue.append((len(ranked), booking.start_date, booking, ranked))
+
+    assignments = []
+    queue.sort(key=lambda item: (item[0], item[1]))
+    for _, _, booking, ranked in queue:
+        for suggestion in ranked:
+            intervals = calendar[suggestion.guide_pk]
+            if _overlaps(intervals, booking.start_date, booking.end_date):
+                continue
+            intervals.append((booking.start_date, booking.end_date))
+            assignments.append(Assignment(booking, suggestion.guide_pk, suggestion.score, suggestion.components))
+            break
+        else:
+            unassigned['all_busy'].append(booking.pk)
+    return assignments, unassigned
+
+
+def apply_assignments(assignments, batch_size=500):
+    """Write ``assignments``; returns ``(written, conflicts)``."""
+    from bookings.models import Booking
+    from bookings.rollups import record_bulk
+
+    written = conflicts = 0
+    for offset in range(0, len(assignments), batch_size):
+        chunk = assignments[offset:offset + batch_size]
+        with transaction.atomic():
+            still_open = dict(
+                Booking.objects.select_for_update()
+                .filter(pk__in=[item.booking.pk for item in chunk], status='pending', guide__isnull=True)
+                .values_list('pk', 'guide_amount')
+            )
+            guide_pks = {item.guide_pk for item in chunk}
+            rates = dict(
+                Guide.objects.select_for_update().filter(pk__in=guide_pks, is_available=True)
+                .values_list('pk', 'rate_per_day')
+            )
+            calendar = _calendar(
+                min(item.booking.start_date for item in chunk),
+                max(item.booking.end_date for item in chunk),
+                guide_pks,
+            )
+
+            now = timezone.now()
+            bookings, occupancies, fees = [], [], []
+            for item in chunk:
+                booking = item.booking
+                intervals = calendar[item.guide_pk]
+                if (
+                    booking.pk not in still_open
+                    or item.guide_pk not in rates
+                    or _overlaps(intervals, booking.start_date, booking.end_date)
+                ):
+                    conflicts += 1
+                    continue
+                intervals.append((booking.start_date, booking.end_date))
+                # What Booking.save() would have derived for guide_amount.
+                bookings.append(Booking(
+                    pk=booking.pk, guide_id=item.guide_pk,
+                    guide_amount=rates[item.guide_pk], updated_at=now,
+                ))
+                occupancies.append(GuideOccupancy(
+                    booking_id=booking.pk, guide_id=item.guide_pk,
+                    start_date=booking.start_date, end_date=booking.end_date,
+                ))
+                fee = rates[item.guide_pk] - (still_open[booking.pk] or 0)
+                fees.append(((booking.start_date, booking.package_pk, 'pending'), (0, 0, 0, fee)))
+            Booking.objects.bulk_update(bookings, ['guide', 'guide_amount', 'updated_at'])
+            GuideOccupancy.objects.bulk_create(occupancies)
+            record_bulk(fees)
+            written += len(bookings)
+    return written, conflicts
+
+
+def summarise(pending, assignments, unassigned):
+    """Assignment quality figures for reporting."""
+    count = len(assignments)
+    languages_asked = [item for item in assignments if item.booking.language_pks]
+    components = Counter()
+    for item in assignments:
+        components.update(item.components)
+    return {
+        'bookings': len(pending),
+        'assigned': count,
+        'assigned_pct': round(100 * count / len(pending), 1) if pending else 0.0,
+        'unassigned': {reason: len(pks) for reason, pks in unassigned.items()},
+        'score_avg': round(sum(item.score for item in assignments) / count, 4) if count else None,
+        'components_avg': {name: round(total / count, 4) for name, total in components.items()} if count else {},
+        'language_requests': len(languages_asked),
+        'guides_used': len({item.guide_pk for item in assignments}),
+    }
@@ -0,0 +1,136 @@
+"""
+Guide availability calendar.
+
+Every booking that has a guide and is not cancelled owns one
+``GuideOccupancy`` interval ``[travel_date, travel_date + duration_days)``.
+"Which guides are free between A and B" is then an index range scan over
+``GuideOccupancy`` rather than a walk over bookings and packages.
+
+Double-booking is prevented by taking a row lock on the guide
+(``SELECT ... FOR UPDATE``) before checking for overlaps and writing the
+interval, so two concurrent assignments of the same guide serialise and the
+second one sees the first.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+
+from .models import Guide, GuideOccupancy
+
+# Bookings in these states do not hold the guide's time.
+RELEASED_STATUSES = ('cancelled',)
+
+
+class GuideUnavailable(Exception):
+    """The guide already has an overlapping commitment."""
+
+    def __init__(self, guide, start_date, end_date):
+        self.guide = guide
+        self.start_date = start_date
+        self.end_date = end_date
+        super().__init__(f"{guide} is already booked between {start_date} and {end_date}.")
+
+
+def interval_for(travel_date, duration_days):
+    """Half-open occupancy interval for a trip starting on ``travel_date``."""
+    return travel_date, travel_date + timedelta(days=max(duration_days or 1, 1))
+
+
+def booking_interval(booking):
+    return interval_for(booking.travel_date, booking.package.duration_days)
+
+
+def overlapping(start_date, end_date):
+    """Occupancies that intersect ``[start_date, end_date)``."""
+    return GuideOccupancy.objects.filter(start_date__lt=end_date, end_date__gt=start_date)
+
+
+def is_free(guide, start_date, end_date, exclude_booking=None):
+    busy = overlapping(start_date, end_date).filter(guide=guide)
+    if exclude_booking is not None:
+        busy = busy.exclude(booking=exclude_booking)
+    return not busy.exists()
+
+
+def free_guides(start_date, end_date, queryset=None):
+    """Guides accepting bookings with no commitment overlapping the dates."""
+    if queryset is None:
+        queryset = Guide.objects.all()
+    busy = overlapping(start_date, end_date).values('guide_id')
+    return queryset.filter(is_available=True).exclude(pk__in=busy)
+
+
+def holds_interval(guide_id, status):
+    return guide_id is not None and status not in RELEASED_STATUSES
+
+
+def sync_booking(booking, had_interval=True):
+    """
+    Make the calendar match ``booking``: hold an interval while it has a guide
+    and is active, drop it otherwise. Raises ``GuideUnavailable`` if the guide
+    is taken, which rolls back the enclosing transaction.
+
+    ``had_interval=False`` says the stored booking held no interval (e.g. it
+    is new), so there is nothing to drop.
+    """
+    if not holds_interval(booking.guide_id, booking.status):
+        if had_interval:
+            GuideOccupancy.objects.filter(booking=booking).delete()
+        return None
+
+    start_date, end_date = booking_interval(booking)
+    with transaction.atomic():
+        # Serialise every assignment for this guide on its row lock.
+        guide = Guide.objects.select_for_update().get(pk=booking.guide_id)
+        if not is_free(guide, start_date, end_date, exclude_booking=booking):
+            raise GuideUnavailable(guide, start_date, end_date)
+        occupancy, _ = GuideOccupancy.objects.update_or_create(
+            booking=booking,
+            defaults={'guide': guide, 'start_date': start_date, 'end_date': end_date},
+        )
+    return occupancy
+
+
+def assign_guide(booking, guide):
+    """Assign ``guide`` to ``booking`` if free for the whole trip."""
+    with transaction.atomic():
+        booking.guide = guide
+        booking.guide_amount = None
+        # Booking.save() re-derives guide_amount and calls sync_booking().
+        booking.save()
+    return booking
+
+
+def release_guide(booking):
+    with transaction.atomic():
+        booking.guide = None
+        booking.guide_amount = None
+        booking.save()
+    return booking
+
+
+def rebuild_calendar(batch_size=1000):
+    """Recreate every occupancy interval from bookings (no overlap checks)."""
+    from bookings.models import Booking
+
+    with transaction.atomic():
+        GuideOccupancy.objects.all().delete()
+        bookings = (
+            Booking.objects.filter(guide__isnull=False)
+            .exclude(status__in=RELEASED_STATUSES)
+            .values_list('pk', 'guide_id', 'travel_date', 'package__duration_days')
+        )
+        batch = []
+        created = 0
+        for pk, guide_id, travel_date, duration_days in bookings.iterator(chunk_size=batch_size):
+            start_date, end_date = interval_for(travel_date, duration_days)
+            batch.append(GuideOccupancy(
+                booking_id=pk, guide_id=guide_id, start_date=start_date, end_date=end_date
+            ))
+            if len(batch) >= batch_size:
+                GuideOccupancy.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        GuideOccupancy.objects.bulk_create(batch)
+        created += len(batch)
+    return created
@@ -0,0 +1,319 @@
+"""
+In-memory facet index for guide search.
+
+Every guide is reachable through three M2M tables (destinations, specialities
+and languages), so a filter such as "guides in Goa who speak French and do
+trekking" is a three-way join with DISTINCT when it goes through the ORM.
+The index below keeps one set of guide ids per facet value instead, so AND/OR
+filters become set intersections/unions and per-facet counts are a single
+pass over the result set.
+
+The index lives in process memory. A version counter in the Django cache is
+bumped on every change so that other worker processes notice they are stale
+and rebuild on their next query, while the process that saw the change
+applies it incrementally once its transaction commits. That needs a cache shared by all processes (see
+``CACHES`` in settings).
+"""
+import threading
+from bisect import bisect_left, bisect_right
+from decimal import Decimal
+
+from django.core.cache import cache
+
+VERSION_KEY = 'guide:facets:version'
+
+# Guide fields kept per guide for filtering and ranking.
+GUIDE_FIELDS = ('name', 'rate_per_day', 'rating', 'is_available')
+
+# Facet name -> (Guide M2M field name, attribute used as label)
+FACETS = {
+    'destination': ('destinations', 'name'),
+    'speciality': ('specialities', 'name'),
+    'language': ('languages', 'name'),
+}
+
+
+def _current_version():
+    cache.add(VERSION_KEY, 0, None)
+    return cache.get(VERSION_KEY, 0)
+
+
+def _bump_version():
+    cache.add(VERSION_KEY, 0, None)
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        # Key evicted between add() and incr(); start a new generation.
+        cache.set(VERSION_KEY, 1, None)
+        return 1
+
+
+class GuideFacetIndex:
+    """Per-facet sets of guide primary keys plus the scalar fields we filter on."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._built = False
+        self.version = None
+        self.postings = {facet: {} for facet in FACETS}
+        self.labels = {facet: {} for facet in FACETS}
+        self.guides = {}
+        self._by_rate = None
+        self._by_rating = None
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+    def build(self):
+        """
+        Load the whole index with one query per table (no joins).
+
+        The queries run without holding the index lock, so searches keep
+        being served (and no lock is held while waiting for a DB connection);
+        only the final swap is locked.
+        """
+        from .models import Guide
+
+        # Read the version first: if anything changes while we load, the
+        # stored version is already behind and the next query rebuilds.
+        version = _current_version()
+        guides = {
+            pk: {'name': name, 'rate_per_day': rate, 'rating': rating, 'is_available': available}
+            for pk, name, rate, rating, available in Guide.objects.values_list(
+                'pk', 'name', 'rate_per_day', 'rating', 'is_available'
+            )
+        }
+        postings = {facet: {} for facet in FACETS}
+        labels = {facet: {} for facet in FACETS}
+        for facet, (field_name, label_attr) in FACETS.items():
+            field = Guide._meta.get_field(field_name)
+            related = field.related_model
+            for pk, label in related.objects.values_list('pk', label_attr):
+                labels[facet][pk] = label
+                postings[facet][pk] = set()
+            through = field.remote_field.through
+            for guide_pk, value_pk in through.objects.values_list(
+                field.m2m_field_name(), field.m2m_reverse_field_name()
+            ):
+                postings[facet].setdefault(value_pk, set()).add(guide_pk)
+
+        with self._lock:
+            self.guides = guides
+            self.postings = postings
+            self.labels = labels
+            self._invalidate_ranges()
+            self.version = version
+            self._built = True
+
+    def ensure_fresh(self):
+        if self.version is not None and self.version == _current_version():
+            return
+        # One rebuild at a time; meanwhile other threads answer from the
+        # previous index rather than queueing up behind the builder.
+        if self._build_lock.acquire(blocking=False):
+            try:
+                self.build()
+            finally:
+                self._build_lock.release()
+        elif not self._built:
+            self.build()
+
+    def mark_stale(self):
+        with self._lock:
+            self.version = None
+
+    def invalidate(self):
+        """Force every process to rebuild, e.g. after a bulk_update that skipped signals."""
+        with self._lock:
+            _bump_version()
+            self.version = None
+
+    def _invalidate_ranges(self):
+        self._by_rate = None
+        self._by_rating = None
+
+    def _sorted_by(self, attr):
+        items = sorted(
+            (data[attr], pk) for pk, data in self.guides.items() if data[attr] is not None
+        )
+        return [value for value, _ in items], [pk for _, pk in items]
+
+    # ------------------------------------------------------------------
+    # Incremental maintenance (called from guide.signals)
+    # ------------------------------------------------------------------
+    def _apply(self, mutate):
+        """Run ``mutate`` if this process was current before the change, else go stale."""
+        with self._lock:
+            previous = self.version
+            new_version = _bump_version()
+            if previous is not None and new_version == previous + 1:
+                mutate()
+                self.version = new_version
+            else:
+                self.version = None
+
+    def guide_saved(self, guide_pk, values):
+        """
+        Store a saved guide's ``values`` for the GUIDE_FIELDS it wrote (all of
+        them, or just those in ``update_fields``).
+        """
+        with self._lock:
+            if guide_pk not in self.guides and set(values) != set(GUIDE_FIELDS):
+                # A partial save of a guide this index never saw.
+                self.invalidate()
+                return
+
+            def mutate():
+                self.guides.setdefault(guide_pk, {}).update(values)
+                if 'rate_per_day' in values:
+                    self._by_rate = None
+                if 'rating' in values:
+                    self._by_rating = None
+            self._apply(mutate)
+
+    def guide_deleted(self, guide_pk):
+        def mutate():
+            self.guides.pop(guide_pk, None)
+            for facet in FACETS:
+                for members in self.postings[facet].values():
+                    members.discard(guide_pk)
+            self._invalidate_ranges()
+        self._apply(mutate)
+
+    def value_saved(self, facet, value_pk, label):
+        def mutate():
+            self.labels[facet][value_pk] = label
+            self.postings[facet].setdefault(value_pk, set())
+        self._apply(mutate)
+
+    def value_deleted(self, facet, value_pk):
+        def mutate():
+            self.labels[facet].pop(value_pk, None)
+            self.postings[facet].pop(value_pk, None)
+        self._apply(mutate)
+
+    def links_changed(self, facet, action, guide_pks, value_pks):
+        """Apply an M2M add/remove/clear for the given guide and value ids."""
+        def mutate():
+            postings = self.postings[facet]
+            if action == 'post_add':
+                for value_pk in value_pks:
+                    postings.setdefault(value_pk, set()).update(guide_pks)
+            elif action == 'post_remove':
+                for value_pk in value_pks:
+                    postings.get(value_pk, set()).difference_update(guide_pks)
+            elif action == 'post_clear':
+                targets = value_pks if value_pks is not None else list(postings)
+                for value_pk in targets:
+                    members = postings.get(value_pk)
+                    if members is None:
+                        continue
+                    if guide_pks is None:
+                        members.clear()
+                    else:
+                        members.difference_update(guide_pks)
+        self._apply(mutate)
+
+    # ------------------------------------------------------------------
+    # Querying
+    # ------------------------------------------------------------------
+    def resolve(self, facet, values):
+        """Map facet values (ids or case-insensitive labels) to primary keys."""
+        by_label = {str(label).lower(): pk for pk, label in self.labels[facet].items()}
+        resolved = []
+        for value in values:
+            if isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+                if int(value) in self.labels[facet]:
+                    resolved.append(int(value))
+                    continue
+            pk = by_label.get(str(value).strip().lower())
+            # Unknown values still take part so that AND filters match nothing.
+            resolved.append(pk)
+        return resolved
+
+    def members(self, facet, values):
+        """Guides linked to any of ``values`` (ids or labels) in ``facet``."""
+        self.ensure_fresh()
+        with self._lock:
+            return set().union(*(
+                self.postings[facet].get(pk, set()) for pk in self.resolve(facet, values)
+            ))
+
+    def value_labels(self, facet):
+        """``{value_pk: label}`` for every value of ``facet``."""
+        self.ensure_fresh()
+        with self._lock:
+            return dict(self.labels[facet])
+
+    def guide_rows(self, guide_pks):
+        """Indexed scalar fields (name, rate_per_day, rating, is_available) per guide."""
+        with self._lock:
+            return {pk: self.guides[pk] for pk in guide_pks if pk in self.guides}
+
+    def _range(self, attr, low, high):
+        if attr == 'rate_per_day':
+            if self._by_rate is None:
+                self._by_rate = self._sorted_by(attr)
+            values, pks = self._by_rate
+        else:
+            if self._by_rating is None:
+                self._by_rating = self._sorted_by(attr)
+            values, pks = self._by_rating
+        start = bisect_left(values, Decimal(low)) if low is not None else 0
+        end = bisect_right(values, Decimal(high)) if high is not None else len(values)
+        return set(pks[start:end])
+
+    def search(self, filters=None, match='all', min_rate=None, max_rate=None,
+               min_rating=None, max_rating=None, available_only=False):
+        """
+        Return ``(guide_pks, facet_counts)``.
+
+        ``filters`` maps a facet name to a list of values. Values within one
+        facet are combined with AND when ``match == 'all'`` and with OR when
+        ``match == 'any'``; different facets are always ANDed together.
+        ``guide_pks`` follow ``Guide.Meta.ordering`` (-rating, name).
+        """
+        self.ensure_fresh()
+        filters = filters or {}
+        with self._lock:
+            candidates = set(self.guides)
+            for facet, values in filters.items():
+                if not values:
+                    continue
+                sets = [self.postings[facet].get(pk, set()) for pk in self.resolve(facet, values)]
+                if match == 'any':
+                    matched = set().union(*sets)
+                else:
+                    matched = set.intersection(*sets)
+                candidates &= matched
+                if not candidates:
+                    break
+
+            if candidates and (min_rate is not None or max_rate is not None):
+                candidates &= self._range('rate_per_day', min_rate, max_rate)
+            if candidates and (min_rating is not None or max_rating is not None):
+                candidates &= self._range('rating', min_rating, max_rating)
+            if candidates and available_only:
+                candidates = {pk for pk in candidates if self.guides[pk]['is_available']}
+
+            counts = {}
+            for facet in FACETS:
+                counts[facet] = {
+                    self.labels[facet].get(pk, pk): len(members & candidates)
+                    for pk, members in self.postings[facet].items()
+                    if members & candidates
+                }
+
+            ordered = sorted(
+                candidates,
+                key=lambda pk: (
+                    self.guides[pk]['rating'] is None,
+                    -(self.guides[pk]['rating'] or 0),
+                    self.guides[pk]['name'],
+                ),
+            )
+        return ordered, counts
+
+
+facet_index = GuideFacetIndex()
@@ -0,0 +1,69 @@
+import json
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from guide.assignment import apply_assignments, load_pending, plan_assignments, summarise
+
+
+class Command(BaseCommand):
+    help = "Assign guides to unassigned pending bookings in one batch and report solve time and quality."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', help='Earliest travel date (YYYY-MM-DD); default today.')
+        parser.add_argument('--limit', type=int, help='Assign at most this many bookings.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Bookings written per transaction.')
+        parser.add_argument('--dry-run', action='store_true', help='Plan and report without writing.')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+
+    def handle(self, *args, **options):
+        try:
+            date_from = date.fromisoformat(options['date_from']) if options['date_from'] else None
+        except ValueError:
+            raise CommandError("--from must be YYYY-MM-DD.")
+
+        started = time.perf_counter()
+        pending = load_pending(date_from=date_from, limit=options['limit'])
+        loaded = time.perf_counter()
+        assignments, unassigned = plan_assignments(pending)
+        solved = time.perf_counter()
+        written = conflicts = 0
+        if not options['dry_run']:
+            written, conflicts = apply_assignments(assignments, batch_size=options['batch_size'])
+        finished = time.perf_counter()
+
+        report = summarise(pending, assignments, unassigned)
+        report.update(
+            written=written,
+            write_conflicts=conflicts,
+            dry_run=options['dry_run'],
+            load_ms=round((loaded - started) * 1000, 2),
+            solve_ms=round((solved - loaded) * 1000, 2),
+            write_ms=round((finished - solved) * 1000, 2),
+        )
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(
+            f"Loaded {report['bookings']} pending bookings in {report['load_ms']} ms; "
+            f"solved in {report['solve_ms']} ms."
+        )
+        self.stdout.write(
+            f"Assigned {report['assigned']} ({report['assigned_pct']}%) across {report['guides_used']} guides; "
+            f"average score {report['score_avg']}."
+        )
+        if report['components_avg']:
+            self.stdout.write("Average components: " + ', '.join(
+                f"{name} {value}" for name, value in report['components_avg'].items()
+            ))
+        for reason, count in sorted(report['unassigned'].items()):
+            self.stdout.write(f"Unassigned ({reason}): {count}")
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING("Dry run: nothing written."))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Wrote {written} assignments in {report['write_ms']} ms "
+                f"({conflicts} skipped because the booking or guide changed meanwhile)."
+            ))
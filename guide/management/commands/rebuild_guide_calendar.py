@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from guide.calendar import rebuild_calendar
+
+
+class Command(BaseCommand):
+    help = "Recreate guide occupancy intervals from bookings that have a guide assigned."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        created = rebuild_calendar(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt guide calendar: {created} occupancy intervals."))
@@ -0,0 +1,65 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from bookings.models import ArchivedBooking, Booking
+from guide.facets import facet_index
+from guide.models import Guide
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every guide's rating_count, rating_sum and rating from completed bookings; "
+        "guides with no rated bookings keep their current rating."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        # One grouped query over live and one over archived bookings
+        # instead of one AVG per guide.
+        totals = {}
+        for model in (Booking, ArchivedBooking):
+            for row in model.objects.filter(
+                status='completed',
+                guide__isnull=False,
+                guide_rating__isnull=False,
+            ).order_by().values('guide').annotate(
+                count=Count('pk'),
+                total=Sum('guide_rating'),
+            ):
+                count, total = totals.get(row['guide'], (0, Decimal('0')))
+                totals[row['guide']] = (count + row['count'], total + (row['total'] or Decimal('0')))
+
+        now = timezone.now()
+        changed = []
+        for guide in Guide.objects.only('pk', 'rating', 'rating_count', 'rating_sum').iterator(
+            chunk_size=options['batch_size']
+        ):
+            count, total = totals.get(guide.pk, (0, Decimal('0')))
+            # Guides without rated bookings keep whatever rating they had.
+            rating = Guide.rating_from_aggregates(count, total) if count else guide.rating
+            if (guide.rating_count, guide.rating_sum, guide.rating) != (count, total, rating):
+                guide.rating_count = count
+                guide.rating_sum = total
+                guide.rating = rating
+                guide.updated_at = now
+                changed.append(guide)
+
+        with transaction.atomic():
+            Guide.objects.bulk_update(
+                changed,
+                ['rating_count', 'rating_sum', 'rating', 'updated_at'],
+                batch_size=options['batch_size'],
+            )
+        if changed:
+            # bulk_update skips post_save, so the facet index must be told.
+            facet_index.invalidate()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt rating aggregates: {len(totals)} rated guides, {len(changed)} updated."
+        ))
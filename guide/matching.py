@@ -0,0 +1,145 @@
+"""
+Guide suggestions for bookings.
+
+A package only has a free-text ``destination``. ``destination_ids`` maps it
+onto ``Destination`` rows by finding destination names inside it as whole
+phrases ("North Goa beaches" -> Goa). Candidates are the available guides
+linked to those destinations and free for the trip. They come from the
+in-memory facet index, which ``guide.signals`` keeps current incrementally,
+plus one occupancy range query, so ranking never joins the M2M tables.
+
+A candidate's score is a weighted sum of components, each in [0, 1]:
+
+``language``    1 if the guide speaks one of the requested languages
+``speciality``  share of the requested specialities the guide covers
+``rating``      average rating / 5 (unrated guides get ``UNRATED_SCORE``)
+``rate``        cheaper is better: budget / rate when a budget is given,
+                otherwise the rate's place between the cheapest and the
+                dearest candidate
+"""
+import heapq
+import re
+import unicodedata
+from collections import namedtuple
+
+from .calendar import booking_interval, overlapping
+from .facets import facet_index
+
+WEIGHTS = {'language': 0.35, 'speciality': 0.2, 'rating': 0.3, 'rate': 0.15}
+UNRATED_SCORE = 0.6
+MAX_SUGGESTIONS = 50
+
+Suggestion = namedtuple('Suggestion', ['guide_pk', 'score', 'components'])
+
+
+def _normalise(text):
+    text = unicodedata.normalize('NFKD', str(text or ''))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return ' '.join(re.findall(r'\w+', text))
+
+
+def mentioned(facet, text):
+    """Ids of ``facet`` values whose label appears as a whole phrase in ``text``."""
+    haystack = f" {_normalise(text)} "
+    if not haystack.strip():
+        return []
+    found = []
+    for pk, label in facet_index.value_labels(facet).items():
+        name = _normalise(label)
+        if name and f" {name} " in haystack:
+            found.append(pk)
+    return found
+
+
+def destination_ids(text):
+    """``Destination`` ids named in a package's free-text destination."""
+    return mentioned('destination', text)
+
+
+def busy_guides(start_date, end_date, exclude_booking=None):
+    """Ids of guides with a commitment overlapping ``[start_date, end_date)``."""
+    busy = overlapping(start_date, end_date)
+    if exclude_booking is not None:
+        busy = busy.exclude(booking=exclude_booking)
+    return set(busy.values_list('guide_id', flat=True))
+
+
+def rank_guides(destination_pks, languages=(), specialities=(), busy=(), budget=None,
+                limit=5, require_language=False):
+    """
+    Best ``limit`` guides serving ``destination_pks`` as ``Suggestion`` tuples,
+    highest score first. Unavailable guides and those in ``busy`` are never
+    suggested; with ``require_language`` neither are guides who speak none
+    of ``languages``.
+    """
+    if not destination_pks:
+        return []
+    candidates = facet_index.members('destination', destination_pks) - set(busy)
+    speakers = facet_index.members('language', languages) if languages else None
+    if require_language and speakers is not None:
+        candidates &= speakers
+    rows = {
+        pk: row for pk, row in facet_index.guide_rows(candidates).items()
+        if row['is_available']
+    }
+    covered = [facet_index.members('speciality', [value]) for value in specialities]
+    return heapq.nlargest(
+        min(limit, MAX_SUGGESTIONS),
+        score_candidates(rows, speakers, covered, budget),
+        key=lambda item: (item.score, item.components['rating']),
+    )
+
+
+def score_candidates(rows, speakers=None, covered=(), budget=None):
+    """
+    A ``Suggestion`` for every guide in ``rows`` (``{pk: facet index row}``).
+    ``speakers`` is the set of guides speaking a requested language (None if
+    no language was asked for); ``covered`` has one set of guides per
+    requested speciality.
+    """
+    rates = [float(row['rate_per_day']) for row in rows.values()]
+    if not rates:
+        return []
+    cheapest, dearest = min(rates), max(rates)
+    budget = float(budget) if budget is not None else None
+
+    def suggestion(pk, row):
+        rate = float(row['rate_per_day'])
+        if budget is not None:
+            rate_score = 1.0 if rate <= budget else budget / rate
+        elif dearest > cheapest:
+            rate_score = (dearest - rate) / (dearest - cheapest)
+        else:
+            rate_score = 1.0
+        components = {
+            'language': 1.0 if speakers is None or pk in speakers else 0.0,
+            'speciality': (
+                sum(pk in members for members in covered) / len(covered) if covered else 1.0
+            ),
+            'rating': float(row['rating']) / 5 if row['rating'] is not None else UNRATED_SCORE,
+            'rate': rate_score,
+        }
+        score = sum(WEIGHTS[name] * value for name, value in components.items())
+        return Suggestion(pk, score, components)
+
+    return [suggestion(pk, row) for pk, row in rows.items()]
+
+
+def suggest_for_booking(booking, limit=5, languages=None, specialities=None, budget=None):
+    """
+    Rank guides for ``booking``. Languages and specialities default to those
+    named in the booking's special requests ("French-speaking, trekking").
+    """
+    if languages is None:
+        languages = mentioned('language', booking.special_requests)
+    if specialities is None:
+        specialities = mentioned('speciality', booking.special_requests)
+    start_date, end_date = booking_interval(booking)
+    return rank_guides(
+        destination_ids(booking.package.destination),
+        languages=languages,
+        specialities=specialities,
+        busy=busy_guides(start_date, end_date, exclude_booking=booking),
+        budget=budget,
+        limit=limit,
+    )
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:06
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Booking = apps.get_model("bookings", "Booking")
+    Guide = apps.get_model("guide", "Guide")
+    # One grouped query; guides without rated bookings keep their rating.
+    totals = (
+        Booking.objects.filter(
+            status="completed", guide__isnull=False, guide_rating__isnull=False
+        )
+        .order_by()
+        .values("guide")
+        .annotate(count=Count("pk"), total=Sum("guide_rating"))
+    )
+    changed = []
+    for row in totals:
+        total = row["total"] or Decimal("0")
+        changed.append(
+            Guide(
+                pk=row["guide"],
+                rating_count=row["count"],
+                rating_sum=total,
+                rating=(total / row["count"]).quantize(Decimal("0.01")),
+            )
+        )
+    Guide.objects.bulk_update(
+        changed, ["rating_count", "rating_sum", "rating"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0001_initial"),
+        ("guide", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="guide",
+            name="rating_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Number of rated, completed bookings",
+                verbose_name="Rating Count",
+            ),
+        ),
+        migrations.AddField(
+            model_name="guide",
+            name="rating_sum",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=Decimal("0"),
+                editable=False,
+                help_text="Sum of guide ratings over rated, completed bookings",
+                max_digits=12,
+                verbose_name="Rating Sum",
+            ),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:10
+
+import django.db.models.deletion
+from datetime import timedelta
+from django.db import migrations, models
+
+
+def backfill_occupancy(apps, schema_editor):
+    Booking = apps.get_model("bookings", "Booking")
+    GuideOccupancy = apps.get_model("guide", "GuideOccupancy")
+    rows = (
+        Booking.objects.filter(guide__isnull=False)
+        .exclude(status="cancelled")
+        .values_list("pk", "guide_id", "travel_date", "package__duration_days")
+    )
+    batch = []
+    for pk, guide_id, travel_date, duration_days in rows.iterator(chunk_size=1000):
+        batch.append(
+            GuideOccupancy(
+                booking_id=pk,
+                guide_id=guide_id,
+                start_date=travel_date,
+                end_date=travel_date + timedelta(days=max(duration_days or 1, 1)),
+            )
+        )
+        if len(batch) >= 1000:
+            GuideOccupancy.objects.bulk_create(batch)
+            batch = []
+    GuideOccupancy.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0002_initial"),
+        ("guide", "0002_guide_rating_aggregates"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GuideOccupancy",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("start_date", models.DateField(verbose_name="Start Date")),
+                (
+                    "end_date",
+                    models.DateField(
+                        help_text="First day the guide is free again (exclusive)",
+                        verbose_name="End Date",
+                    ),
+                ),
+                (
+                    "booking",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="guide_occupancy",
+                        to="bookings.booking",
+                        verbose_name="Booking",
+                    ),
+                ),
+                (
+                    "guide",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="occupancies",
+                        to="guide.guide",
+                        verbose_name="Guide",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Guide Occupancy",
+                "verbose_name_plural": "Guide Occupancies",
+                "indexes": [
+                    models.Index(
+                        fields=["guide", "start_date", "end_date"],
+                        name="guide_occ_guide_range_idx",
+                    ),
+                    models.Index(
+                        fields=["start_date", "end_date"], name="guide_occ_range_idx"
+                    ),
+                ],
+                "constraints": [
+                    models.CheckConstraint(
+                        condition=models.Q(("end_date__gt", models.F("start_date"))),
+                        name="guide_occ_end_after_start",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_occupancy, migrations.RunPython.noop),
+    ]
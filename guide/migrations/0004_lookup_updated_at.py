@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("guide", "0003_guide_occupancy"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="destination",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="language",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="speciality",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,5 +1,6 @@
 import uuid
-from django.db import models
+from decimal import Decimal
+from django.db import models, transaction
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.translation import gettext_lazy as _
@@ -21,6 +22,7 @@ class Destination(models.Model):
         blank=True,
         verbose_name=_("Description")
     )
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['name']
@@ -42,6 +44,7 @@ class Speciality(models.Model):
         blank=True,
         verbose_name=_("Description")
     )
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['name']
@@ -66,6 +69,7 @@ class Language(models.Model):
         verbose_name=_("Language Code"),
         help_text=_("ISO 639-1 language code (e.g., 'en', 'es', 'fr')")
     )
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['name']
@@ -125,6 +129,20 @@ class Guide(models.Model):
         verbose_name=_("Rating"),
         help_text=_("Average rating out of 5.0")
     )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name=_("Rating Count"),
+        help_text=_("Number of rated, completed bookings")
+    )
+    rating_sum = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0'),
+        editable=False,
+        verbose_name=_("Rating Sum"),
+        help_text=_("Sum of guide ratings over rated, completed bookings")
+    )
     rate_per_day = models.DecimalField(
         max_digits=10,
         decimal_places=2,
@@ -149,11 +167,79 @@ class Guide(models.Model):
         return f"{self.name} ({self.guide_id})"
     
     def get_average_rating(self):
-        """Calculate average rating from bookings"""
-        from django.db.models import Avg
-        avg = self.bookings.filter(
-            status='completed',
-            guide_rating__isnull=False
-        ).aggregate(Avg('guide_rating'))
-        return avg['guide_rating__avg']
+        """Average rating from completed bookings, read from the running aggregates"""
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
+    @staticmethod
+    def rating_from_aggregates(count, total):
+        if not count:
+            return None
+        return (Decimal(total) / count).quantize(Decimal('0.01'))
+
+    @classmethod
+    def apply_rating_delta(cls, pk, count_delta, sum_delta):
+        """
+        Adjust a guide's running rating count/sum and the derived ``rating``.
 
+        The guide row is locked for the duration of the enclosing transaction
+        so concurrent booking updates cannot lose each other's deltas.
+        """
+        with transaction.atomic():
+            guide = cls.objects.select_for_update().filter(pk=pk).first()
+            if guide is None:
+                return
+            guide.rating_count = max(guide.rating_count + count_delta, 0)
+            guide.rating_sum = guide.rating_sum + Decimal(sum_delta)
+            if not guide.rating_count:
+                guide.rating_sum = Decimal('0')
+            fields = ['rating_count', 'rating_sum', 'updated_at']
+            rating = cls.rating_from_aggregates(guide.rating_count, guide.rating_sum)
+            if rating != guide.rating:
+                # Only then do the facet and search indexes need to hear of it.
+                guide.rating = rating
+                fields.append('rating')
+            guide.save(update_fields=fields)
+
+
+class GuideOccupancy(models.Model):
+    """
+    A half-open date interval [start_date, end_date) during which a guide is
+    committed to a booking. Kept in step with ``Booking.guide`` by
+    ``guide.calendar``; cancelled bookings hold no interval.
+    """
+    guide = models.ForeignKey(
+        Guide,
+        on_delete=models.CASCADE,
+        related_name='occupancies',
+        verbose_name=_("Guide")
+    )
+    booking = models.OneToOneField(
+        'bookings.Booking',
+        on_delete=models.CASCADE,
+        related_name='guide_occupancy',
+        verbose_name=_("Booking")
+    )
+    start_date = models.DateField(verbose_name=_("Start Date"))
+    end_date = models.DateField(
+        verbose_name=_("End Date"),
+        help_text=_("First day the guide is free again (exclusive)")
+    )
+    
+    class Meta:
+        verbose_name = _("Guide Occupancy")
+        verbose_name_plural = _("Guide Occupancies")
+        indexes = [
+            models.Index(fields=['guide', 'start_date', 'end_date'], name='guide_occ_guide_range_idx'),
+            models.Index(fields=['start_date', 'end_date'], name='guide_occ_range_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(end_date__gt=models.F('start_date')),
+                name='guide_occ_end_after_start',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.guide} {self.start_date} - {self.end_date}"
@@ -0,0 +1,65 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .facets import FACETS, GUIDE_FIELDS, facet_index
+from .models import Destination, Guide, Language, Speciality
+
+FACET_MODELS = {
+    Destination: 'destination',
+    Speciality: 'speciality',
+    Language: 'language',
+}
+
+
+# Every change reaches the index after commit, so other processes never
+# rebuild from rows that may still roll back and a rollback leaves the
+# index alone. Arguments are captured now, as the instance may change.
+
+@receiver(post_save, sender=Guide)
+def guide_saved(sender, instance, update_fields=None, **kwargs):
+    fields = [field for field in GUIDE_FIELDS if update_fields is None or field in update_fields]
+    if not fields:
+        # e.g. Guide.apply_rating_delta leaving the rating as it was.
+        return
+    values = {field: getattr(instance, field) for field in fields}
+    transaction.on_commit(partial(facet_index.guide_saved, instance.pk, values))
+
+
+@receiver(post_delete, sender=Guide)
+def guide_deleted(sender, instance, **kwargs):
+    transaction.on_commit(partial(facet_index.guide_deleted, instance.pk))
+
+
+def facet_value_saved(sender, instance, **kwargs):
+    transaction.on_commit(partial(facet_index.value_saved, FACET_MODELS[sender], instance.pk, instance.name))
+
+
+def facet_value_deleted(sender, instance, **kwargs):
+    transaction.on_commit(partial(facet_index.value_deleted, FACET_MODELS[sender], instance.pk))
+
+
+def guide_links_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep the facet index in step with guide destination/speciality/language links."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    facet = THROUGH_FACETS[sender]
+    pks = None if pk_set is None else set(pk_set)
+    if reverse:
+        guide_pks, value_pks = pks, [instance.pk]
+    else:
+        guide_pks, value_pks = [instance.pk], pks
+    transaction.on_commit(partial(facet_index.links_changed, facet, action, guide_pks, value_pks))
+
+
+for model in FACET_MODELS:
+    post_save.connect(facet_value_saved, sender=model)
+    post_delete.connect(facet_value_deleted, sender=model)
+
+THROUGH_FACETS = {}
+for facet, (field_name, _) in FACETS.items():
+    through = getattr(Guide, field_name).through
+    THROUGH_FACETS[through] = facet
+    m2m_changed.connect(guide_links_changed, sender=through)
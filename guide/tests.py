@@ -1,3 +1,165 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from bookings.models import Booking, Package
+
+from . import views
+from .calendar import GuideUnavailable, free_guides, interval_for
+from .facets import _current_version, facet_index
+from .models import Destination, Guide, GuideOccupancy
+
+
+class GuideSearchParameterTests(TestCase):
+    BAD_PARAMETERS = [
+        {'min_rate': 'nan'},
+        {'max_rate': 'inf'},
+        {'min_rating': '-Infinity'},
+        {'max_rating': 'sNaN'},
+        {'min_rate': 'cheap'},
+        {'page': 'two'},
+        {'page_size': '1e3'},
+        {'match': 'some'},
+    ]
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Guide.objects.create(guide_id='G1', name='Asha', rate_per_day=Decimal('500.00'))
+        self.factory = RequestFactory()
+
+    def test_bad_parameters(self):
+        for params in self.BAD_PARAMETERS:
+            with self.subTest(params=params):
+                response = self.client.get('/guides/search/', params)
+                self.assertEqual(response.status_code, 400)
+
+    async def test_bad_parameters_async(self):
+        for params in self.BAD_PARAMETERS:
+            with self.subTest(params=params):
+                response = await views.guide_search_async(self.factory.get('/guides/search/', params))
+                self.assertEqual(response.status_code, 400)
+
+    def test_finite_range(self):
+        response = self.client.get('/guides/search/', {'min_rate': '100', 'max_rate': '600.50'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 1)
+
+    def test_bad_budget(self):
+        staff = get_user_model().objects.create_user(
+            email='staff@example.com', username='staff', password='secret', is_staff=True
+        )
+        self.client.force_login(staff)
+        response = self.client.get('/guides/suggest/', {'budget': 'nan'})
+        self.assertEqual(response.status_code, 400)
+
+
+class FacetIndexTests(TestCase):
+    def setUp(self):
+        self.destination = Destination.objects.create(name='Goa')
+        self.guide = Guide.objects.create(guide_id='G1', name='Asha', rate_per_day=Decimal('500.00'))
+        facet_index.build()
+
+    def test_changes_wait_for_commit(self):
+        version = _current_version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.guide.destinations.add(self.destination)
+        self.assertEqual(_current_version(), version)
+        self.assertEqual(facet_index.members('destination', ['Goa']), set())
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(facet_index.members('destination', ['Goa']), {self.guide.pk})
+
+    def test_rollback_leaves_index_alone(self):
+        version = _current_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Guide.objects.create(guide_id='G2', name='Ravi', rate_per_day=Decimal('300.00'))
+                raise RuntimeError
+        self.assertEqual(_current_version(), version)
+        self.assertEqual(set(facet_index.search()[0]), {self.guide.pk})
+
+    def test_saves_of_unindexed_fields_are_skipped(self):
+        version = _current_version()
+        self.guide.description = 'Beach walks'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.guide.save(update_fields=['is_available', 'updated_at'])
+        self.assertNotEqual(_current_version(), version)
+
+        version = _current_version()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.guide.save(update_fields=['rating_count', 'updated_at'])
+            Guide.apply_rating_delta(self.guide.pk, 0, 0)
+        # Neither the facet index nor the search index has anything to do.
+        self.assertEqual(callbacks, [])
+        self.assertEqual(_current_version(), version)
+
+    def test_rating_change_updates_only_the_rating(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Guide.apply_rating_delta(self.guide.pk, 1, Decimal('4.00'))
+        self.assertEqual(facet_index.version, _current_version())
+        self.assertEqual(
+            facet_index.guide_rows([self.guide.pk])[self.guide.pk],
+            {'name': 'Asha', 'rate_per_day': Decimal('500.00'), 'rating': Decimal('4.00'), 'is_available': True},
+        )
+        self.assertEqual(facet_index.search(min_rating=Decimal('3.5'))[0], [self.guide.pk])
+
+
+class CalendarTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='alice@example.com', username='alice', password='secret'
+        )
+        self.package = Package.objects.create(
+            name='Goa Beaches', destination='Goa', description='', duration_days=3, price=Decimal('1000.00')
+        )
+        self.guide = Guide.objects.create(guide_id='G1', name='Asha', rate_per_day=Decimal('500.00'))
+        self.travel_date = date.today() + timedelta(days=30)
+
+    def book(self, travel_date=None, **extra):
+        return Booking.objects.create(
+            package=self.package,
+            user=self.user,
+            full_name='Alice Example',
+            email=self.user.email,
+            phone='9000000000',
+            travel_date=travel_date or self.travel_date,
+            total_amount=Decimal('1000.00'),
+            **extra
+        )
+
+    def test_booking_holds_and_releases_guide(self):
+        booking = self.book(guide=self.guide, status='confirmed')
+        occupancy = GuideOccupancy.objects.get(booking=booking)
+        self.assertEqual(
+            (occupancy.guide_id, occupancy.start_date, occupancy.end_date),
+            (self.guide.pk, *interval_for(self.travel_date, 3)),
+        )
+        day = self.travel_date
+        self.assertNotIn(self.guide, free_guides(day + timedelta(days=2), day + timedelta(days=5)))
+        self.assertIn(self.guide, free_guides(day + timedelta(days=3), day + timedelta(days=5)))
+
+        booking.status = 'completed'
+        booking.save()
+        self.assertTrue(GuideOccupancy.objects.filter(booking=booking).exists())
+
+        booking.status = 'cancelled'
+        booking.save()
+        self.assertFalse(GuideOccupancy.objects.filter(booking=booking).exists())
+
+    def test_double_booking_is_refused(self):
+        self.book(guide=self.guide)
+        with self.assertRaises(GuideUnavailable):
+            self.book(self.travel_date + timedelta(days=1), guide=self.guide)
+        self.assertEqual(Booking.objects.count(), 1)
+        self.book(self.travel_date + timedelta(days=3), guide=self.guide)
+        self.assertEqual(GuideOccupancy.objects.count(), 2)
+
+    def test_new_booking_without_guide_skips_calendar(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.book()
+        self.assertFalse([q for q in queries if 'guide_guideoccupancy' in q['sql']])
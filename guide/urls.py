@@ -0,0 +1,9 @@
+from django.conf import settings
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('guides/search/', views.guide_search_async if settings.ASYNC_VIEWS else views.guide_search, name='guide_search'),
+    path('guides/available/', views.available_guides_async if settings.ASYNC_VIEWS else views.available_guides, name='available_guides'),
+    path('guides/suggest/', views.guide_suggestions, name='guide_suggestions'),
+]
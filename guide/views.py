@@ -1,3 +1,259 @@
-from django.shortcuts import render
+from datetime import date
+from decimal import Decimal, InvalidOperation
 
-# Create your views here.
+from asgiref.sync import sync_to_async
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from .calendar import free_guides, interval_for
+from .facets import FACETS, facet_index
+from .matching import MAX_SUGGESTIONS, busy_guides, destination_ids, rank_guides, suggest_for_booking
+from .models import Guide
+
+MAX_PAGE_SIZE = 100
+
+
+def _facet_values(request, facet):
+    """Accept both ?language=French&language=Hindi and ?language=French,Hindi"""
+    values = []
+    for raw in request.GET.getlist(facet):
+        values.extend(v.strip() for v in raw.split(',') if v.strip())
+    return values
+
+
+def _decimal_param(request, name):
+    value = request.GET.get(name)
+    if value in (None, ''):
+        return None
+    value = Decimal(value)
+    if not value.is_finite():
+        raise ValueError(f"{name} must be a finite number.")
+    return value
+
+
+def _search_options(request):
+    """Parse guide search query parameters; returns ``(options, error_response)``."""
+    try:
+        options = {
+            'min_rate': _decimal_param(request, 'min_rate'),
+            'max_rate': _decimal_param(request, 'max_rate'),
+            'min_rating': _decimal_param(request, 'min_rating'),
+            'max_rating': _decimal_param(request, 'max_rating'),
+        }
+        page = max(int(request.GET.get('page', 1)), 1)
+        page_size = min(max(int(request.GET.get('page_size', 20)), 1), MAX_PAGE_SIZE)
+    except (InvalidOperation, ValueError):
+        return None, JsonResponse({'success': False, 'error': 'Invalid numeric filter.'}, status=400)
+
+    match = request.GET.get('match', 'all')
+    if match not in ('all', 'any'):
+        return None, JsonResponse({'success': False, 'error': "match must be 'all' or 'any'."}, status=400)
+
+    options.update(
+        filters={facet: _facet_values(request, facet) for facet in FACETS},
+        match=match,
+        available_only=request.GET.get('available') in ('1', 'true'),
+    )
+    return (options, page, page_size), None
+
+
+def _search_response(guide_pks, page_pks, counts, rows, page, page_size):
+    results = [
+        {
+            'guide_id': rows[pk].guide_id,
+            'name': rows[pk].name,
+            'rate_per_day': str(rows[pk].rate_per_day),
+            'rating': str(rows[pk].rating) if rows[pk].rating is not None else None,
+            'is_available': rows[pk].is_available,
+        }
+        for pk in page_pks if pk in rows
+    ]
+    return JsonResponse({
+        'success': True,
+        'count': len(guide_pks),
+        'page': page,
+        'page_size': page_size,
+        'results': results,
+        'facets': counts,
+    })
+
+
+@require_GET
+def guide_search(request):
+    """Faceted guide search served from the in-memory facet index"""
+    parsed, error = _search_options(request)
+    if error:
+        return error
+    options, page, page_size = parsed
+    guide_pks, counts = facet_index.search(**options)
+
+    start = (page - 1) * page_size
+    page_pks = guide_pks[start:start + page_size]
+    # One primary-key lookup for the visible page only; no through-table joins.
+    rows = Guide.objects.in_bulk(page_pks)
+    return _search_response(guide_pks, page_pks, counts, rows, page, page_size)
+
+
+def _requested_range(request, duration_days=None):
+    """(start, end) from ?travel_date plus a package duration, or from ?start/?end"""
+    if duration_days is not None:
+        return interval_for(date.fromisoformat(request.GET.get('travel_date', '')), duration_days)
+    return date.fromisoformat(request.GET.get('start', '')), date.fromisoformat(request.GET.get('end', ''))
+
+
+def _available_response(start_date, end_date, guides):
+    return JsonResponse({
+        'success': True,
+        'start': start_date.isoformat(),
+        'end': end_date.isoformat(),
+        'results': [
+            {
+                'guide_id': guide['guide_id'],
+                'name': guide['name'],
+                'rate_per_day': str(guide['rate_per_day']),
+                'rating': str(guide['rating']) if guide['rating'] is not None else None,
+            }
+            for guide in guides
+        ],
+    })
+
+
+def _free_guides_page(start_date, end_date):
+    return free_guides(start_date, end_date).values(
+        'guide_id', 'name', 'rate_per_day', 'rating'
+    )[:MAX_PAGE_SIZE]
+
+
+@require_GET
+def available_guides(request):
+    """Guides free for a date range, answered from the occupancy calendar"""
+    from bookings.models import Package
+
+    try:
+        duration_days = None
+        if request.GET.get('package'):
+            duration_days = Package.objects.values_list('duration_days', flat=True).get(
+                package_id=request.GET['package']
+            )
+        start_date, end_date = _requested_range(request, duration_days)
+    except (Package.DoesNotExist, ValidationError):
+        return JsonResponse({'success': False, 'error': 'Package not found.'}, status=404)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Dates must be YYYY-MM-DD.'}, status=400)
+    if end_date <= start_date:
+        return JsonResponse({'success': False, 'error': 'end must be after start.'}, status=400)
+
+    return _available_response(start_date, end_date, _free_guides_page(start_date, end_date))
+
+
+def _suggestion_json(guide, suggestion):
+    return {
+        'guide_id': guide.guide_id,
+        'name': guide.name,
+        'rate_per_day': str(guide.rate_per_day),
+        'rating': str(guide.rating) if guide.rating is not None else None,
+        'score': round(suggestion.score, 4),
+        'components': {name: round(value, 4) for name, value in suggestion.components.items()},
+    }
+
+
+@staff_member_required
+@require_GET
+def guide_suggestions(request):
+    """
+    Ranked guide suggestions for ?booking=<id>, or for ?destination=&start=&end=.
+    Optional: ?language=, ?speciality=, ?budget= (per day), ?limit=.
+    """
+    from bookings.models import Booking
+
+    try:
+        budget = _decimal_param(request, 'budget')
+        limit = min(max(int(request.GET.get('limit', 5)), 1), MAX_SUGGESTIONS)
+    except (InvalidOperation, ValueError):
+        return JsonResponse({'success': False, 'error': 'Invalid budget or limit.'}, status=400)
+    languages = _facet_values(request, 'language') or None
+    specialities = _facet_values(request, 'speciality') or None
+
+    if request.GET.get('booking'):
+        try:
+            booking = Booking.objects.select_related('package').get(pk=request.GET['booking'])
+        except (Booking.DoesNotExist, ValidationError):
+            return JsonResponse({'success': False, 'error': 'Booking not found.'}, status=404)
+        destination = booking.package.destination
+        suggestions = suggest_for_booking(
+            booking, limit=limit, languages=languages, specialities=specialities, budget=budget
+        )
+    else:
+        destination = request.GET.get('destination', '')
+        try:
+            start_date, end_date = _requested_range(request)
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'Dates must be YYYY-MM-DD.'}, status=400)
+        if end_date <= start_date:
+            return JsonResponse({'success': False, 'error': 'end must be after start.'}, status=400)
+        suggestions = rank_guides(
+            destination_ids(destination),
+            languages=languages or (),
+            specialities=specialities or (),
+            busy=busy_guides(start_date, end_date),
+            budget=budget,
+            limit=limit,
+        )
+
+    rows = Guide.objects.in_bulk([suggestion.guide_pk for suggestion in suggestions])
+    labels = facet_index.value_labels('destination')
+    return JsonResponse({
+        'success': True,
+        'destination': destination,
+        'matched_destinations': [labels[pk] for pk in destination_ids(destination) if pk in labels],
+        'results': [
+            _suggestion_json(rows[suggestion.guide_pk], suggestion)
+            for suggestion in suggestions if suggestion.guide_pk in rows
+        ],
+    })
+
+
+# ----------------------------------------------------------------------
+# Native async views, routed instead of the sync ones when ASYNC_VIEWS is
+# enabled (see README, "Running under ASGI").
+# ----------------------------------------------------------------------
+
+@require_GET
+async def guide_search_async(request):
+    """Async twin of ``guide_search``"""
+    parsed, error = _search_options(request)
+    if error:
+        return error
+    options, page, page_size = parsed
+    # The index answers from memory; only a (re)build touches the database.
+    guide_pks, counts = await sync_to_async(facet_index.search)(**options)
+
+    start = (page - 1) * page_size
+    page_pks = guide_pks[start:start + page_size]
+    rows = await Guide.objects.ain_bulk(page_pks)
+    return _search_response(guide_pks, page_pks, counts, rows, page, page_size)
+
+
+@require_GET
+async def available_guides_async(request):
+    """Async twin of ``available_guides``"""
+    from bookings.models import Package
+
+    try:
+        duration_days = None
+        if request.GET.get('package'):
+            duration_days = await Package.objects.values_list('duration_days', flat=True).aget(
+                package_id=request.GET['package']
+            )
+        start_date, end_date = _requested_range(request, duration_days)
+    except (Package.DoesNotExist, ValidationError):
+        return JsonResponse({'success': False, 'error': 'Package not found.'}, status=404)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Dates must be YYYY-MM-DD.'}, status=400)
+    if end_date <= start_date:
+        return JsonResponse({'success': False, 'error': 'end must be after start.'}, status=400)
+
+    guides = [guide async for guide in _free_guides_page(start_date, end_date)]
+    return _available_response(start_date, end_date, guides)
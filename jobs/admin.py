@@ -0,0 +1,19 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'task', 'status', 'attempts', 'max_attempts', 'run_at', 'created_at', 'finished_at']
+    list_filter = ['status', 'task']
+    readonly_fields = ['created_at', 'started_at', 'finished_at', 'locked_until', 'last_error']
+    actions = ['retry_now']
+    
+    @admin.action(description='Queue selected jobs to run again now')
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status='running').update(
+            status='queued', attempts=0, run_at=timezone.now(), finished_at=None, last_error=''
+        )
+        self.message_user(request, f"{updated} jobs queued.")
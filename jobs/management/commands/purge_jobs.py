@@ -0,0 +1,18 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from jobs.models import Job
+
+DEFAULT_RETENTION = 7 * 24 * 60 * 60
+
+
+class Command(BaseCommand):
+    help = "Delete finished jobs (done or failed) older than JOBS_RETENTION."
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'JOBS_RETENTION', DEFAULT_RETENTION))
+        deleted, _ = Job.objects.filter(status__in=['done', 'failed'], finished_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} finished jobs."))
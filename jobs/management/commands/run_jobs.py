@@ -0,0 +1,49 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs.queue import claim, requeue_expired, run
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs until stopped (SIGINT/SIGTERM finish the current job first)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10, help='Jobs claimed per round trip.')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds to wait when nothing is due.')
+        parser.add_argument('--once', action='store_true', help='Exit when no job is due instead of polling.')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, self.stop)
+
+        done = failed = 0
+        while not self.stopping:
+            close_old_connections()
+            requeued = requeue_expired()
+            if requeued:
+                self.stdout.write(self.style.WARNING(f"Requeued {requeued} jobs with expired leases."))
+            jobs = claim(limit=options['batch_size'])
+            if not jobs:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+            for job in jobs:
+                # Jobs claimed but not started yet come back when their lease expires.
+                if self.stopping:
+                    break
+                started = time.perf_counter()
+                ok = run(job)
+                done += ok
+                failed += not ok
+                if options['verbosity'] >= 2 or not ok:
+                    outcome = 'done' if ok else f'failed (attempt {job.attempts}/{job.max_attempts})'
+                    self.stdout.write(f"{job.task} #{job.pk} {outcome} in {time.perf_counter() - started:.3f}s")
+        self.stdout.write(self.style.SUCCESS(f"Worker stopped: {done} jobs done, {failed} failed attempts."))
+
+    def stop(self, signum, frame):
+        self.stopping = True
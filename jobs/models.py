@@ -0,0 +1,37 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """A call to ``task(**kwargs)`` waiting for, or done by, a ``run_jobs`` worker"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
+    task = models.CharField(max_length=200, help_text="Dotted path of the function to call")
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now, help_text="Not picked up before this time")
+    locked_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="A running job whose worker has not finished by then is queued again"
+    )
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            # Workers claim the oldest due job of a status.
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
@@ -0,0 +1,175 @@
+"""
+A small job queue stored in the ``Job`` table.
+
+``enqueue`` inserts the job row in the caller's transaction, so a job is
+visible to workers exactly when the booking (or whatever triggered it)
+commits, and disappears with it on rollback. Request handlers therefore
+only pay for one INSERT; the work itself runs in ``manage.py run_jobs``.
+
+Workers claim due jobs with ``SELECT ... FOR UPDATE SKIP LOCKED`` (where the
+database supports it) and hold a lease on them. A failing job is retried
+with exponential backoff until ``max_attempts``, then marked failed; a job
+whose worker died is queued again when its lease runs out.
+
+With ``JOBS_EAGER = True`` (development without a worker) jobs still get
+their row but are also run in-process once the transaction commits.
+"""
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BACKOFF_BASE = 10
+DEFAULT_BACKOFF_MAX = 60 * 60
+DEFAULT_LEASE = 5 * 60
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def task_path(task):
+    """Dotted path for a function or an already dotted string."""
+    if isinstance(task, str):
+        return task
+    return f'{task.__module__}.{task.__qualname__}'
+
+
+def _job(task, kwargs, delay=None, max_attempts=None):
+    return Job(
+        task=task_path(task),
+        kwargs=kwargs,
+        run_at=timezone.now() + timedelta(seconds=delay or 0),
+        max_attempts=max_attempts or _setting('JOBS_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS),
+    )
+
+
+def enqueue(task, delay=None, max_attempts=None, **kwargs):
+    """
+    Queue ``task(**kwargs)``. ``task`` is a function or its dotted path and
+    ``kwargs`` must be JSON-serialisable. Returns the ``Job``.
+    """
+    job = _job(task, kwargs, delay, max_attempts)
+    job.save()
+    if _setting('JOBS_EAGER', False):
+        transaction.on_commit(lambda: run_claimed(claim(pks=[job.pk])))
+    return job
+
+
+def enqueue_many(task, kwargs_list, delay=None, max_attempts=None):
+    """Queue one job per kwargs dict with a single ``bulk_create``."""
+    jobs = Job.objects.bulk_create([_job(task, kwargs, delay, max_attempts) for kwargs in kwargs_list])
+    if _setting('JOBS_EAGER', False):
+        tasks = task_path(task)
+        transaction.on_commit(lambda: run_claimed(claim(limit=len(jobs), task=tasks)))
+    return jobs
+
+
+def backoff(attempt):
+    """Seconds to wait before retry number ``attempt`` (1-based), with +/-20% jitter."""
+    base = _setting('JOBS_BACKOFF_BASE', DEFAULT_BACKOFF_BASE)
+    delay = min(base * 2 ** (attempt - 1), _setting('JOBS_BACKOFF_MAX', DEFAULT_BACKOFF_MAX))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def requeue_expired():
+    """Queue again the running jobs whose worker let the lease run out; returns how many."""
+    return Job.objects.filter(status='running', locked_until__lt=timezone.now()).update(
+        status='queued', locked_until=None
+    )
+
+
+def claim(limit=10, pks=None, task=None):
+    """Mark up to ``limit`` due jobs as running and return them, oldest first."""
+    now = timezone.now()
+    due = Job.objects.filter(status='queued', run_at__lte=now)
+    if pks is not None:
+        due = due.filter(pk__in=pks)
+    if task is not None:
+        due = due.filter(task=task)
+    with transaction.atomic():
+        jobs = list(due.select_for_update(skip_locked=True).order_by('run_at', 'pk')[:limit])
+        if not jobs:
+            return []
+        lease = now + timedelta(seconds=_setting('JOBS_LEASE_SECONDS', DEFAULT_LEASE))
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status='running', attempts=F('attempts') + 1, started_at=now, locked_until=lease
+        )
+    for job in jobs:
+        job.status, job.attempts, job.started_at, job.locked_until = 'running', job.attempts + 1, now, lease
+    return jobs
+
+
+def run(job):
+    """Run one claimed job and record the outcome; returns True on success."""
+    try:
+        import_string(job.task)(**job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        now = timezone.now()
+        if job.attempts >= job.max_attempts:
+            Job.objects.filter(pk=job.pk).update(
+                status='failed', finished_at=now, locked_until=None, last_error=error
+            )
+        else:
+            Job.objects.filter(pk=job.pk).update(
+                status='queued',
+                run_at=now + timedelta(seconds=backoff(job.attempts)),
+                locked_until=None,
+                last_error=error,
+            )
+        return False
+    Job.objects.filter(pk=job.pk).update(status='done', finished_at=timezone.now(), locked_until=None)
+    return True
+
+
+def run_claimed(jobs):
+    return sum(run(job) for job in jobs)
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return round(sorted_values[index], 3)
+
+
+def metrics(window=timedelta(hours=1), sample=1000):
+    """
+    Queue depth per status, the age of the oldest due job, and wait (due to
+    started) and run (started to finished) seconds for jobs finished within
+    ``window``.
+    """
+    now = timezone.now()
+    depth = {status: 0 for status, _ in Job.STATUS_CHOICES}
+    depth.update(
+        (row['status'], row['count'])
+        for row in Job.objects.order_by().values('status').annotate(count=Count('pk'))
+    )
+    oldest_due = (
+        Job.objects.filter(status='queued', run_at__lte=now).order_by('run_at').values_list('run_at', flat=True).first()
+    )
+    finished = list(
+        Job.objects.filter(status='done', finished_at__gte=now - window)
+        .order_by('-finished_at')
+        .values_list('run_at', 'started_at', 'finished_at')[:sample]
+    )
+    waits = sorted(max((started - run_at).total_seconds(), 0) for run_at, started, _ in finished)
+    runs = sorted((done - started).total_seconds() for _, started, done in finished)
+    return {
+        'depth': depth,
+        'due': Job.objects.filter(status='queued', run_at__lte=now).count(),
+        'oldest_due_age_s': round((now - oldest_due).total_seconds(), 3) if oldest_due else None,
+        'finished_last_window': len(finished),
+        'window_s': int(window.total_seconds()),
+        'wait_s': {'p50': _percentile(waits, 50), 'p95': _percentile(waits, 95), 'max': _percentile(waits, 100)},
+        'run_s': {'p50': _percentile(runs, 50), 'p95': _percentile(runs, 95), 'max': _percentile(runs, 100)},
+    }
@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('jobs/metrics/', views.queue_metrics, name='job_queue_metrics'),
+]
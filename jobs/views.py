@@ -0,0 +1,10 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from .queue import metrics
+
+
+@staff_member_required
+def queue_metrics(request):
+    """Job queue depth and wait/run latency over the last hour"""
+    return JsonResponse({'success': True, 'queue': metrics()})
@@ -0,0 +1,270 @@
+"""
+Full-text search backends.
+
+``get_backend()`` returns the backend named by ``settings.SEARCH_BACKEND``:
+
+``search.backends.InvertedIndexBackend`` (default)
+    A per-process in-memory inverted index ranked with BM25; works on any
+    database. As with the guide facet index, a version counter in the Django
+    cache is bumped on every change so other worker processes rebuild on
+    their next query, while the process that saw the change applies it
+    incrementally.
+``search.backends.MySQLFullTextBackend``
+    ``MATCH ... AGAINST`` over the FULLTEXT indexes created by this app's
+    migration. MySQL keeps those indexes current itself.
+
+Backends answer ``search(doc_type, query, offset, limit)`` with
+``(total, [(pk, score), ...])``, best match first.
+"""
+import heapq
+import math
+import re
+import threading
+import unicodedata
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .documents import DOCUMENT_TYPES, get_queryset, is_searchable
+
+DEFAULT_BACKEND = 'search.backends.InvertedIndexBackend'
+VERSION_KEY = 'search:index:version'
+
+STOPWORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in',
+    'is', 'it', 'of', 'on', 'or', 'the', 'to', 'with',
+))
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def _stem(token):
+    """Fold common English plurals so that 'beaches' finds 'beach'."""
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if len(token) > 4 and token.endswith(('ches', 'shes', 'sses', 'xes')):
+        return token[:-2]
+    if len(token) > 3 and token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    """Lower-cased, accent-folded, stemmed word tokens without stopwords."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return [
+        _stem(token) for token in _TOKEN_RE.findall(text)
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def _current_version():
+    cache.add(VERSION_KEY, 0, None)
+    return cache.get(VERSION_KEY, 0)
+
+
+def _bump_version():
+    cache.add(VERSION_KEY, 0, None)
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        # Key evicted between add() and incr(); start a new generation.
+        cache.set(VERSION_KEY, 1, None)
+        return 1
+
+
+class BaseSearchBackend:
+    def search(self, doc_type, query, offset=0, limit=20):
+        raise NotImplementedError
+
+    def update(self, doc_type, instance):
+        """Called after ``instance`` was saved and committed."""
+
+    def remove(self, doc_type, pk):
+        """Called after a document was deleted and committed."""
+
+    def rebuild(self):
+        """Re-index everything, e.g. after bulk writes that skipped signals."""
+
+
+class _Index:
+    """Postings for one document type: term -> {pk: weighted term frequency}."""
+
+    def __init__(self):
+        self.postings = {}
+        self.doc_terms = {}
+        self.doc_lengths = {}
+        self.total_length = 0.0
+
+    def add(self, pk, term_weights):
+        self.remove(pk)
+        for term, weight in term_weights.items():
+            self.postings.setdefault(term, {})[pk] = weight
+        self.doc_terms[pk] = tuple(term_weights)
+        length = sum(term_weights.values())
+        self.doc_lengths[pk] = length
+        self.total_length += length
+
+    def remove(self, pk):
+        terms = self.doc_terms.pop(pk, None)
+        if terms is None:
+            return
+        for term in terms:
+            docs = self.postings.get(term)
+            if docs is not None:
+                docs.pop(pk, None)
+                if not docs:
+                    del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(pk)
+
+    def score(self, terms, k1, b):
+        """BM25 score of every document containing at least one of ``terms``."""
+        count = len(self.doc_lengths)
+        if not count:
+            return {}
+        average_length = self.total_length / count or 1.0
+        scores = {}
+        for term in set(terms):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for pk, frequency in docs.items():
+                norm = frequency + k1 * (1 - b + b * self.doc_lengths[pk] / average_length)
+                scores[pk] = scores.get(pk, 0.0) + idf * frequency * (k1 + 1) / norm
+        return scores
+
+
+class InvertedIndexBackend(BaseSearchBackend):
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._built = False
+        self.version = None
+        self.indexes = {doc_type: _Index() for doc_type in DOCUMENT_TYPES}
+
+    @staticmethod
+    def term_weights(doc_type, values):
+        """Weighted term frequencies of one document's indexed fields."""
+        weights = {}
+        for field, field_weight in DOCUMENT_TYPES[doc_type]['fields'].items():
+            for token in tokenize(values[field]):
+                weights[token] = weights.get(token, 0.0) + field_weight
+        return weights
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+    def build(self):
+        """Index every searchable row; only the final swap holds the lock."""
+        version = _current_version()
+        indexes = {}
+        for doc_type, spec in DOCUMENT_TYPES.items():
+            index = _Index()
+            rows = get_queryset(doc_type).values('pk', *spec['fields'])
+            for row in rows.iterator(chunk_size=2000):
+                index.add(row['pk'], self.term_weights(doc_type, row))
+            indexes[doc_type] = index
+
+        with self._lock:
+            self.indexes = indexes
+            self.version = version
+            self._built = True
+
+    def ensure_fresh(self):
+        if self.version is not None and self.version == _current_version():
+            return
+        if self._build_lock.acquire(blocking=False):
+            try:
+                self.build()
+            finally:
+                self._build_lock.release()
+        elif not self._built:
+            self.build()
+
+    def rebuild(self):
+        """Force every process to rebuild on its next query."""
+        with self._lock:
+            _bump_version()
+            self.version = None
+
+    # ------------------------------------------------------------------
+    # Incremental maintenance (called from search.signals)
+    # ------------------------------------------------------------------
+    def _apply(self, mutate):
+        """Run ``mutate`` if this process was current before the change, else go stale."""
+        with self._lock:
+            previous = self.version
+            new_version = _bump_version()
+            if previous is not None and new_version == previous + 1:
+                mutate()
+                self.version = new_version
+            else:
+                self.version = None
+
+    def update(self, doc_type, instance):
+        if not is_searchable(doc_type, instance):
+            self.remove(doc_type, instance.pk)
+            return
+        values = {field: getattr(instance, field) for field in DOCUMENT_TYPES[doc_type]['fields']}
+
+        def mutate():
+            self.indexes[doc_type].add(instance.pk, self.term_weights(doc_type, values))
+        self._apply(mutate)
+
+    def remove(self, doc_type, pk):
+        def mutate():
+            self.indexes[doc_type].remove(pk)
+        self._apply(mutate)
+
+    # ------------------------------------------------------------------
+    # Querying
+    # ------------------------------------------------------------------
+    def search(self, doc_type, query, offset=0, limit=20):
+        terms = tokenize(query)
+        if not terms:
+            return 0, []
+        self.ensure_fresh()
+        with self._lock:
+            scores = self.indexes[doc_type].score(terms, self.k1, self.b)
+        ranked = heapq.nsmallest(
+            offset + limit, scores.items(), key=lambda item: (-item[1], str(item[0]))
+        )
+        return len(scores), ranked[offset:]
+
+
+class MySQLFullTextBackend(BaseSearchBackend):
+    def search(self, doc_type, query, offset=0, limit=20):
+        if not query.strip():
+            return 0, []
+        queryset = get_queryset(doc_type)
+        quote_name = connections[queryset.db].ops.quote_name
+        columns = ', '.join(
+            quote_name(queryset.model._meta.get_field(field).column)
+            for field in DOCUMENT_TYPES[doc_type]['fields']
+        )
+        matches = queryset.annotate(
+            score=RawSQL(f'MATCH ({columns}) AGAINST (%s IN NATURAL LANGUAGE MODE)', (query,))
+        ).filter(score__gt=0)
+        total = matches.count()
+        rows = matches.order_by('-score', 'pk').values_list('pk', 'score')[offset:offset + limit]
+        return total, [(pk, float(score)) for pk, score in rows]
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = import_string(getattr(settings, 'SEARCH_BACKEND', DEFAULT_BACKEND))()
+        return _backend
@@ -0,0 +1,51 @@
+"""
+What is searchable.
+
+Each document type names a model, the text fields that are indexed (with a
+weight used by the inverted index backend; MySQL FULLTEXT ranks all columns
+of its index alike) and the rows that should appear in results.
+"""
+from django.apps import apps
+
+DOCUMENT_TYPES = {
+    'package': {
+        'model': 'bookings.Package',
+        'fields': {'name': 3.0, 'destination': 2.0, 'description': 1.0},
+        'filter': {'is_active': True},
+    },
+    'guide': {
+        'model': 'guide.Guide',
+        'fields': {'name': 3.0, 'description': 1.0},
+        'filter': {},
+    },
+}
+
+
+def get_model(doc_type):
+    return apps.get_model(DOCUMENT_TYPES[doc_type]['model'])
+
+
+def get_queryset(doc_type):
+    """Rows of ``doc_type`` that may appear in search results."""
+    return get_model(doc_type).objects.filter(**DOCUMENT_TYPES[doc_type]['filter'])
+
+
+def doc_type_for(model):
+    label = model._meta.label
+    for doc_type, spec in DOCUMENT_TYPES.items():
+        if spec['model'] == label:
+            return doc_type
+    return None
+
+
+def indexed_fields(doc_type):
+    """Model fields whose change can alter ``doc_type``'s document or whether it is listed."""
+    spec = DOCUMENT_TYPES[doc_type]
+    return set(spec['fields']) | set(spec['filter'])
+
+
+def is_searchable(doc_type, instance):
+    return all(
+        getattr(instance, name) == value
+        for name, value in DOCUMENT_TYPES[doc_type]['filter'].items()
+    )
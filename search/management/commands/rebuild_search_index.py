@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from search.backends import InvertedIndexBackend, get_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index, e.g. after bulk imports that skipped save signals."
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        started = time.perf_counter()
+        # Tell every running process to rebuild its copy on its next query.
+        backend.rebuild()
+        if isinstance(backend, InvertedIndexBackend):
+            backend.build()
+            sizes = ', '.join(
+                f"{len(index.doc_lengths)} {doc_type}s / {len(index.postings)} terms"
+                for doc_type, index in backend.indexes.items()
+            )
+            self.stdout.write(f"Indexed {sizes} in {time.perf_counter() - started:.2f}s.")
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt ({type(backend).__name__})."))
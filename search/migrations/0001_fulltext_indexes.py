@@ -0,0 +1,50 @@
+from django.db import migrations
+
+# (index name, model, indexed fields); must match search.documents.
+FULLTEXT_INDEXES = [
+    (
+        "search_package_fulltext",
+        "bookings.Package",
+        ["name", "destination", "description"],
+    ),
+    ("search_guide_fulltext", "guide.Guide", ["name", "description"]),
+]
+
+
+def create_fulltext_indexes(apps, schema_editor):
+    """FULLTEXT indexes used by MySQLFullTextBackend; other databases skip this."""
+    if schema_editor.connection.vendor != "mysql":
+        return
+    quote_name = schema_editor.quote_name
+    for name, label, fields in FULLTEXT_INDEXES:
+        model = apps.get_model(label)
+        columns = ", ".join(
+            quote_name(model._meta.get_field(field).column) for field in fields
+        )
+        schema_editor.execute(
+            f"CREATE FULLTEXT INDEX {quote_name(name)} "
+            f"ON {quote_name(model._meta.db_table)} ({columns})"
+        )
+
+
+def drop_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    quote_name = schema_editor.quote_name
+    for name, label, fields in FULLTEXT_INDEXES:
+        model = apps.get_model(label)
+        schema_editor.execute(
+            f"DROP INDEX {quote_name(name)} ON {quote_name(model._meta.db_table)}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0004_booking_search_indexes"),
+        ("guide", "0003_guide_occupancy"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_indexes, drop_fulltext_indexes),
+    ]
@@ -0,0 +1,26 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .backends import get_backend
+from .documents import DOCUMENT_TYPES, doc_type_for, get_model, indexed_fields
+
+
+def document_saved(sender, instance, update_fields=None, **kwargs):
+    doc_type = doc_type_for(sender)
+    if update_fields is not None and not indexed_fields(doc_type) & set(update_fields):
+        # e.g. Guide.apply_rating_delta: nothing searchable changed.
+        return
+    # Index after commit so a rolled-back save never becomes searchable.
+    transaction.on_commit(partial(get_backend().update, doc_type, instance))
+
+
+def document_deleted(sender, instance, **kwargs):
+    transaction.on_commit(partial(get_backend().remove, doc_type_for(sender), instance.pk))
+
+
+for doc_type in DOCUMENT_TYPES:
+    model = get_model(doc_type)
+    post_save.connect(document_saved, sender=model)
+    post_delete.connect(document_deleted, sender=model)
@@ -0,0 +1,70 @@
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from .backends import get_backend
+from .documents import DOCUMENT_TYPES, get_queryset
+
+MAX_PAGE_SIZE = 100
+MAX_QUERY_LENGTH = 200
+
+
+def _package_json(package):
+    return {
+        'package_id': str(package.package_id),
+        'name': package.name,
+        'destination': package.destination,
+        'duration_days': package.duration_days,
+        'price': str(package.price),
+    }
+
+
+def _guide_json(guide):
+    return {
+        'guide_id': guide.guide_id,
+        'name': guide.name,
+        'rate_per_day': str(guide.rate_per_day),
+        'rating': str(guide.rating) if guide.rating is not None else None,
+        'is_available': guide.is_available,
+    }
+
+
+SERIALIZERS = {
+    'package': _package_json,
+    'guide': _guide_json,
+}
+
+
+@require_GET
+def search(request):
+    """Ranked full-text search over packages (?type=package) or guides (?type=guide)"""
+    query = request.GET.get('q', '').strip()
+    doc_type = request.GET.get('type', 'package')
+    if doc_type not in DOCUMENT_TYPES:
+        return JsonResponse({'success': False, 'error': f"type must be one of {', '.join(DOCUMENT_TYPES)}."}, status=400)
+    if not query:
+        return JsonResponse({'success': False, 'error': 'Query parameter q is required.'}, status=400)
+    if len(query) > MAX_QUERY_LENGTH:
+        return JsonResponse({'success': False, 'error': 'Query is too long.'}, status=400)
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+        page_size = min(max(int(request.GET.get('page_size', 20)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid page or page_size.'}, status=400)
+
+    total, ranked = get_backend().search(doc_type, query, offset=(page - 1) * page_size, limit=page_size)
+    # One primary-key lookup for the visible page; rows removed since
+    # indexing (or no longer searchable) are skipped.
+    rows = get_queryset(doc_type).in_bulk([pk for pk, _ in ranked])
+    serialize = SERIALIZERS[doc_type]
+    return JsonResponse({
+        'success': True,
+        'query': query,
+        'type': doc_type,
+        'count': total,
+        'page': page,
+        'page_size': page_size,
+        'results': [
+            {**serialize(rows[pk]), 'score': round(score, 4)}
+            for pk, score in ranked if pk in rows
+        ],
+    })
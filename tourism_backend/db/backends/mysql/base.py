@@ -0,0 +1,14 @@
+"""MySQL backend whose connections come from ``tourism_backend.db.pool``."""
+from django.db.backends.mysql import base
+
+from tourism_backend.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    def ping_connection(self, raw):
+        # Never let the driver silently reconnect: a dead connection must be
+        # replaced (and counted) by the pool.
+        try:
+            raw.ping(False)
+        except TypeError:
+            raw.ping()
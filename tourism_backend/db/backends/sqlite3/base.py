@@ -0,0 +1,11 @@
+"""
+SQLite backend with pooled connections, a local stand-in for the pooled
+MySQL backend so the pool can be exercised without a MySQL server.
+"""
+from django.db.backends.sqlite3 import base
+
+from tourism_backend.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    pass
@@ -0,0 +1,247 @@
+"""
+Process-wide pool of raw DB-API connections for Django database backends.
+
+Django opens a fresh connection per request when ``CONN_MAX_AGE = 0``; on
+MySQL that is a TCP + auth handshake plus the ``init_command`` round trip
+every time. The pooled backends in ``tourism_backend.db.backends`` hand
+Django a connection from this pool in ``get_new_connection()`` and give it
+back in ``_close()``, so the handshake only happens when the pool grows, a
+connection reaches ``MAX_LIFETIME`` or fails its health check.
+
+Configured per database with a ``POOL`` dict in ``DATABASES``::
+
+    'POOL': {
+        'MAX_SIZE': 10,          # open connections (idle + in use)
+        'MAX_LIFETIME': 1800,    # seconds before a connection is recycled
+        'TIMEOUT': 10,           # seconds to wait for a free connection
+        'HEALTH_CHECK_IDLE': 5,  # ping connections idle longer than this
+    }
+"""
+import threading
+import time
+
+DEFAULTS = {
+    'MAX_SIZE': 10,
+    'MAX_LIFETIME': 1800,
+    'TIMEOUT': 10,
+    'HEALTH_CHECK_IDLE': 5,
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    """No connection became free within the pool's TIMEOUT."""
+
+
+class _Entry:
+    __slots__ = ('connection', 'created_at', 'released_at')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.released_at = self.created_at
+
+
+class ConnectionPool:
+    def __init__(self, alias, max_size, max_lifetime, timeout, health_check_idle):
+        self.alias = alias
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.health_check_idle = health_check_idle
+        self._idle = []
+        self._in_use = {}
+        self._size = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            'acquired': 0,
+            'created': 0,
+            'reused': 0,
+            'reconnects': 0,
+            'recycled': 0,
+            'discarded': 0,
+            'timeouts': 0,
+            'wait_seconds_total': 0.0,
+            'wait_seconds_max': 0.0,
+        }
+
+    def _discard(self, entry, close):
+        self._size -= 1
+        self._cond.notify()
+        try:
+            close(entry.connection)
+        except Exception:
+            pass
+
+    def acquire(self, connect, ping, close):
+        """
+        Return a healthy raw connection. ``connect()`` opens a new one,
+        ``ping(conn)`` raises if it is dead, ``close(conn)`` closes it.
+        """
+        started = time.monotonic()
+        deadline = started + self.timeout
+        while True:
+            with self._cond:
+                entry = None
+                while entry is None:
+                    if self._idle:
+                        entry = self._idle.pop()
+                    elif self._size < self.max_size:
+                        self._size += 1
+                        break
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._stats['timeouts'] += 1
+                            raise PoolTimeout(
+                                f"No connection available in pool '{self.alias}' "
+                                f"after {self.timeout}s (max size {self.max_size})."
+                            )
+                        self._cond.wait(remaining)
+                self._record_wait(time.monotonic() - started)
+
+            if entry is None:
+                # A slot was reserved above; open the connection outside the lock.
+                try:
+                    entry = _Entry(connect())
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats['created'] += 1
+                    self._checkout(entry)
+                return entry.connection
+
+            now = time.monotonic()
+            if now - entry.created_at > self.max_lifetime:
+                with self._cond:
+                    self._stats['recycled'] += 1
+                    self._discard(entry, close)
+                continue
+            if now - entry.released_at > self.health_check_idle:
+                try:
+                    ping(entry.connection)
+                except Exception:
+                    with self._cond:
+                        self._stats['reconnects'] += 1
+                        self._discard(entry, close)
+                    continue
+            with self._cond:
+                self._stats['reused'] += 1
+                self._checkout(entry)
+            return entry.connection
+
+    def _checkout(self, entry):
+        self._stats['acquired'] += 1
+        self._in_use[id(entry.connection)] = entry
+
+    def _record_wait(self, waited):
+        self._stats['wait_seconds_total'] += waited
+        self._stats['wait_seconds_max'] = max(self._stats['wait_seconds_max'], waited)
+
+    def release(self, connection, reset, close):
+        """Give ``connection`` back; ``reset(conn)`` must leave it clean or raise."""
+        with self._cond:
+            entry = self._in_use.pop(id(connection), None)
+        if entry is None:
+            close(connection)
+            return
+        try:
+            reset(connection)
+        except Exception:
+            with self._cond:
+                self._stats['discarded'] += 1
+                self._discard(entry, close)
+            return
+        entry.released_at = time.monotonic()
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def close_all(self, close):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            for entry in idle:
+                self._discard(entry, close)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update(
+                alias=self.alias,
+                max_size=self.max_size,
+                size=self._size,
+                idle=len(self._idle),
+                in_use=len(self._in_use),
+            )
+        acquired = stats['acquired']
+        stats['wait_seconds_avg'] = stats['wait_seconds_total'] / acquired if acquired else 0.0
+        return stats
+
+
+def get_pool(alias, settings_dict):
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None:
+            options = {**DEFAULTS, **settings_dict.get('POOL', {})}
+            pool = ConnectionPool(
+                alias,
+                max_size=int(options['MAX_SIZE']),
+                max_lifetime=float(options['MAX_LIFETIME']),
+                timeout=float(options['TIMEOUT']),
+                health_check_idle=float(options['HEALTH_CHECK_IDLE']),
+            )
+            _pools[alias] = pool
+        return pool
+
+
+def pool_stats():
+    """Stats for every pool opened in this process, keyed by database alias."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.alias: pool.stats() for pool in pools}
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Mix into a Django ``DatabaseWrapper`` to take connections from the pool.
+    Backends may override ``ping_connection(raw)`` with a cheaper driver call.
+    """
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict)
+
+    def get_new_connection(self, conn_params):
+        parent = super()
+        return self.pool.acquire(
+            connect=lambda: parent.get_new_connection(conn_params),
+            ping=self.ping_connection,
+            close=self._close_raw,
+        )
+
+    def ping_connection(self, raw):
+        """Raise if ``raw`` is dead; ``SELECT 1`` works on any DB-API connection."""
+        cursor = raw.cursor()
+        try:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _reset_raw(raw):
+        raw.rollback()
+
+    @staticmethod
+    def _close_raw(raw):
+        raw.close()
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.release(self.connection, reset=self._reset_raw, close=self._close_raw)
@@ -0,0 +1,196 @@
+"""
+Per-request query count and latency instrumentation.
+
+``QueryInstrumentationMiddleware`` times every request and, through a
+database execute wrapper, every SQL statement it runs. Each request is
+written as one JSON line to the ``tourism.requests`` logger and folded into
+an in-process per-view summary that staff can read at ``/metrics/requests/``.
+
+The collector for the current request lives in a context variable, so
+queries issued from ``sync_to_async`` threads by the async views are
+attributed to the right request as well.
+
+Settings:
+
+``QUERY_BUDGETS``
+    ``{'view_name': max_queries}``; ``'*'`` is the default for other views.
+``QUERY_BUDGET_ACTION``
+    ``'log'`` (default) logs a warning when a budget is exceeded, ``'raise'``
+    raises ``QueryBudgetExceeded`` (useful in development and tests).
+"""
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger('tourism.requests')
+
+_current = ContextVar('request_query_stats', default=None)
+
+# Duplicate statements reported per request.
+MAX_DUPLICATES_REPORTED = 5
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time')
+
+    def __init__(self):
+        self.queries = Counter()
+        self.db_time = 0.0
+
+    @property
+    def query_count(self):
+        return sum(self.queries.values())
+
+    def duplicates(self):
+        return [
+            {'sql': sql, 'count': count}
+            for sql, count in self.queries.most_common(MAX_DUPLICATES_REPORTED)
+            if count > 1
+        ]
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_time += time.perf_counter() - started
+        # ``sql`` still has its placeholders, so identical shapes group together.
+        stats.queries[sql] += 1
+
+
+def install_query_recorder(sender=None, connection=None, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class ViewMetrics:
+    """Running per-view totals for this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def add(self, view, status_code, latency, stats, over_budget):
+        with self._lock:
+            entry = self._views.setdefault(view, {
+                'requests': 0,
+                'errors': 0,
+                'latency_total': 0.0,
+                'latency_max': 0.0,
+                'queries_total': 0,
+                'queries_max': 0,
+                'db_time_total': 0.0,
+                'with_duplicates': 0,
+                'over_budget': 0,
+            })
+            entry['requests'] += 1
+            entry['errors'] += status_code >= 500
+            entry['latency_total'] += latency
+            entry['latency_max'] = max(entry['latency_max'], latency)
+            entry['queries_total'] += stats.query_count
+            entry['queries_max'] = max(entry['queries_max'], stats.query_count)
+            entry['db_time_total'] += stats.db_time
+            entry['with_duplicates'] += bool(stats.duplicates())
+            entry['over_budget'] += over_budget
+
+    def summary(self):
+        with self._lock:
+            views = {view: dict(entry) for view, entry in self._views.items()}
+        for entry in views.values():
+            count = entry['requests']
+            entry['latency_avg_ms'] = round(entry.pop('latency_total') / count * 1000, 2)
+            entry['latency_max_ms'] = round(entry.pop('latency_max') * 1000, 2)
+            entry['queries_avg'] = round(entry.pop('queries_total') / count, 2)
+            entry['db_time_avg_ms'] = round(entry.pop('db_time_total') / count * 1000, 2)
+        return views
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+view_metrics = ViewMetrics()
+
+
+def query_budget(view):
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    return budgets.get(view, budgets.get('*'))
+
+
+class QueryInstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        connection_created.connect(install_query_recorder)
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection=connection)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, stats, time.perf_counter() - started)
+        return response
+
+    def finish(self, request, response, stats, latency):
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name or match._func_path) if match else 'unresolved'
+        budget = query_budget(view)
+        over_budget = budget is not None and stats.query_count > budget
+        duplicates = stats.duplicates()
+
+        view_metrics.add(view, response.status_code, latency, stats, over_budget)
+        logger.info(json.dumps({
+            'view': view,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'latency_ms': round(latency * 1000, 2),
+            'queries': stats.query_count,
+            'db_time_ms': round(stats.db_time * 1000, 2),
+            'duplicate_queries': duplicates,
+        }))
+
+        if over_budget:
+            message = f"{view} ran {stats.query_count} queries (budget {budget})."
+            if getattr(settings, 'QUERY_BUDGET_ACTION', 'log') == 'raise':
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
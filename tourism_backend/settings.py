@@ -46,11 +46,14 @@ INSTALLED_APPS = [
     "users",
     "bookings.apps.BookingsConfig",
     'guide.apps.GuideConfig',
+    'search.apps.SearchConfig',
+    'jobs.apps.JobsConfig',
     'crispy_forms',
     'crispy_bootstrap5',
 ]
 
 MIDDLEWARE = [
+    "tourism_backend.middleware.QueryInstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -62,6 +65,43 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "tourism_backend.urls"
 
+# Per-view SQL query budgets checked by QueryInstrumentationMiddleware.
+# '*' applies to views without their own entry; 'raise' turns overruns into
+# errors instead of warnings (handy while developing).
+QUERY_BUDGETS = {
+    '*': 50,
+    'book': 10,
+    # Session and user, package, two pricing rule tables (cold cache),
+    # Idempotency-Key claim and store, booking, job, new rollup row, and
+    # their transaction and savepoint statements.
+    'create_booking': 18,
+    'create_booking_batch': 10,
+    'my_bookings_api': 5,
+}
+QUERY_BUDGET_ACTION = os.getenv('QUERY_BUDGET_ACTION', 'log')
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "plain": {"format": "%(asctime)s %(levelname)s %(name)s %(message)s"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "plain"},
+    },
+    "loggers": {
+        "tourism.requests": {
+            "handlers": ["console"],
+            "level": os.getenv('REQUEST_LOG_LEVEL', 'INFO'),
+            "propagate": False,
+        },
+        "tourism": {
+            "handlers": ["console"],
+            "level": "INFO",
+        },
+    },
+}
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -78,6 +118,72 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "tourism_backend.wsgi.application"
+ASGI_APPLICATION = "tourism_backend.asgi.application"
+
+# Route the booking, catalogue and search URLs to their native async views.
+# Turn on when serving through ASGI (see README, "Running under ASGI").
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False') == 'True'
+
+# How long (seconds) a booking POST's Idempotency-Key is remembered for replays.
+IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+
+# The guide facet index, the package catalogue and the pricing rules are kept
+# per process and announce changes through version counters in this cache, so
+# every worker process must share it. The default in-process memory cache only
+# suits a single process (runserver); for gunicorn/uvicorn with several
+# workers point it at Redis or Memcached, e.g.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# CACHE_LOCATION=redis://127.0.0.1:6379/1
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Full-text search backend: the in-memory inverted index works everywhere;
+# on MySQL, 'search.backends.MySQLFullTextBackend' uses FULLTEXT indexes.
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'search.backends.InvertedIndexBackend')
+
+# Admin changelists above this many rows show the planner's estimated count
+# instead of running an exact COUNT(*) on every page.
+ADMIN_COUNT_ESTIMATE_THRESHOLD = int(os.getenv('ADMIN_COUNT_ESTIMATE_THRESHOLD', 10000))
+
+# Completed and cancelled bookings whose travel date is more than this many
+# days ago are moved to the archive table by `manage.py archive_bookings`.
+BOOKING_ARCHIVE_AFTER_DAYS = int(os.getenv('BOOKING_ARCHIVE_AFTER_DAYS', 365))
+
+# Largest party the booking and quote endpoints accept in one booking.
+BOOKING_MAX_PEOPLE = int(os.getenv('BOOKING_MAX_PEOPLE', 50))
+
+# Seconds a version of the active package list (bookings/cache.py) stays in
+# the shared cache; a package change replaces it sooner.
+CATALOGUE_CACHE_TIMEOUT = int(os.getenv('CATALOGUE_CACHE_TIMEOUT', 60 * 60))
+
+# Catalogue API (bookings/catalogue_api.py): how long clients may reuse a
+# response before revalidating it with its ETag, and how long an encoded
+# response body is kept in the cache.
+CATALOGUE_API_MAX_AGE = int(os.getenv('CATALOGUE_API_MAX_AGE', 0))
+CATALOGUE_API_BODY_CACHE_TIMEOUT = int(os.getenv('CATALOGUE_API_BODY_CACHE_TIMEOUT', 10 * 60))
+
+# Background jobs (see jobs/queue.py). Failed jobs are retried after
+# JOBS_BACKOFF_BASE * 2^(attempt - 1) seconds, capped at JOBS_BACKOFF_MAX.
+# JOBS_EAGER runs jobs in-process after commit, for development without a worker.
+JOBS_EAGER = os.getenv('JOBS_EAGER', 'False') == 'True'
+JOBS_MAX_ATTEMPTS = int(os.getenv('JOBS_MAX_ATTEMPTS', 5))
+JOBS_BACKOFF_BASE = int(os.getenv('JOBS_BACKOFF_BASE', 10))
+JOBS_BACKOFF_MAX = int(os.getenv('JOBS_BACKOFF_MAX', 60 * 60))
+JOBS_LEASE_SECONDS = int(os.getenv('JOBS_LEASE_SECONDS', 5 * 60))
+JOBS_RETENTION = int(os.getenv('JOBS_RETENTION', 7 * 24 * 60 * 60))
+
+# Booking confirmations are printed to the console unless an SMTP backend is configured.
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'bookings@localhost')
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'False') == 'True'
 
 
 # Database
@@ -93,10 +199,30 @@ DATABASES = {
         'PORT': os.getenv('DB_PORT', 3306),
         'OPTIONS': {
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'"
-        }
+        },
+        # Persistent connections: keep each thread's connection for this many
+        # seconds and ping it before reuse instead of reconnecting per request.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Connection pool mode: one process-wide pool shared by all threads, sized by
+# DB_POOL_SIZE. Connections go back to the pool at the end of each request
+# (so CONN_MAX_AGE is 0) and are recycled after DB_POOL_MAX_LIFETIME seconds.
+# Stats are at /db/pool-stats/ for staff.
+if os.getenv('DB_POOL', 'False') == 'True':
+    DATABASES['default'].update({
+        'ENGINE': 'tourism_backend.db.backends.mysql',
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'MAX_SIZE': int(os.getenv('DB_POOL_SIZE', 10)),
+            'MAX_LIFETIME': int(os.getenv('DB_POOL_MAX_LIFETIME', 1800)),
+            'TIMEOUT': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+            'HEALTH_CHECK_IDLE': int(os.getenv('DB_POOL_HEALTH_CHECK_IDLE', 5)),
+        },
+    })
+
 
 
 # Password validation
@@ -0,0 +1,26 @@
+"""
+Settings for local load tests against a throwaway SQLite database.
+
+    python manage.py loadtest --settings=tourism_backend.settings_loadtest --seed
+
+Point DATABASES at a local MySQL/MariaDB instead (or use the regular
+settings) to measure against the production engine.
+"""
+from .settings import *  # noqa: F401,F403
+
+DEBUG = False
+ALLOWED_HOSTS = ['testserver', 'localhost', '127.0.0.1']
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'loadtest.sqlite3',
+        'OPTIONS': {
+            # Concurrent simulated users write bookings; wait instead of failing.
+            'timeout': 30,
+        },
+    }
+}
+
+# One JSON log line per simulated request would swamp the report.
+LOGGING['loggers']['tourism.requests']['level'] = 'WARNING'
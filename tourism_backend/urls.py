@@ -14,11 +14,14 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth import views as auth_views
 from django.urls import path, include
 from users import views as user_views
 from bookings import views as booking_views
+from bookings import catalogue_api
+from . import views as project_views
 from django.urls import path, include  
 
 urlpatterns = [
@@ -28,6 +31,19 @@ urlpatterns = [
     path("", user_views.req_home, name="home"),
     path("login/", auth_views.LoginView.as_view(template_name='users/login.html'), name="login"),
     path("logout/", auth_views.LogoutView.as_view(template_name='users/logout.html', http_method_names=['get', 'post', 'options', 'head']), name="logout"),
-    path('booking/create/', booking_views.create_booking, name='create_booking'),
+    path('booking/create/', booking_views.create_booking_async if settings.ASYNC_VIEWS else booking_views.create_booking, name='create_booking'),
+    path('booking/batch/', booking_views.create_booking_batch, name='create_booking_batch'),
+    path('bookings/mine/', booking_views.my_bookings_api_async if settings.ASYNC_VIEWS else booking_views.my_bookings_api, name='my_bookings_api'),
+    path('bookings/export/', booking_views.export_bookings, name='export_bookings'),
+    path('quotes/', booking_views.quote_prices, name='quote_prices'),
+    path('db/pool-stats/', project_views.db_pool_stats, name='db_pool_stats'),
+    path('metrics/requests/', project_views.request_metrics, name='request_metrics'),
+    path('catalogue/cache-stats/', booking_views.catalogue_cache_stats, name='catalogue_cache_stats'),
+    path('api/catalogue/packages/', catalogue_api.package_catalogue, name='package_catalogue'),
+    path('api/catalogue/guides/', catalogue_api.guide_catalogue, name='guide_catalogue'),
+    path('api/catalogue/destinations/', catalogue_api.destination_catalogue, name='destination_catalogue'),
     path('', include('users.urls')),
+    path('', include('guide.urls')),
+    path('', include('search.urls')),
+    path('', include('jobs.urls')),
 ]
@@ -0,0 +1,28 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connections
+from django.http import JsonResponse
+
+from .db.pool import pool_stats
+from .middleware import view_metrics
+
+
+@staff_member_required
+def db_pool_stats(request):
+    """Connection pool sizes, acquire waits and reconnect counts for this worker"""
+    persistent = {
+        alias: {
+            'engine': connections.settings[alias]['ENGINE'],
+            'conn_max_age': connections.settings[alias]['CONN_MAX_AGE'],
+            'health_checks': connections.settings[alias]['CONN_HEALTH_CHECKS'],
+        }
+        for alias in connections.settings
+    }
+    return JsonResponse({'success': True, 'pools': pool_stats(), 'databases': persistent})
+
+
+@staff_member_required
+def request_metrics(request):
+    """Per-view latency, query count and DB time summary for this worker"""
+    if request.method == 'POST' and request.POST.get('reset'):
+        view_metrics.reset()
+    return JsonResponse({'success': True, 'views': view_metrics.summary()})
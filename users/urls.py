@@ -1,4 +1,5 @@
 # users/urls.py
+from django.conf import settings
 from django.urls import path
 from django.contrib.auth import views as auth_views
 from . import views as user_views
@@ -6,7 +7,7 @@ from . import views as user_views
 urlpatterns = [
     # This path matches your package_list view and names it 'home'
     # This fixes: NoReverseMatch for 'home'
-    path('book/', user_views.package_list, name='book'),
+    path('book/', user_views.package_list_async if settings.ASYNC_VIEWS else user_views.package_list, name='book'),
     
     # This path is for your new create_booking_view
     # This fixes the {% url 'create_booking' %} error
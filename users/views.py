@@ -1,5 +1,6 @@
 # users/views.py
 import json
+from datetime import date, timedelta
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import JsonResponse
 from django.contrib import messages
@@ -13,6 +14,16 @@ from django.contrib.auth import logout
 
 # --- IMPORT BOTH of your models ---
 from bookings.models import Package, Booking 
+from bookings.cache import aget_active_packages, get_active_packages
+from bookings.idempotency import idempotent
+from bookings.archive import ahistory_page, history_page
+from bookings.pagination import InvalidCursor, page_size_from
+from bookings.pricing import catalogue_prices, quote
+from bookings.views import max_people
+from bookings.rollups import REVENUE_STATUSES, monthly_revenue, status_totals, upcoming
+from asgiref.sync import sync_to_async
+
+UPCOMING_DAYS = 14
 
 # Create your views here.
 def register_user(request):
@@ -32,18 +43,57 @@ def profile(request):
     return render(request,'users/profile.html')
 
 def package_list(request):
-    packages = Package.objects.all()  # retrieve all rows
+    packages = get_active_packages()  # served from the versioned catalogue cache
     
     # --- CRITICAL FIX ---
     # Your template needs the 'my_bookings' variable
     my_bookings = []
+    next_cursor = None
     if request.user.is_authenticated:
-        my_bookings = Booking.objects.filter(user=request.user).order_by('-travel_date')
+        # Keyset pagination on (travel_date, booking_id) so deep pages stay cheap
+        keys = ['travel_date', 'booking_id']
+        try:
+            my_bookings, next_cursor = history_page(
+                request.user, keys, cursor=request.GET.get('cursor'), page_size=page_size_from(request)
+            )
+        except InvalidCursor:
+            # A stale or mangled cursor just starts over from the first page
+            my_bookings, next_cursor = history_page(request.user, keys, page_size=page_size_from(request))
 
     # Pass both packages AND my_bookings to the template
     context = {
         'packages': packages,
-        'my_bookings': my_bookings
+        'priced_packages': catalogue_prices(packages),
+        'my_bookings': my_bookings,
+        'next_cursor': next_cursor
+    }
+    return render(request, 'users/booking-page.html', context)
+
+
+async def package_list_async(request):
+    """Async version of package_list, used when ASYNC_VIEWS is on (ASGI)"""
+    packages = await aget_active_packages()
+
+    # Resolve the user now so the template doesn't lazily query it in async context
+    user = await request.auser()
+    request.user = user
+
+    my_bookings = []
+    next_cursor = None
+    if user.is_authenticated:
+        keys = ['travel_date', 'booking_id']
+        try:
+            my_bookings, next_cursor = await ahistory_page(
+                user, keys, cursor=request.GET.get('cursor'), page_size=page_size_from(request)
+            )
+        except InvalidCursor:
+            my_bookings, next_cursor = await ahistory_page(user, keys, page_size=page_size_from(request))
+
+    context = {
+        'packages': packages,
+        'priced_packages': await sync_to_async(catalogue_prices)(packages),
+        'my_bookings': my_bookings,
+        'next_cursor': next_cursor
     }
     return render(request, 'users/booking-page.html', context)
 
@@ -51,6 +101,7 @@ def package_list(request):
 # --- NEW VIEW TO HANDLE BOOKING ---
 @login_required
 @require_POST
+@idempotent
 def create_booking_view(request):
     try:
         # 1. Load the JSON data sent from the JavaScript
@@ -59,12 +110,15 @@ def create_booking_view(request):
         # 2. Get data from the 'data' dictionary
         package_id = data.get('package_id')
         number_of_people = int(data.get('number_of_people', 1))
+        if number_of_people > max_people():
+            return JsonResponse({'error': f'At most {max_people()} people per booking.'}, status=400)
         
         # 3. Find the package in the database
         package = get_object_or_404(Package, package_id=package_id)
         
-        # 4. Calculate the total price
-        total_price = package.price * number_of_people
+        # 4. Calculate the total price (seasonal and group-discount rules apply)
+        travel_date = data.get('travel_date')
+        total_price = quote(package, number_of_people, date.fromisoformat(travel_date) if travel_date else None).total
         
         # 5. Create the new booking object
         Booking.objects.create(
@@ -100,9 +154,29 @@ def dashboard_redirect(request):
 @login_required
 @user_passes_test(lambda u: u.is_staff) 
 def agent_dashboard(request):
-    """View for the admin dashboard."""
-    # You might want to pass all bookings, packages, or user info here
-    return render(request, 'users/agent_dashboard.html')
+    """Booking and revenue overview for staff, read from the daily rollups."""
+    today = date.today()
+    totals = status_totals()
+    # Current month, the five before it and the two after it
+    first = today.replace(day=1)
+    for _ in range(5):
+        first = (first - timedelta(days=1)).replace(day=1)
+    last = today.replace(day=1)
+    for _ in range(3):
+        last = (last + timedelta(days=32)).replace(day=1)
+    months, revenue = monthly_revenue(first, last)
+    context = {
+        'pending_count': totals.get('pending', {}).get('bookings') or 0,
+        'confirmed_count': totals.get('confirmed', {}).get('bookings') or 0,
+        'total_revenue': sum(
+            totals.get(status, {}).get('total_amount') or 0 for status in REVENUE_STATUSES
+        ),
+        'months': months,
+        'revenue_by_package': revenue,
+        'upcoming': upcoming(today, UPCOMING_DAYS),
+        'upcoming_days': UPCOMING_DAYS,
+    }
+    return render(request, 'users/agent_dashboard.html', context)
 def logout_view(request):
     logout(request)
     messages.info(request, "You have been successfully logged out.")